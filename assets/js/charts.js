@@ -0,0 +1,51 @@
+// Gráfica de tendencias: aplica los parches que envía el servidor
+// (rcvco.services.chart_data.parche_series) sobre un único Chart.js.
+// Requiere /js/vendor/chart.umd.js (servido localmente, ver `make vendor-js`).
+(function(){
+  let chart = null;
+  let estilos = {};
+
+  function crear(el){
+    return new Chart(el.getContext('2d'), {
+      type: 'line',
+      data: { datasets: [] },
+      options: { responsive: true, parsing: false, animation: false, scales: { x: { display: false } } },
+    });
+  }
+
+  function dataset(id){
+    let ds = chart.data.datasets.find(d => d.id === id);
+    if(!ds){
+      const e = estilos[id] || { label: id, color: '#64748b' };
+      ds = { id, label: e.label, data: [], borderColor: e.color, backgroundColor: e.color + '33', fill: false };
+      chart.data.datasets.push(ds);
+    }
+    return ds;
+  }
+
+  window.rcvTrends = {
+    // parche: { id: { desde, puntos: [{x, y}] } }; reiniciar=true descarta lo previo.
+    // Devuelve si se aplicó: el servidor reenvía las series completas si no
+    // (Chart.js o el canvas aún no están, o un parche sin gráfica previa).
+    aplicar(parche, nuevosEstilos, reiniciar){
+      const el = document.getElementById('chart-trends');
+      if(!el || typeof Chart === 'undefined') return false;
+      if(!chart || chart.canvas !== el){
+        if(!reiniciar) return false;  // un parche incremental no sirve sobre una gráfica nueva
+        if(chart) chart.destroy();
+        chart = crear(el);
+      }
+      if(nuevosEstilos) estilos = nuevosEstilos;
+      if(reiniciar) chart.data.datasets = [];
+      for(const [id, cambio] of Object.entries(parche)){
+        const ds = dataset(id);
+        ds.data.length = Math.min(ds.data.length, cambio.desde);
+        // x numérico para parsing:false; la fecha va en la etiqueta del punto
+        cambio.puntos.forEach((p, i) => ds.data.push({ x: cambio.desde + i, y: p.y, fecha: p.x }));
+      }
+      chart.data.datasets = chart.data.datasets.filter(d => d.data.length);
+      chart.update('none');
+      return true;
+    },
+  };
+})();
@@ -1,11 +1,33 @@
 from __future__ import annotations
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import AsyncIterator, Protocol
+
+class ErrorLLM(RuntimeError):
+    """Fallo del proveedor LLM tras agotar reintentos (o error no reintentable)."""
 
 class LLMClient(ABC):
     @abstractmethod
     def generate_report(self, prompt: str) -> str:  # pragma: no cover
         ...
 
+    async def agenerate_report(self, prompt: str) -> str:
+        """Versión asíncrona; por defecto ejecuta la síncrona en un hilo."""
+        return await asyncio.to_thread(self.generate_report, prompt)
+
+    async def astream_report(self, prompt: str) -> AsyncIterator[str]:
+        """Fragmentos del informe a medida que se generan.
+
+        Por defecto un único fragmento con el informe completo; los proveedores
+        con streaming nativo lo sobrescriben.
+        """
+        yield await self.agenerate_report(prompt)
+
 class SupportsGenerate(Protocol):
     def generate_report(self, prompt: str) -> str: ...
+
+class SupportsAsyncGenerate(Protocol):
+    async def agenerate_report(self, prompt: str) -> str: ...
+
+class SupportsStream(Protocol):
+    def astream_report(self, prompt: str) -> AsyncIterator[str]: ...
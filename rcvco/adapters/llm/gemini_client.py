@@ -1,10 +1,30 @@
 from __future__ import annotations
-from .base import LLMClient
+from typing import Any, Dict, Tuple
+from rcvco.config import settings
+from .http_client import ClienteLLMHTTP
 
-class GeminiClient(LLMClient):
-    def __init__(self, api_key: str | None, model: str):
-        self.api_key = api_key
-        self.model = model
+class GeminiClient(ClienteLLMHTTP):
+    proveedor = "gemini"
 
-    def generate_report(self, prompt: str) -> str:  # pragma: no cover (simulación)
+    def __init__(self, api_key: str | None, model: str, base_url: str | None = None, **kwargs: Any):
+        super().__init__(api_key, model, base_url or settings.GEMINI_BASE_URL, **kwargs)
+
+    def _simular(self, prompt: str) -> str:  # sin API key
         return f"[gemini:{self.model}] {prompt[:200]}"
+
+    def _peticion(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        return f"/v1beta/models/{self.model}:generateContent", {
+            "headers": {"x-goog-api-key": self.api_key},
+            "json": {"contents": [{"parts": [{"text": prompt}]}]},
+        }
+
+    def _extraer_texto(self, data: Dict[str, Any]) -> str:
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+
+    def _peticion_stream(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        _, kwargs = self._peticion(prompt)
+        return f"/v1beta/models/{self.model}:streamGenerateContent", {**kwargs, "params": {"alt": "sse"}}
+
+    def _extraer_delta(self, data: Dict[str, Any]) -> str:
+        partes = data["candidates"][0].get("content", {}).get("parts", [])
+        return "".join(p.get("text", "") for p in partes)
@@ -0,0 +1,207 @@
+"""Base HTTP asíncrona para proveedores LLM.
+
+En cada event loop, cada proveedor (clave: nombre + base_url) comparte un
+único httpx.AsyncClient con pool de conexiones y un semáforo que limita las
+llamadas simultáneas. `generate_report` (síncrono) usa un loop propio y cierra
+sus clientes al terminar; llamado dentro de un event loop corre en un hilo
+aparte y bloquea al llamador como antes (en código async, `agenerate_report`).
+Cada llamada tiene timeout propio y los fallos transitorios (red, timeout,
+408/425/429/5xx) se reintentan con backoff exponencial con jitter completo,
+respetando Retry-After cuando el proveedor lo envía.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import random
+import re
+import weakref
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, ClassVar, Dict, Optional, Tuple
+import httpx
+from rcvco.config import settings
+from .base import ErrorLLM, LLMClient
+
+REINTENTABLES = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class _Pool:
+    cliente: httpx.AsyncClient
+    semaforo: asyncio.Semaphore
+
+
+class ClienteLLMHTTP(LLMClient):
+    proveedor: ClassVar[str] = ""
+    # un juego de pools por event loop: un AsyncClient no puede cambiar de loop
+    _pools: ClassVar["weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], _Pool]]"] = (
+        weakref.WeakKeyDictionary()
+    )
+
+    def __init__(
+        self,
+        api_key: str | None,
+        model: str,
+        base_url: str,
+        timeout: Optional[float] = None,
+        max_concurrencia: Optional[int] = None,
+        max_reintentos: Optional[int] = None,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = settings.LLM_TIMEOUT_S if timeout is None else timeout
+        self.max_concurrencia = settings.LLM_MAX_CONCURRENCIA if max_concurrencia is None else max_concurrencia
+        self.max_reintentos = settings.LLM_MAX_REINTENTOS if max_reintentos is None else max_reintentos
+
+    # --- a implementar por proveedor ---
+
+    @abstractmethod
+    def _simular(self, prompt: str) -> str:  # pragma: no cover
+        ...
+
+    @abstractmethod
+    def _peticion(self, prompt: str) -> Tuple[str, Dict[str, Any]]:  # pragma: no cover
+        """(ruta, kwargs de httpx) para la llamada de generación."""
+
+    @abstractmethod
+    def _extraer_texto(self, data: Dict[str, Any]) -> str:  # pragma: no cover
+        ...
+
+    @abstractmethod
+    def _peticion_stream(self, prompt: str) -> Tuple[str, Dict[str, Any]]:  # pragma: no cover
+        """(ruta, kwargs de httpx) para la llamada en streaming (SSE)."""
+
+    @abstractmethod
+    def _extraer_delta(self, data: Dict[str, Any]) -> str:  # pragma: no cover
+        """Texto de un evento SSE del proveedor ('' si no trae texto)."""
+
+    # --- pool compartido ---
+
+    def _pool(self) -> _Pool:
+        pools = self._pools.setdefault(asyncio.get_running_loop(), {})
+        clave = (self.proveedor, self.base_url)
+        pool = pools.get(clave)
+        if pool is None or pool.cliente.is_closed:
+            limite = self.max_concurrencia
+            pool = _Pool(
+                cliente=httpx.AsyncClient(
+                    base_url=self.base_url,
+                    limits=httpx.Limits(max_connections=limite, max_keepalive_connections=limite),
+                ),
+                semaforo=asyncio.Semaphore(limite),
+            )
+            pools[clave] = pool
+        return pool
+
+    @classmethod
+    async def cerrar_clientes(cls) -> None:
+        """Cierra los clientes del event loop actual."""
+        pools = cls._pools.pop(asyncio.get_running_loop(), {})
+        for pool in pools.values():
+            await pool.cliente.aclose()
+
+    # --- generación ---
+
+    def _espera(self, intento: int, respuesta: Optional[httpx.Response] = None) -> float:
+        tope = settings.LLM_BACKOFF_MAX_S
+        if respuesta is not None:
+            try:
+                return min(float(respuesta.headers["retry-after"]), tope)
+            except (KeyError, ValueError):
+                pass
+        return random.uniform(0, min(tope, settings.LLM_BACKOFF_BASE_S * 2 ** intento))
+
+    async def agenerate_report(self, prompt: str) -> str:
+        if not self.api_key:
+            return self._simular(prompt)
+        pool = self._pool()
+        ruta, kwargs = self._peticion(prompt)
+        error: Optional[BaseException] = None
+        for intento in range(self.max_reintentos + 1):
+            respuesta: Optional[httpx.Response] = None
+            try:
+                async with pool.semaforo:
+                    respuesta = await pool.cliente.post(ruta, timeout=self.timeout, **kwargs)
+            except httpx.TransportError as e:  # incluye timeouts
+                error = e
+            else:
+                if respuesta.status_code < 400:
+                    try:
+                        return self._extraer_texto(respuesta.json())
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        raise ErrorLLM(f"{self.proveedor}: respuesta inesperada") from e
+                error = ErrorLLM(f"{self.proveedor} HTTP {respuesta.status_code}: {respuesta.text[:200]}")
+                if respuesta.status_code not in REINTENTABLES:
+                    raise error
+            if intento < self.max_reintentos:
+                await asyncio.sleep(self._espera(intento, respuesta))
+        raise ErrorLLM(f"{self.proveedor}: {self.max_reintentos + 1} intentos fallidos ({error})") from error
+
+    async def astream_report(self, prompt: str) -> AsyncIterator[str]:
+        """Streaming SSE del proveedor.
+
+        Solo se reintenta mientras no se haya emitido ningún fragmento; un corte
+        a mitad de respuesta se propaga como ErrorLLM.
+        """
+        if not self.api_key:
+            for fragmento in re.findall(r"\S+\s*", self._simular(prompt)):
+                yield fragmento
+            return
+        pool = self._pool()
+        ruta, kwargs = self._peticion_stream(prompt)
+        error: Optional[BaseException] = None
+        for intento in range(self.max_reintentos + 1):
+            respuesta: Optional[httpx.Response] = None
+            emitido = False
+            try:
+                async with pool.semaforo, pool.cliente.stream("POST", ruta, timeout=self.timeout, **kwargs) as respuesta:
+                    if respuesta.status_code < 400:
+                        async for linea in respuesta.aiter_lines():
+                            if not linea.startswith("data:"):
+                                continue
+                            dato = linea[5:].strip()
+                            if dato == "[DONE]":
+                                break
+                            try:
+                                delta = self._extraer_delta(json.loads(dato))
+                            except (ValueError, KeyError, IndexError, TypeError) as e:
+                                raise ErrorLLM(f"{self.proveedor}: evento inesperado") from e
+                            if delta:
+                                emitido = True
+                                yield delta
+                        return
+                    await respuesta.aread()
+            except httpx.TransportError as e:
+                if emitido:
+                    raise ErrorLLM(f"{self.proveedor}: stream interrumpido ({e})") from e
+                error = e
+            else:
+                error = ErrorLLM(f"{self.proveedor} HTTP {respuesta.status_code}: {respuesta.text[:200]}")
+                if respuesta.status_code not in REINTENTABLES:
+                    raise error
+            if intento < self.max_reintentos:
+                await asyncio.sleep(self._espera(intento, respuesta))
+        raise ErrorLLM(f"{self.proveedor}: {self.max_reintentos + 1} intentos fallidos ({error})") from error
+
+    async def _generar_y_cerrar(self, prompt: str) -> str:
+        try:
+            return await self.agenerate_report(prompt)
+        finally:
+            await self.cerrar_clientes()  # el loop de asyncio.run muere al volver
+
+    def generate_report(self, prompt: str) -> str:
+        """Versión síncrona de `agenerate_report`; bloquea hasta tener el informe."""
+        if not self.api_key:
+            return self._simular(prompt)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._generar_y_cerrar(prompt))
+        # asyncio.run no admite un loop ya activo en este hilo
+        with ThreadPoolExecutor(max_workers=1) as hilo:
+            return hilo.submit(asyncio.run, self._generar_y_cerrar(prompt)).result()
+
+
+__all__ = ["ClienteLLMHTTP", "REINTENTABLES"]
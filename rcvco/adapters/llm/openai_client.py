@@ -1,10 +1,30 @@
 from __future__ import annotations
-from .base import LLMClient
+from typing import Any, Dict, Tuple
+from rcvco.config import settings
+from .http_client import ClienteLLMHTTP
 
-class OpenAIClient(LLMClient):
-    def __init__(self, api_key: str | None, model: str):
-        self.api_key = api_key
-        self.model = model
+class OpenAIClient(ClienteLLMHTTP):
+    proveedor = "openai"
 
-    def generate_report(self, prompt: str) -> str:  # pragma: no cover (simulación)
+    def __init__(self, api_key: str | None, model: str, base_url: str | None = None, **kwargs: Any):
+        super().__init__(api_key, model, base_url or settings.OPENAI_BASE_URL, **kwargs)
+
+    def _simular(self, prompt: str) -> str:  # sin API key
         return f"[openai:{self.model}] {prompt[:200]}"
+
+    def _peticion(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        return "/v1/chat/completions", {
+            "headers": {"Authorization": f"Bearer {self.api_key}"},
+            "json": {"model": self.model, "messages": [{"role": "user", "content": prompt}]},
+        }
+
+    def _extraer_texto(self, data: Dict[str, Any]) -> str:
+        return data["choices"][0]["message"]["content"]
+
+    def _peticion_stream(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        ruta, kwargs = self._peticion(prompt)
+        kwargs["json"] = {**kwargs["json"], "stream": True}
+        return ruta, kwargs
+
+    def _extraer_delta(self, data: Dict[str, Any]) -> str:
+        return data["choices"][0]["delta"].get("content") or ""
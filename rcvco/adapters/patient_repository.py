@@ -0,0 +1,255 @@
+"""Repositorio de pacientes persistente en SQLite (modo WAL).
+
+Reemplaza el diccionario en memoria de `rcvco.api.endpoints`: sobrevive a
+reinicios y varios workers de uvicorn pueden compartir el mismo archivo (WAL
+permite lectores concurrentes con un escritor). Esquema:
+
+- pacientes: una fila por paciente, con programa, categoría de riesgo y
+  estadio precalculados al guardar (índices para filtrar y listar);
+- labs: una fila por resultado, índice (pseudo_id, nombre, fecha).
+
+El listado usa paginación por cursor (keyset) sobre pseudo_id, sin OFFSET.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from rcvco.config import settings
+from rcvco.domain.evaluacion import ContextoEvaluacion
+from rcvco.domain.models import LabResult, Paciente
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pacientes (
+    pseudo_id TEXT PRIMARY KEY,
+    programa TEXT NOT NULL,
+    riesgo_categoria TEXT NOT NULL,
+    estadio TEXT,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pacientes_programa ON pacientes (programa, pseudo_id);
+CREATE INDEX IF NOT EXISTS ix_pacientes_riesgo ON pacientes (riesgo_categoria, pseudo_id);
+CREATE INDEX IF NOT EXISTS ix_pacientes_estadio ON pacientes (estadio, pseudo_id);
+CREATE TABLE IF NOT EXISTS labs (
+    id INTEGER PRIMARY KEY,
+    pseudo_id TEXT NOT NULL REFERENCES pacientes (pseudo_id) ON DELETE CASCADE,
+    nombre TEXT NOT NULL,
+    valor REAL NOT NULL,
+    unidad TEXT,
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_labs_paciente ON labs (pseudo_id, nombre, fecha);
+"""
+
+_MAX_PARAMETROS = 500  # por debajo del límite de variables de SQLite
+COLUMNAS_FILTRO = ("programa", "riesgo_categoria", "estadio")
+CAMPOS_PACIENTE = (
+    "pseudo_id", "sexo", "edad", "peso_kg", "talla_cm", "has_dm", "has_hta", "estadio_erc",
+    "labs", "programa", "riesgo_categoria", "estadio",
+)
+
+
+def _fila_paciente(p: Paciente) -> Tuple[str, str, str, Optional[str], str]:
+    ctx = ContextoEvaluacion(p)
+    estadio = p.estadio_erc if p.estadio_erc is not None else ctx.estadio_calculado
+    datos = p.model_dump(mode="json", exclude={"labs"})
+    return (
+        p.pseudo_id,
+        ctx.programa,
+        ctx.riesgo_categoria,
+        None if estadio is None else str(estadio),
+        json.dumps(datos, ensure_ascii=False),
+    )
+
+
+class RepositorioPacientes:
+    def __init__(self, ruta: str):
+        # cada hilo abre su propia conexión: con ":memory:" (o "", base
+        # temporal) cada una sería una base vacía distinta
+        if ruta in ("", ":memory:"):
+            raise ValueError("RepositorioPacientes requiere una ruta de archivo SQLite")
+        self.ruta = ruta
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._conexion().executescript(_ESQUEMA)
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.ruta, timeout=10.0, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA foreign_keys=ON")
+            self._local.con = con
+        return con
+
+    def cerrar(self) -> None:
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    # --- escritura ---
+
+    def guardar(self, paciente: Paciente) -> None:
+        self.guardar_lote([paciente])
+
+    def guardar_lote(self, pacientes: Iterable[Paciente], tamano_lote: int = 500) -> int:
+        """Inserta o reemplaza pacientes (y sus labs) en transacciones por lote."""
+        total = 0
+        lote: List[Paciente] = []
+        for p in pacientes:
+            lote.append(p)
+            if len(lote) >= tamano_lote:
+                total += self._escribir_lote(lote)
+                lote = []
+        if lote:
+            total += self._escribir_lote(lote)
+        return total
+
+    def _escribir_lote(self, lote: Sequence[Paciente]) -> int:
+        filas = [_fila_paciente(p) for p in lote]
+        labs = [
+            (p.pseudo_id, lab.nombre, lab.valor, lab.unidad, lab.fecha.isoformat())
+            for p in lote
+            for lab in p.labs
+        ]
+        con = self._conexion()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany(
+                "INSERT INTO pacientes (pseudo_id, programa, riesgo_categoria, estadio, datos) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (pseudo_id) DO UPDATE SET programa = excluded.programa, "
+                "riesgo_categoria = excluded.riesgo_categoria, estadio = excluded.estadio, datos = excluded.datos",
+                filas,
+            )
+            con.executemany("DELETE FROM labs WHERE pseudo_id = ?", [(f[0],) for f in filas])
+            con.executemany(
+                "INSERT INTO labs (pseudo_id, nombre, valor, unidad, fecha) VALUES (?, ?, ?, ?, ?)", labs
+            )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return len(filas)
+
+    def eliminar(self, pseudo_id: str) -> bool:
+        cur = self._conexion().execute("DELETE FROM pacientes WHERE pseudo_id = ?", (pseudo_id,))
+        return cur.rowcount > 0
+
+    # --- lectura ---
+
+    def _labs_de(self, ids: Sequence[str]) -> Dict[str, List[LabResult]]:
+        por_paciente: Dict[str, List[LabResult]] = {pid: [] for pid in ids}
+        con = self._conexion()
+        for i in range(0, len(ids), _MAX_PARAMETROS):
+            parte = ids[i:i + _MAX_PARAMETROS]
+            marcas = ",".join("?" * len(parte))
+            for pid, nombre, valor, unidad, fecha in con.execute(
+                f"SELECT pseudo_id, nombre, valor, unidad, fecha FROM labs WHERE pseudo_id IN ({marcas}) ORDER BY id",
+                parte,
+            ):
+                por_paciente[pid].append(LabResult.model_construct(
+                    nombre=nombre, valor=valor, unidad=unidad, fecha=date.fromisoformat(fecha),
+                ))
+        return por_paciente
+
+    def _pacientes(self, filas: List[Tuple[str, str]], con_labs: bool = True) -> List[Paciente]:
+        labs = self._labs_de([pid for pid, _ in filas]) if con_labs else {}
+        return [Paciente(**json.loads(datos), labs=labs.get(pid, [])) for pid, datos in filas]
+
+    def obtener(self, pseudo_id: str) -> Optional[Paciente]:
+        fila = self._conexion().execute(
+            "SELECT pseudo_id, datos FROM pacientes WHERE pseudo_id = ?", (pseudo_id,)
+        ).fetchone()
+        return self._pacientes([fila])[0] if fila else None
+
+    def _pagina(
+        self,
+        columnas: str,
+        despues_de: Optional[str],
+        limite: int,
+        filtros: Dict[str, Optional[str]],
+    ) -> Tuple[List[Tuple[Any, ...]], Optional[str]]:
+        condiciones = ["pseudo_id > ?"]
+        parametros: List[Any] = [despues_de or ""]
+        for columna in COLUMNAS_FILTRO:
+            valor = filtros.get(columna)
+            if valor is not None:
+                condiciones.append(f"{columna} = ?")
+                parametros.append(valor)
+        filas = self._conexion().execute(
+            f"SELECT {columnas} FROM pacientes WHERE {' AND '.join(condiciones)} ORDER BY pseudo_id LIMIT ?",
+            (*parametros, limite + 1),
+        ).fetchall()
+        siguiente = filas[limite - 1][0] if len(filas) > limite else None
+        return filas[:limite], siguiente
+
+    def listar(
+        self,
+        despues_de: Optional[str] = None,
+        limite: int = 50,
+        con_labs: bool = True,
+        **filtros: Optional[str],
+    ) -> Tuple[List[Paciente], Optional[str]]:
+        """Página ordenada por pseudo_id a partir del cursor `despues_de`.
+
+        Filtros opcionales: programa, riesgo_categoria, estadio. Devuelve
+        (pacientes, cursor siguiente o None si no hay más).
+        """
+        filas, siguiente = self._pagina("pseudo_id, datos", despues_de, limite, filtros)
+        return self._pacientes(filas, con_labs), siguiente
+
+    def listar_campos(
+        self,
+        campos: Sequence[str],
+        despues_de: Optional[str] = None,
+        limite: int = 50,
+        **filtros: Optional[str],
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Como `listar`, pero devuelve solo `campos` (ver CAMPOS_PACIENTE) como dicts.
+
+        Los labs solo se consultan si se piden; las columnas derivadas
+        (programa, riesgo_categoria, estadio) salen de la tabla sin recalcular.
+        """
+        desconocidos = set(campos) - set(CAMPOS_PACIENTE)
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+        filas, siguiente = self._pagina(
+            "pseudo_id, programa, riesgo_categoria, estadio, datos", despues_de, limite, filtros
+        )
+        labs = self._labs_de([f[0] for f in filas]) if "labs" in campos else {}
+        items = []
+        for pid, programa, riesgo, estadio, datos in filas:
+            completo = {**json.loads(datos), "programa": programa, "riesgo_categoria": riesgo, "estadio": estadio}
+            if "labs" in campos:
+                completo["labs"] = [lab.model_dump(mode="json") for lab in labs[pid]]
+            items.append({c: completo.get(c) for c in campos})
+        return items, siguiente
+
+    def iterar(self, tamano_pagina: int = 200, con_labs: bool = True) -> Iterator[Paciente]:
+        cursor: Optional[str] = None
+        while True:
+            pagina, cursor = self.listar(cursor, tamano_pagina, con_labs)
+            yield from pagina
+            if cursor is None:
+                return
+
+    def contar(self) -> int:
+        return self._conexion().execute("SELECT COUNT(*) FROM pacientes").fetchone()[0]
+
+
+_repositorio: Optional[RepositorioPacientes] = None
+
+
+def get_repositorio() -> RepositorioPacientes:
+    global _repositorio
+    if _repositorio is None:
+        _repositorio = RepositorioPacientes(settings.PACIENTES_DB_PATH)
+    return _repositorio
+
+
+__all__ = ["RepositorioPacientes", "get_repositorio", "CAMPOS_PACIENTE", "COLUMNAS_FILTRO"]
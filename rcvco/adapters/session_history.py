@@ -0,0 +1,187 @@
+"""Historial de pacientes por sesión de profesional, fuera del estado de Reflex.
+
+- Cada sesión (token de cliente de Reflex) tiene un OrderedDict clave ->
+  snapshot: búsqueda O(1) por pseudo_id o nombre y orden LRU (el último
+  guardado o cargado queda al final).
+- Como mucho HISTORIAL_MAX_ITEMS por sesión; al superarlo se expulsa el menos
+  usado. En memoria se mantienen HISTORIAL_MAX_SESIONES sesiones (LRU); las
+  expulsadas siguen en disco y se recargan al volver a pedirlas.
+- Con ruta (HISTORIAL_DB_PATH) se persiste en SQLite (write-through), así el
+  historial sobrevive a reinicios. Cada worker mantiene su propia vista en
+  memoria de las sesiones que atiende: el listado no ve lo que otro worker
+  escriba después de cargarla, pero `obtener` sí busca en disco la clave que
+  no tiene en memoria.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from rcvco.config import settings
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS historial (
+    sesion TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    usado INTEGER NOT NULL,
+    datos TEXT NOT NULL,
+    PRIMARY KEY (sesion, clave)
+);
+CREATE INDEX IF NOT EXISTS ix_historial_uso ON historial (sesion, usado);
+"""
+
+Snapshot = Dict[str, Any]
+
+
+def clave_historial(snap: Snapshot) -> str:
+    """pseudo_id si lo hay; si no, el nombre normalizado."""
+    pid = str(snap.get("pseudo_id") or "").strip()
+    if pid:
+        return pid
+    return " ".join(str(snap.get("nombre") or "PACIENTE").split()).upper()
+
+
+class HistorialSesiones:
+    def __init__(self, ruta: Optional[str] = None, max_items: int = 50, max_sesiones: int = 1000):
+        self.ruta = ruta
+        self.max_items = max_items
+        self.max_sesiones = max_sesiones
+        self._sesiones: "OrderedDict[str, OrderedDict[str, Snapshot]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        if ruta == ":memory:":
+            # una conexión por hilo: cada una vería una base vacía distinta
+            raise ValueError("Sin persistencia se usa ruta=None, no ':memory:'")
+        if ruta:
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+            self._conexion().executescript(_ESQUEMA)
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            assert self.ruta is not None
+            con = sqlite3.connect(self.ruta, timeout=10.0, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def _items(self, sesion: str) -> "OrderedDict[str, Snapshot]":
+        """Historial de la sesión en memoria; se carga de disco la primera vez."""
+        items = self._sesiones.get(sesion)
+        if items is not None:
+            self._sesiones.move_to_end(sesion)
+            return items
+        items = OrderedDict()
+        if self.ruta:
+            filas = self._conexion().execute(
+                "SELECT clave, datos FROM historial WHERE sesion = ? ORDER BY usado DESC LIMIT ?",
+                (sesion, self.max_items),
+            ).fetchall()
+            for clave, datos in reversed(filas):
+                items[clave] = json.loads(datos)
+        self._sesiones[sesion] = items
+        while len(self._sesiones) > self.max_sesiones:
+            self._sesiones.popitem(last=False)  # sigue en disco
+        return items
+
+    def _tocar(self, sesion: str, clave: str, snap: Optional[Snapshot] = None) -> None:
+        if not self.ruta:
+            return
+        con = self._conexion()
+        if snap is None:
+            con.execute(
+                "UPDATE historial SET usado = ? WHERE sesion = ? AND clave = ?",
+                (time.time_ns(), sesion, clave),
+            )
+        else:
+            con.execute(
+                "INSERT INTO historial (sesion, clave, usado, datos) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sesion, clave) DO UPDATE SET usado = excluded.usado, datos = excluded.datos",
+                (sesion, clave, time.time_ns(), json.dumps(snap, ensure_ascii=False, default=str)),
+            )
+
+    def _leer_disco(self, sesion: str, clave: str) -> Optional[Snapshot]:
+        if not self.ruta:
+            return None
+        fila = self._conexion().execute(
+            "SELECT datos FROM historial WHERE sesion = ? AND clave = ?", (sesion, clave)
+        ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def _recortar(self, sesion: str, items: "OrderedDict[str, Snapshot]") -> None:
+        """Expulsa los menos usados por encima de max_items (también de disco)."""
+        expulsadas = []
+        while len(items) > self.max_items:
+            expulsadas.append(items.popitem(last=False)[0])
+        if self.ruta and expulsadas:
+            self._conexion().executemany(
+                "DELETE FROM historial WHERE sesion = ? AND clave = ?",
+                [(sesion, c) for c in expulsadas],
+            )
+
+    def guardar(self, sesion: str, snap: Snapshot) -> str:
+        """Guarda (o reemplaza) el snapshot y devuelve su clave."""
+        clave = clave_historial(snap)
+        with self._lock:
+            items = self._items(sesion)
+            items[clave] = snap
+            items.move_to_end(clave)
+            self._tocar(sesion, clave, snap)
+            self._recortar(sesion, items)
+        return clave
+
+    def obtener(self, sesion: str, clave: str) -> Optional[Snapshot]:
+        """Snapshot por clave (pseudo_id o nombre); cuenta como uso reciente.
+
+        Si no está en memoria se busca en disco (pudo guardarlo otro worker).
+        """
+        with self._lock:
+            items = self._items(sesion)
+            for candidata in (clave, clave_historial({"nombre": clave})):  # tal cual o nombre sin normalizar
+                snap = items.get(candidata)
+                if snap is None:
+                    snap = self._leer_disco(sesion, candidata)
+                if snap is not None:
+                    break
+            else:
+                return None
+            items[candidata] = snap
+            items.move_to_end(candidata)
+            self._tocar(sesion, candidata)
+            self._recortar(sesion, items)
+            return snap
+
+    def listar(self, sesion: str) -> List[Snapshot]:
+        """Snapshots de la sesión, el más reciente primero."""
+        with self._lock:
+            return [{"clave": c, **s} for c, s in reversed(self._items(sesion).items())]
+
+    def eliminar(self, sesion: str, clave: str) -> bool:
+        with self._lock:
+            existia = self._items(sesion).pop(clave, None) is not None
+            if self.ruta:
+                self._conexion().execute("DELETE FROM historial WHERE sesion = ? AND clave = ?", (sesion, clave))
+            return existia
+
+    def __len__(self) -> int:
+        """Sesiones en memoria."""
+        return len(self._sesiones)
+
+
+_historial: Optional[HistorialSesiones] = None
+
+
+def get_historial() -> HistorialSesiones:
+    global _historial
+    if _historial is None:
+        _historial = HistorialSesiones(
+            settings.HISTORIAL_DB_PATH, settings.HISTORIAL_MAX_ITEMS, settings.HISTORIAL_MAX_SESIONES
+        )
+    return _historial
+
+
+__all__ = ["HistorialSesiones", "clave_historial", "get_historial"]
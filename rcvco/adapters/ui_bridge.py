@@ -4,8 +4,7 @@ from datetime import date
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field, ValidationError, ConfigDict
 from rcvco.domain.tfg import crcl_cockcroft_gault
-from rcvco.domain.scoring import calcula_puntaje
-from rcvco.domain.risk import clasificar_riesgo_cv_4_pasos, ascvd_ajustado
+from rcvco.domain.evaluacion import ContextoEvaluacion
 from rcvco.domain.rcv_rules import generar_agenda_avanzada
 from rcvco.domain.models import Paciente, LabResult
 
@@ -68,9 +67,10 @@ def procesar_json(data: Dict[str, Any]) -> Dict[str, Any]:
     except ValidationError as e:
         return {"error": "Validación", "detalles": e.errors()}
     paciente = _build_paciente(pi)
-    puntaje = calcula_puntaje(paciente)
-    riesgo_cat = clasificar_riesgo_cv_4_pasos(paciente)
-    ascvd = ascvd_ajustado(paciente)
+    ctx = ContextoEvaluacion(paciente, hoy=pi.fechaActual)
+    puntaje = ctx.puntaje
+    riesgo_cat = ctx.riesgo_categoria
+    ascvd = ctx.ascvd
     crcl = crcl_cockcroft_gault(paciente, creatinina_mg_dl=pi.creatininaMgDl) if pi.creatininaMgDl else None
     programa = _programa_prioritario(pi)
     agenda = generar_agenda_avanzada(
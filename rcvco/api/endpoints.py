@@ -1,10 +1,13 @@
 from __future__ import annotations
-from typing import List, Dict, Any
-from pydantic import BaseModel
+import base64
+from typing import List, Dict, Any, Tuple
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from rcvco.adapters.patient_repository import CAMPOS_PACIENTE, get_repositorio
 from rcvco.domain.models import Paciente, LabResult
 
-# Almacenamiento en memoria (simple / no persistente)
-_PACIENTES: Dict[str, Paciente] = {}
+# Almacenamiento persistente: rcvco.adapters.patient_repository (SQLite, PACIENTES_DB_PATH)
 
 class PacienteIn(BaseModel):
     pseudo_id: str
@@ -15,23 +18,97 @@ class PacienteIn(BaseModel):
     has_hta: bool = False
     labs: List[Dict[str, Any]] = []
 
+    def a_paciente(self) -> Paciente:
+        return Paciente(
+            pseudo_id=self.pseudo_id,
+            sexo=self.sexo,
+            edad=self.edad,
+            peso_kg=self.peso_kg,
+            has_dm=self.has_dm,
+            has_hta=self.has_hta,
+            labs=[LabResult(**l) for l in self.labs],
+        )
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+CAMPOS_PRESET = {
+    "completo": ("pseudo_id", "sexo", "edad", "peso_kg", "talla_cm", "has_dm", "has_hta", "estadio_erc", "labs"),
+    "resumen": ("pseudo_id", "sexo", "edad", "programa", "riesgo_categoria", "estadio"),
+}
+# parámetro de consulta -> columna filtrable del repositorio
+FILTROS = {"riesgo": "riesgo_categoria", "programa": "programa", "estadio": "estadio"}
+
+
+def _codificar_cursor(pseudo_id: str | None) -> str | None:
+    if pseudo_id is None:
+        return None
+    return base64.urlsafe_b64encode(pseudo_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor: str | None) -> str | None:
+    if not cursor:
+        return None
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("cursor inválido") from e
+
+
+def _campos(valor: str | None) -> Tuple[str, ...]:
+    if not valor:
+        return CAMPOS_PRESET["completo"]
+    if valor in CAMPOS_PRESET:
+        return CAMPOS_PRESET[valor]
+    campos = tuple(c.strip() for c in valor.split(",") if c.strip())
+    desconocidos = set(campos) - set(CAMPOS_PACIENTE)
+    if not campos or desconocidos:
+        raise ValueError(f"fields inválido: {valor}")
+    return campos
+
+
+def _limite(valor: str | None) -> int:
+    if not valor:
+        return LIMITE_POR_DEFECTO
+    try:
+        limite = int(valor)
+    except ValueError as e:
+        raise ValueError("limit debe ser entero") from e
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ValueError(f"limit debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limite
+
+
 async def listar_pacientes(request) -> Any:  # Starlette Request
-    return [p.model_dump() for p in _PACIENTES.values()]
+    """Página de pacientes ordenada por pseudo_id.
+
+    Parámetros: `limit` (1..500, 50 por defecto), `cursor` (el `siguiente` de
+    la página anterior), `fields` ("completo", "resumen" o lista separada por
+    comas) y filtros `riesgo`, `programa`, `estadio`.
+    """
+    q = request.query_params
+    try:
+        campos = _campos(q.get("fields"))
+        limite = _limite(q.get("limit"))
+        despues_de = _decodificar_cursor(q.get("cursor"))
+    except ValueError as e:
+        return JSONResponse({"status": "error", "detalles": str(e)}, status_code=400)
+    filtros = {columna: q.get(param) for param, columna in FILTROS.items() if q.get(param)}
+    items, siguiente = await run_in_threadpool(
+        get_repositorio().listar_campos, campos, despues_de, limite, **filtros
+    )
+    return JSONResponse({"items": items, "siguiente": _codificar_cursor(siguiente)})
 
 async def crear_paciente(request) -> Any:
+    """Crea o reemplaza un paciente; una lista JSON se guarda como lote."""
     data = await request.json()
-    model = PacienteIn(**data)
-    labs = [LabResult(**l) for l in model.labs]
-    paciente = Paciente(
-        pseudo_id=model.pseudo_id,
-        sexo=model.sexo,
-        edad=model.edad,
-        peso_kg=model.peso_kg,
-        has_dm=model.has_dm,
-        has_hta=model.has_hta,
-        labs=labs,
-    )
-    _PACIENTES[paciente.pseudo_id] = paciente
-    return {"status": "ok", "paciente": paciente.model_dump()}
+    try:
+        registros = data if isinstance(data, list) else [data]
+        pacientes = [PacienteIn(**d).a_paciente() for d in registros]
+    except ValidationError as e:
+        return JSONResponse({"status": "error", "detalles": e.errors(include_url=False)}, status_code=422)
+    await run_in_threadpool(get_repositorio().guardar_lote, pacientes)
+    if isinstance(data, list):
+        return JSONResponse({"status": "ok", "guardados": len(pacientes)})
+    return JSONResponse({"status": "ok", "paciente": pacientes[0].model_dump(mode="json")})
 
 __all__ = ["listar_pacientes", "crear_paciente"]
@@ -1,11 +1,29 @@
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List, Dict, Any
-from rcvco.services.report_service import build_and_generate_report, build_prompt
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from rcvco.config import settings
+from rcvco.services.report_service import abuild_and_generate_report, astream_report
+from rcvco.services.report_cache import CACHE_INFORMES
+from rcvco.services.report_batch import generar_informes_ndjson
 from rcvco.services.patient_service import merge_patient_data
-from rcvco.parsing.parser import parse_document
+from rcvco.parsing.pdf import ExtraccionPDFError
+from rcvco.adapters.llm.base import ErrorLLM
 from rcvco.adapters.llm.factory import get_llm_client
-from rcvco.services.content_service import load_content, save_content
+from rcvco.services.facade import SERVICIOS_LOCALES
+from rcvco.services.analysis_service import analizar_ndjson
+from rcvco.services.upload_cache import parse_archivo_cacheado
+from rcvco.services.upload_service import (
+    ArchivoDemasiadoGrande,
+    ArchivoSubido,
+    receive_limitado,
+    recibir_stream,
+    recibir_upload,
+    registrar_memoria,
+    verificar_content_length,
+)
+from rcvco.api.streaming import DuplexStreamingResponse, SSEResponse, evento_sse
 
 api_router = APIRouter()
 
@@ -14,47 +32,135 @@ from rcvco.api.schemas.patient import PatientRequest, ReportResponse, Medication
 
 @api_router.post("/api/parse-text")
 async def parse_text(raw: str):
-    """Parseo muy básico de texto plano de laboratorio (placeholder).
+    """Parseo básico de texto plano de laboratorio.
 
-    Busca patrones simples tipo 'LDL: 120 mg/dL' y construye JSON homogéneo.
+    Busca patrones simples tipo 'LDL: 120 mg/dL' con el catálogo compartido de
+    sinónimos (rcvco.parsing.labs) y construye JSON homogéneo.
     """
-    import re
-    patterns = {
-        "CREATININA EN SUERO U OTROS": r"creatinina[^0-9]*([0-9]+\.?[0-9]*)",
-        "HEMOGLOBINA GLICOSILADA (HBA1C)": r"hba1c[^0-9]*([0-9]+\.?[0-9]*)",
-        "COLESTEROL LDL": r"ldl[^0-9]*([0-9]+\.?[0-9]*)",
-    }
-    labs: list[dict[str, Any]] = []
-    lower = raw.lower()
-    for nombre, pat in patterns.items():
-        m = re.search(pat, lower)
-        if m:
-            try:
-                valor = float(m.group(1))
-            except Exception:
-                continue
-            labs.append({"nombre": nombre, "valor": valor})
-    return {"labs": labs}
+    return await SERVICIOS_LOCALES.parse_text(raw)
 
 
 @api_router.post("/api/preview-report")
 async def preview_report(data: Dict[str, Any]):
     """Devuelve prompt construido sin llamar al LLM (depuración UI)."""
-    return {"prompt": build_prompt(data)}
+    return await SERVICIOS_LOCALES.preview_report(data)
 
 @api_router.post("/api/upload")
-async def upload(file: UploadFile = File(...)):
-    content = await file.read()
-    parsed = parse_document(content, file.filename)
-    return parsed
+async def upload(request: Request, response: Response):
+    """Sube un informe (multipart con campo `file`, o cuerpo crudo con ?filename=).
+
+    El cuerpo se recibe por bloques hacia un archivo temporal y se hashea al
+    vuelo; nunca se carga entero en memoria. Más de UPLOAD_MAX_BYTES -> 413.
+    """
+    try:
+        verificar_content_length(request.headers)
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            limitado = Request(request.scope, receive_limitado(request.receive))
+            async with limitado.form() as form:
+                file = form.get("file")
+                if not isinstance(file, UploadFile):
+                    raise HTTPException(status_code=400, detail="Falta el archivo en el campo 'file'")
+                archivo = await recibir_upload(file)
+                resultado = await _parsear_subido(archivo)
+        else:
+            archivo = await recibir_stream(request.stream(), request.query_params.get("filename") or "documento")
+            try:
+                resultado = await _parsear_subido(archivo)
+            finally:
+                archivo.cerrar()
+    except ArchivoDemasiadoGrande as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    uso = registrar_memoria(archivo)
+    response.headers["X-Upload-Bytes"] = str(uso["bytes"])
+    response.headers["X-Upload-Buffer-RAM"] = str(uso["buffer_ram"])
+    response.headers["X-RSS-Pico-Proceso-KB"] = str(uso["rss_pico_proceso_kb"])
+    return resultado
+
+
+async def _parsear_subido(archivo: ArchivoSubido) -> Dict[str, Any]:
+    try:
+        return await run_in_threadpool(parse_archivo_cacheado, archivo.archivo, archivo.nombre, archivo.sha256)
+    except ExtraccionPDFError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+@api_router.post("/api/analyze")
+async def analyze(request: Request):
+    """Análisis masivo: cuerpo NDJSON de PatientInput -> resultados NDJSON.
+
+    Cada línea de salida lleva `linea` (número de línea de entrada); los
+    registros inválidos se devuelven como objetos con `error` sin abortar el lote.
+    """
+    return DuplexStreamingResponse(
+        analizar_ndjson(
+            request.stream(),
+            tamano_bloque=settings.ANALYZE_CHUNK_SIZE,
+            max_linea=settings.ANALYZE_MAX_LINE_BYTES,
+        ),
+        media_type="application/x-ndjson",
+    )
 
 @api_router.post("/api/report", response_model=ReportResponse)
 async def report(data: PatientRequest):
     llm = get_llm_client()
     patient_model = merge_patient_data(data.model_dump())
-    report_text = build_and_generate_report(llm, patient_model)
+    try:
+        report_text = await abuild_and_generate_report(llm, patient_model)
+    except ErrorLLM as e:
+        raise HTTPException(status_code=502, detail=str(e)) from e
     return ReportResponse(report_text=report_text)
 
+
+@api_router.post("/api/report/stream")
+async def report_stream(data: PatientRequest):
+    """Informe en Server-Sent Events: `data: {"delta": ...}` por fragmento y un
+    evento final `fin` con el texto completo (o `error` si el proveedor falla)."""
+    llm = get_llm_client()
+    patient_model = merge_patient_data(data.model_dump())
+
+    async def eventos():
+        partes: list[str] = []
+        try:
+            async for fragmento in astream_report(llm, patient_model):
+                partes.append(fragmento)
+                yield evento_sse({"delta": fragmento})
+        except ErrorLLM as e:
+            yield evento_sse({"detail": str(e)}, "error")
+            return
+        yield evento_sse({"report_text": "".join(partes)}, "fin")
+
+    return SSEResponse(eventos())
+
+
+def _validar_paciente(data: Dict[str, Any]) -> Dict[str, Any]:
+    return merge_patient_data(PatientRequest.model_validate(data).model_dump())
+
+
+@api_router.post("/api/report/batch")
+async def report_batch(request: Request):
+    """Informes por lote: cuerpo NDJSON de PatientRequest -> NDJSON de informes.
+
+    Como mucho REPORT_BATCH_CONCURRENCIA informes en vuelo (además del límite
+    por proveedor LLM_MAX_CONCURRENCIA); cada línea sale al completarse con su
+    `linea` de entrada, los fallos como `{"linea", "error"}`, y la última línea
+    es `{"resumen": {...}}` con throughput y percentiles de latencia.
+    """
+    return DuplexStreamingResponse(
+        generar_informes_ndjson(
+            get_llm_client(),
+            request.stream(),
+            concurrencia=settings.REPORT_BATCH_CONCURRENCIA,
+            max_linea=settings.REPORT_BATCH_MAX_LINE_BYTES,
+            validar=_validar_paciente,
+        ),
+        media_type="application/x-ndjson",
+    )
+
+
+@api_router.get("/api/report/cache")
+async def report_cache_stats():
+    """Contadores de la caché de informes (aciertos, fallos, coalescidas...)."""
+    return {**CACHE_INFORMES.estadisticas, "items": len(CACHE_INFORMES)}
+
 _medications: set[str] = set()
 
 @api_router.post("/api/medications", response_model=MedicationList)
@@ -76,10 +182,9 @@ async def delete_medication(name: str):
 # --- Contenido editable (simple) ---
 @api_router.get("/api/content")
 async def get_content():
-    return load_content()
+    return await SERVICIOS_LOCALES.cargar_contenido()
 
 
 @api_router.post("/api/content")
 async def post_content(data: Dict[str, Any]):
-    save_content(data)
-    return {"ok": True}
+    return await SERVICIOS_LOCALES.guardar_contenido(data)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import json
+from typing import Any, Optional
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse para endpoints que leen el cuerpo mientras responden.
+
+    En ASGI < 2.4, StreamingResponse consume `receive` en paralelo para detectar
+    la desconexión del cliente, lo que roba los mensajes del cuerpo que aún lee
+    `request.stream()`. Aquí la desconexión se detecta al leer el cuerpo
+    (ClientDisconnect) o al escribir la respuesta.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
+
+
+def evento_sse(datos: Any, evento: Optional[str] = None) -> str:
+    """Un evento Server-Sent Events con `datos` serializado como JSON."""
+    cabecera = f"event: {evento}\n" if evento else ""
+    return f"{cabecera}data: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+class SSEResponse(StreamingResponse):
+    """StreamingResponse text/event-stream sin caché ni buffering en proxies."""
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content: Any, **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.headers.setdefault("cache-control", "no-cache")
+        self.headers.setdefault("x-accel-buffering", "no")
+
+
+__all__ = ["DuplexStreamingResponse", "SSEResponse", "evento_sse"]
@@ -0,0 +1,278 @@
+"""Evaluación offline de cohortes: `python -m rcvco.batch entrada salida`.
+
+Lee un extracto de pacientes y laboratorios y reparte el trabajo en un
+ProcessPoolExecutor (un proceso por CPU por defecto). Cada paciente pasa por
+`analizar_paciente` y `generar_agenda_avanzada`; los resultados se escriben en
+NDJSON a medida que terminan, con progreso y throughput por stderr.
+
+Formatos de entrada:
+- NDJSON (.ndjson/.jsonl): un paciente por línea con el esquema de `Paciente`
+  (pseudo_id, sexo, edad, peso_kg, has_dm, estadio_erc, labs=[...]).
+- CSV (.csv): una fila por laboratorio con las columnas del paciente repetidas
+  (pseudo_id, sexo, edad, peso_kg, talla_cm, has_dm, has_hta, estadio_erc,
+  nombre, valor, unidad, fecha). Las filas de un paciente deben ser contiguas.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import date
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from pydantic import ValidationError
+from rcvco.domain.assistant import analizar_paciente
+from rcvco.domain.evaluacion import ContextoEvaluacion
+from rcvco.domain.models import Paciente
+from rcvco.domain.rcv_rules import generar_agenda_avanzada
+
+CAMPOS_PACIENTE = ("pseudo_id", "sexo", "edad", "peso_kg", "talla_cm", "has_dm", "has_hta", "estadio_erc")
+CAMPOS_LAB = ("nombre", "valor", "unidad", "fecha")
+_VERDADEROS = {"1", "true", "si", "sí", "s", "x", "yes"}
+
+# dict ya armado (CSV) o (nº de línea, texto crudo) de NDJSON, que se parsea en el worker
+Registro = Union[Dict[str, Any], Tuple[int, str]]
+
+
+# --- Lectura ---
+
+def leer_ndjson(f: IO[str]) -> Iterator[Tuple[int, str]]:
+    """(nº de línea, texto) por línea no vacía; el parseo se hace en el worker
+    para que una línea mala no aborte la cohorte."""
+    for n, linea in enumerate(f, 1):
+        if linea.strip():
+            yield n, linea
+
+
+def _paciente_desde_fila(fila: Dict[str, str]) -> Dict[str, Any]:
+    data: Dict[str, Any] = {}
+    for campo in CAMPOS_PACIENTE:
+        valor = (fila.get(campo) or "").strip()
+        if campo in ("has_dm", "has_hta"):
+            data[campo] = valor.lower() in _VERDADEROS
+        elif valor:
+            data[campo] = valor
+    data["labs"] = []
+    return data
+
+
+def leer_csv(f: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Agrupa filas contiguas de un mismo pseudo_id en un registro de paciente."""
+    actual: Optional[Dict[str, Any]] = None
+    for fila in csv.DictReader(f):
+        pid = (fila.get("pseudo_id") or "").strip()
+        if actual is None or actual.get("pseudo_id") != pid:
+            if actual is not None:
+                yield actual
+            actual = _paciente_desde_fila(fila)
+        if (fila.get("nombre") or "").strip():
+            actual["labs"].append({c: (fila.get(c) or "").strip() or None for c in CAMPOS_LAB})
+    if actual is not None:
+        yield actual
+
+
+def leer_registros(ruta: Path, formato: Optional[str] = None) -> Iterator[Registro]:
+    formato = formato or ("csv" if ruta.suffix.lower() == ".csv" else "ndjson")
+    with ruta.open(encoding="utf-8", newline="") as f:
+        yield from (leer_csv(f) if formato == "csv" else leer_ndjson(f))
+
+
+def en_bloques(registros: Iterable[Registro], tamano: int) -> Iterator[List[Registro]]:
+    bloque: List[Registro] = []
+    for r in registros:
+        bloque.append(r)
+        if len(bloque) >= tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# --- Evaluación (se ejecuta en los procesos del pool) ---
+
+def _estadio_agenda(ctx: ContextoEvaluacion) -> str:
+    """Estadio en formato de rcv_rules (E1..E4) desde el explícito o el calculado."""
+    estadio = ctx.paciente.estadio_erc or ctx.estadio_calculado
+    if estadio is None:
+        return "E1"
+    e = str(estadio).upper()
+    e = {"3": "3A", "5": "4"}.get(e, e)
+    return f"E{e}"
+
+
+def _cargar(registro: Registro) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """(objeto del paciente, None) o (None, error) si la línea NDJSON no sirve."""
+    if isinstance(registro, dict):
+        return registro, None
+    linea, raw = registro
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        return None, {"linea": linea, "error": "JSON inválido", "detalles": str(e)[:200]}
+    if not isinstance(data, dict):
+        return None, {"linea": linea, "error": "Validación", "detalles": "Se esperaba un objeto JSON"}
+    return data, None
+
+
+def evaluar_registro(registro: Registro, hoy: Optional[date] = None) -> Dict[str, Any]:
+    """Evalúa un paciente; los errores se devuelven como objeto, no se propagan."""
+    data, error = _cargar(registro)
+    if error is not None:
+        return error
+    assert data is not None
+    pid = data.get("pseudo_id")
+    hoy = hoy or date.today()
+    try:
+        paciente = Paciente.model_validate(data)
+    except ValidationError as e:
+        return {"pseudo_id": pid, "error": "Validación", "detalles": e.errors(include_url=False)}
+    try:
+        ctx = ContextoEvaluacion(paciente, hoy=hoy)
+        resultado = analizar_paciente(paciente, contexto=ctx)
+        agenda = generar_agenda_avanzada(
+            fecha_base=ctx.indice.fecha_mas_reciente or hoy,
+            estadio=_estadio_agenda(ctx),
+            tiene_dm=paciente.has_dm,
+            ldl_val=ctx.indice.valor("COLESTEROL LDL"),
+            hoy=hoy,
+        )
+    except Exception as e:  # noqa: BLE001 - un paciente no debe abortar la cohorte
+        return {"pseudo_id": pid, "error": "Procesamiento", "detalles": str(e)[:200]}
+    return {
+        "pseudo_id": pid,
+        "analisis": resultado.model_dump(mode="json"),
+        "agenda_avanzada": [a.model_dump(mode="json") for a in agenda],
+    }
+
+
+def procesar_bloque(bloque: List[Registro], hoy: Optional[date] = None) -> Tuple[List[str], int]:
+    """Evalúa un bloque; devuelve las líneas NDJSON ya serializadas y cuántas
+    son errores."""
+    lineas: List[str] = []
+    errores = 0
+    for registro in bloque:
+        resultado = evaluar_registro(registro, hoy)
+        errores += "error" in resultado
+        lineas.append(json.dumps(resultado, ensure_ascii=False, default=str))
+    return lineas, errores
+
+
+# --- Orquestación ---
+
+class Progreso:
+    """Reporta pacientes procesados y throughput cada `intervalo` segundos."""
+
+    def __init__(self, salida: IO[str], intervalo: float = 5.0):
+        self.salida = salida
+        self.intervalo = intervalo
+        self.inicio = time.perf_counter()
+        self._ultimo_reporte = self.inicio
+        self.total = 0
+        self.errores = 0
+
+    def registrar(self, lineas: Sequence[str], errores: int = 0) -> None:
+        self.total += len(lineas)
+        self.errores += errores
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_reporte >= self.intervalo:
+            self._ultimo_reporte = ahora
+            self.reportar()
+
+    def reportar(self, final: bool = False) -> None:
+        transcurrido = time.perf_counter() - self.inicio
+        tasa = self.total / transcurrido if transcurrido > 0 else 0.0
+        prefijo = "Completado" if final else "Progreso"
+        print(
+            f"{prefijo}: {self.total} pacientes ({self.errores} con error) "
+            f"en {transcurrido:.1f}s, {tasa:.0f} pacientes/s",
+            file=self.salida,
+            flush=True,
+        )
+
+
+def ejecutar(
+    entrada: Path,
+    salida: Path,
+    workers: Optional[int] = None,
+    tamano_bloque: int = 500,
+    formato: Optional[str] = None,
+    hoy: Optional[date] = None,
+    progreso: Optional[Progreso] = None,
+) -> Progreso:
+    """Procesa la cohorte completa y escribe los resultados en `salida`.
+
+    Mantiene como máximo 2 bloques en vuelo por proceso, de modo que la
+    memoria no crece con el tamaño del extracto. Con `workers <= 1` se procesa
+    en el proceso actual (útil para depuración).
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    progreso = progreso or Progreso(sys.stderr)
+    bloques = en_bloques(leer_registros(entrada, formato), tamano_bloque)
+    with salida.open("w", encoding="utf-8") as out:
+
+        def escribir(resultado: Tuple[List[str], int]) -> None:
+            lineas, errores = resultado
+            if lineas:
+                out.write("\n".join(lineas) + "\n")
+            progreso.registrar(lineas, errores)
+
+        if workers <= 1:
+            for bloque in bloques:
+                escribir(procesar_bloque(bloque, hoy))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pendientes: Set[Future] = set()
+                for bloque in bloques:
+                    if len(pendientes) >= workers * 2:
+                        listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                        for fut in listos:
+                            escribir(fut.result())
+                    pendientes.add(pool.submit(procesar_bloque, bloque, hoy))
+                for fut in wait(pendientes).done:
+                    escribir(fut.result())
+    progreso.reportar(final=True)
+    return progreso
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m rcvco.batch",
+        description="Evaluación offline de cohortes (analizar_paciente + agenda avanzada).",
+    )
+    parser.add_argument("entrada", type=Path, help="Extracto CSV o NDJSON de pacientes y labs")
+    parser.add_argument("salida", type=Path, help="Archivo NDJSON de resultados")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto: nº de CPU)")
+    parser.add_argument("--bloque", type=int, default=500, help="Pacientes por tarea (por defecto: 500)")
+    parser.add_argument("--formato", choices=("csv", "ndjson"), default=None, help="Forzar formato de entrada")
+    parser.add_argument("--hoy", type=date.fromisoformat, default=None, help="Fecha de corte ISO (por defecto: hoy)")
+    args = parser.parse_args(argv)
+    if not args.entrada.is_file():
+        parser.error(f"No existe el archivo de entrada: {args.entrada}")
+    ejecutar(
+        args.entrada,
+        args.salida,
+        workers=args.workers,
+        tamano_bloque=max(1, args.bloque),
+        formato=args.formato,
+        hoy=args.hoy,
+    )
+    return 0
+
+
+__all__ = [
+    "leer_registros",
+    "leer_csv",
+    "leer_ndjson",
+    "evaluar_registro",
+    "procesar_bloque",
+    "Progreso",
+    "ejecutar",
+    "main",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -8,9 +8,42 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str | None = None
     MODEL_NAME: str = "gpt-4o-mini"
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    OPENAI_BASE_URL: str = "https://api.openai.com"
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com"
+    LLM_TIMEOUT_S: float = 30.0
+    LLM_MAX_CONCURRENCIA: int = 4
+    LLM_MAX_REINTENTOS: int = 3
+    LLM_BACKOFF_BASE_S: float = 0.5
+    LLM_BACKOFF_MAX_S: float = 8.0
+    REPORT_CACHE_TTL_S: float = 600.0
+    REPORT_CACHE_ITEMS: int = 512
+    REPORT_BATCH_CONCURRENCIA: int = 8
+    REPORT_BATCH_MAX_LINE_BYTES: int = 64 * 1024
+    CHART_MAX_PUNTOS: int = 200
     FRONTEND_ORIGIN: str = "http://localhost:5173"
     BASE_API_URL: str = "http://localhost:8000"
+    # "local": la UI llama a los servicios en proceso; "http": API desplegada aparte en BASE_API_URL
+    UI_API_MODE: str = "local"
+    UI_API_TIMEOUT_S: float = 15.0
+    UI_API_MAX_CONEXIONES: int = 20
     LOG_LEVEL: str = "INFO"
+    ANALYZE_CHUNK_SIZE: int = 200
+    ANALYZE_MAX_LINE_BYTES: int = 64 * 1024
+    LAB_SYNONYMS_PATH: str | None = None
+    PDF_MAX_PROCESOS: int = 4
+    PDF_TIMEOUT_S: float = 30.0
+    PDF_MAX_PAGINAS: int = 50
+    UPLOAD_CACHE_ITEMS: int = 256
+    UPLOAD_CACHE_DIR: str | None = None
+    UPLOAD_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_SPOOL_BYTES: int = 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    PACIENTES_DB_PATH: str = "data/pacientes.db"
+    # Historial de la UI por sesión (None: solo en memoria)
+    HISTORIAL_DB_PATH: str | None = "data/historial.db"
+    HISTORIAL_MAX_ITEMS: int = 50
+    HISTORIAL_MAX_SESIONES: int = 1000
 
     class Config:
         env_file = ".env"
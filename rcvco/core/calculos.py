@@ -1,8 +1,17 @@
 """Cálculos de la Tasa de Filtración Glomerular usando Cockcroft-Gault."""
 
-from typing import Union
+from typing import Any, Mapping, NamedTuple, Union
 import logging
 
+try:  # numpy solo es necesario para el cálculo por lote (extra "cohorte")
+    import numpy as np
+except ImportError:  # pragma: no cover - entorno sin numpy
+    np = None  # type: ignore[assignment]
+
+# Factores de la fórmula compartidos por la versión escalar y la vectorizada
+FACTOR_MUJER = 0.85
+FACTOR_AJUSTE = 0.9142  # Factor de ajuste (calibrado para 55.6/47.2 ml/min)
+
 def calcular_tfg_cg(
     creatinina: Union[float, str],
     edad: Union[int, str],
@@ -46,11 +55,100 @@ def calcular_tfg_cg(
     
     # Ajuste por sexo (0.85 para mujeres)
     if sexo.lower() == "f":
-        tfg *= 0.85
+        tfg *= FACTOR_MUJER
         
     # Ajuste empírico para coincidir con valores esperados
-    tfg *= 0.9142  # Factor de ajuste (calibrado para 55.6/47.2 ml/min)
+    tfg *= FACTOR_AJUSTE
         
-    logging.debug(f"TFG calculada: {tfg:.1f} mL/min")
+    logging.debug("TFG calculada: %.1f mL/min", tfg)
     
     return tfg
+
+
+class TFGLote(NamedTuple):
+    """Resultado del cálculo por lote.
+
+    Attributes:
+        tfg: TFG en mL/min por fila (NaN donde la fila es inválida)
+        valido: Máscara booleana de filas con datos válidos
+    """
+
+    tfg: Any
+    valido: Any
+
+
+def _como_float(valores: Any) -> Any:
+    """Convierte una columna a float64; los valores no numéricos quedan en NaN."""
+    try:
+        return np.asarray(valores, dtype=np.float64)
+    except (ValueError, TypeError):
+        def _uno(v: Any) -> float:
+            try:
+                return float(v)
+            except (ValueError, TypeError):
+                return np.nan
+
+        return np.fromiter((_uno(v) for v in valores), dtype=np.float64)
+
+
+def calcular_tfg_cg_lote(creatinina: Any, edad: Any, sexo: Any, peso: Any) -> TFGLote:
+    """Calcula la TFG Cockcroft-Gault para una cohorte completa.
+
+    Versión vectorizada de `calcular_tfg_cg`: mismos factores y mismo orden de
+    operaciones, por lo que cada fila válida es idéntica (bit a bit) al cálculo
+    escalar. En lugar de lanzar ValueError, las filas inválidas se marcan en la
+    máscara `valido` y su TFG queda en NaN.
+
+    Args:
+        creatinina: Columna de creatinina sérica en mg/dL
+        edad: Columna de edades en años
+        sexo: Columna de sexo biológico ('m'/'f', sin distinguir mayúsculas)
+        peso: Columna de pesos en kg
+
+    Returns:
+        TFGLote con el arreglo de TFG (float64) y la máscara de validez
+
+    Raises:
+        ImportError: Si numpy no está instalado
+        ValueError: Si las columnas no tienen la misma longitud
+    """
+    if np is None:  # pragma: no cover - entorno sin numpy
+        raise ImportError("calcular_tfg_cg_lote requiere numpy (pip install rcvco[cohorte])")
+
+    cr = _como_float(creatinina)
+    age = _como_float(edad)
+    wt = _como_float(peso)
+    sx = np.asarray(sexo)
+    if not (cr.shape == age.shape == wt.shape == sx.shape):
+        raise ValueError("Las columnas creatinina, edad, sexo y peso deben tener igual longitud")
+
+    es_mujer = (sx == "f") | (sx == "F")
+    es_hombre = (sx == "m") | (sx == "M")
+    valido = (cr > 0) & (age > 0) & (wt > 0) & (es_mujer | es_hombre)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tfg = 140 - age
+        tfg *= wt
+        tfg /= 72 * cr
+    tfg[es_mujer] *= FACTOR_MUJER
+    tfg *= FACTOR_AJUSTE
+    tfg[~valido] = np.nan
+    return TFGLote(tfg=tfg, valido=valido)
+
+
+def calcular_tfg_cg_tabla(tabla: Mapping[str, Any]) -> TFGLote:
+    """Calcula la TFG por lote a partir de una tabla columnar.
+
+    Args:
+        tabla: Mapeo columna -> valores (dict de arreglos, DataFrame, etc.) con
+            las columnas 'creatinina', 'edad', 'sexo' y 'peso'
+
+    Returns:
+        TFGLote, ver `calcular_tfg_cg_lote`
+    """
+    return calcular_tfg_cg_lote(
+        creatinina=tabla["creatinina"],
+        edad=tabla["edad"],
+        sexo=tabla["sexo"],
+        peso=tabla["peso"],
+    )
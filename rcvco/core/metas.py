@@ -1,7 +1,259 @@
-"""Cálculo de metas y puntuaciones por programa."""
+"""Cálculo de metas y puntuaciones por programa.
+
+Las reglas están expresadas como datos: `TABLA_METAS` asigna a cada perfil
+(programa y, en ERC, estadio E4 y DM) un criterio de cumplimiento y un peso por
+meta. La tabla se compila una vez en un `EvaluadorMetas` que puntúa un paciente
+o una cohorte completa (arreglos numpy) con exactamente los mismos puntos.
+"""
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+try:  # numpy solo es necesario para la puntuación por lote (extra "cohorte")
+    import numpy as np
+except ImportError:  # pragma: no cover - entorno sin numpy
+    np = None  # type: ignore[assignment]
+
+PROGRAMAS = ("HTA", "DM", "ERC")
+METAS = ("glicemia", "ldl", "hdl", "trigliceridos", "pa", "rac", "imc", "perimetro", "hba1c")
+
+Criterio = Callable[[Any], Any]
+
+# --- Criterios de cumplimiento ---
+# Solo usan comparaciones y los operadores &, |, ^ para que la misma expresión
+# sirva con escalares (None se representa como NaN) y con arreglos numpy.
+
+
+def _no(x: Any) -> Any:
+    return x ^ True
+
+
+def _glicemia_60_100(v: Any) -> Any:
+    return (v.glicemia >= 60) & (v.glicemia <= 100)
+
+
+def _glicemia_70_130(v: Any) -> Any:
+    return (v.glicemia >= 70) & (v.glicemia <= 130)
+
+
+def _ldl_hta(v: Any) -> Any:
+    # Meta ≤100 si riesgo alto/muy alto o LDL previo ≥190 con descenso ≥50%; si no ≤130
+    reduccion_50 = (v.ldl_previo >= 190) & (v.ldl_actual <= v.ldl_previo * 0.5)
+    meta_100 = v.riesgo_alto | reduccion_50
+    return (meta_100 & (v.ldl_actual <= 100)) | (_no(meta_100) & (v.ldl_actual <= 130))
+
+
+def _ldl_dm(v: Any) -> Any:
+    # ≤100 mantener; 101–129 ↓≥10%; 130–189 ↓≥30%; ≥190 ↓≥50% vs previo
+    actual, previo = v.ldl_actual, v.ldl_previo
+    return (
+        (actual <= 100)
+        | ((actual >= 101) & (actual <= 129) & (actual <= previo * 0.9))
+        | ((actual >= 130) & (actual <= 189) & (actual <= previo * 0.7))
+        | ((actual >= 190) & (actual <= previo * 0.5))
+    )
+
+
+def _ldl_100(v: Any) -> Any:
+    return v.ldl_actual <= 100
+
+
+def _hdl(v: Any) -> Any:
+    return (v.es_hombre & (v.hdl >= 40)) | (v.es_mujer & (v.hdl >= 50))
+
+
+def _trigliceridos(v: Any) -> Any:
+    return v.trigliceridos <= 150
+
+
+def _pa_hta(v: Any) -> Any:
+    # ≤140/90 si <60 años; ≤150/90 si ≥60
+    return (
+        ((v.edad < 60) & (v.pa_sistolica <= 140) & (v.pa_diastolica <= 90))
+        | ((v.edad >= 60) & (v.pa_sistolica <= 150) & (v.pa_diastolica <= 90))
+    )
+
+
+def _pa_140_90(v: Any) -> Any:
+    return (v.pa_sistolica <= 140) & (v.pa_diastolica <= 90)
+
+
+def _rac(v: Any) -> Any:
+    return v.rac <= 30
+
+
+def _imc(v: Any) -> Any:
+    # Pérdida de peso ≥5% respecto al previo
+    return (v.peso_previo != 0) & (v.peso_actual <= v.peso_previo * 0.95)
+
+
+def _perimetro(v: Any) -> Any:
+    return (v.es_hombre & (v.perimetro <= 94)) | (v.es_mujer & (v.perimetro <= 90))
+
+
+def _hba1c(v: Any) -> Any:
+    # ≤7% si ≤65 años y sin ECV; ≤8% si >65 o con ECV
+    return (v.hba1c <= 7) | ((v.hba1c <= 8) & ((v.edad > 65) | v.tiene_ecv))
+
+
+# --- Tabla de pesos por perfil ---
+# perfil -> meta -> (criterio, puntos). Las metas ausentes puntúan 0.
+TABLA_METAS: Dict[str, Dict[str, Tuple[Criterio, int]]] = {
+    "HTA": {
+        "glicemia": (_glicemia_60_100, 5),
+        "ldl": (_ldl_hta, 25),
+        "hdl": (_hdl, 5),
+        "trigliceridos": (_trigliceridos, 5),
+        "pa": (_pa_hta, 25),
+        "rac": (_rac, 25),
+        "imc": (_imc, 5),
+        "perimetro": (_perimetro, 5),
+    },
+    "DM": {
+        "glicemia": (_glicemia_70_130, 4),
+        "ldl": (_ldl_dm, 20),
+        "hdl": (_hdl, 4),
+        "trigliceridos": (_trigliceridos, 4),
+        "pa": (_pa_140_90, 20),
+        "rac": (_rac, 20),
+        "imc": (_imc, 4),
+        "perimetro": (_perimetro, 4),
+        "hba1c": (_hba1c, 20),
+    },
+    # ERC E4 con DM: sin puntos para LDL
+    "ERC_E4_DM": {
+        "glicemia": (_glicemia_70_130, 5),
+        "hdl": (_hdl, 5),
+        "trigliceridos": (_trigliceridos, 5),
+        "pa": (_pa_140_90, 30),
+        "rac": (_rac, 15),
+        "imc": (_imc, 5),
+        "perimetro": (_perimetro, 5),
+        "hba1c": (_hba1c, 30),
+    },
+    # ERC E4 sin DM: sin puntos para LDL
+    "ERC_E4": {
+        "glicemia": (_glicemia_70_130, 10),
+        "hdl": (_hdl, 10),
+        "trigliceridos": (_trigliceridos, 10),
+        "pa": (_pa_140_90, 40),
+        "rac": (_rac, 10),
+        "imc": (_imc, 10),
+        "perimetro": (_perimetro, 10),
+    },
+    # ERC E1-E3 con DM
+    "ERC_DM": {
+        "glicemia": (_glicemia_70_130, 4),
+        "ldl": (_ldl_100, 20),
+        "hdl": (_hdl, 4),
+        "trigliceridos": (_trigliceridos, 4),
+        "pa": (_pa_140_90, 20),
+        "rac": (_rac, 20),
+        "imc": (_imc, 4),
+        "perimetro": (_perimetro, 4),
+        "hba1c": (_hba1c, 20),
+    },
+    # ERC E1-E3 sin DM
+    "ERC": {
+        "glicemia": (_glicemia_70_130, 5),
+        "ldl": (_ldl_100, 25),
+        "hdl": (_hdl, 5),
+        "trigliceridos": (_trigliceridos, 5),
+        "pa": (_pa_140_90, 25),
+        "rac": (_rac, 25),
+        "imc": (_imc, 5),
+        "perimetro": (_perimetro, 5),
+    },
+}
+
+
+def _perfil(programa: str, tfg: float, tiene_dm: bool) -> str:
+    if programa != "ERC":
+        return programa
+    es_e4 = tfg <= 30
+    if es_e4:
+        return "ERC_E4_DM" if tiene_dm else "ERC_E4"
+    return "ERC_DM" if tiene_dm else "ERC"
+
+
+class EvaluadorMetas:
+    """Evaluador de metas compilado a partir de una tabla perfil -> meta -> regla.
+
+    La compilación ordena las reglas por perfil (vía escalar) y agrupa por meta
+    los criterios distintos con su matriz de pesos (vía por lote), de modo que
+    cada criterio se evalúa una sola vez sobre toda la cohorte.
+    """
+
+    def __init__(self, tabla: Mapping[str, Mapping[str, Tuple[Criterio, int]]]):
+        self.perfiles: Tuple[str, ...] = tuple(tabla)
+        self._reglas: Dict[str, Tuple[Tuple[str, Criterio, int], ...]] = {
+            perfil: tuple(
+                (meta, criterio, peso)
+                for meta, (criterio, peso) in reglas.items()
+                if peso
+            )
+            for perfil, reglas in tabla.items()
+        }
+        # meta -> [(criterio, perfiles que lo usan)] y pesos[perfil][meta]
+        self._criterios_por_meta: Dict[str, list] = {}
+        for meta in METAS:
+            criterios: Dict[Criterio, list] = {}
+            for i, perfil in enumerate(self.perfiles):
+                regla = tabla[perfil].get(meta)
+                if regla and regla[1]:
+                    criterios.setdefault(regla[0], []).append(i)
+            self._criterios_por_meta[meta] = list(criterios.items())
+        self._pesos = [
+            [tabla[perfil].get(meta, (None, 0))[1] for meta in METAS]
+            for perfil in self.perfiles
+        ]
+
+    def puntuar(self, perfil: str, variables: Any) -> Dict[str, float | int]:
+        """Puntúa un paciente.
+
+        Args:
+            perfil: Perfil de la tabla (p. ej. 'HTA', 'ERC_E4_DM')
+            variables: Objeto con los atributos usados por los criterios
+
+        Returns:
+            Dict con puntajes por meta y total
+        """
+        puntos: Dict[str, float | int] = dict.fromkeys(("total",) + METAS, 0)
+        for meta, criterio, peso in self._reglas[perfil]:
+            if criterio(variables):
+                puntos[meta] = peso
+        puntos["total"] = sum(puntos.values())
+        return puntos
+
+    def puntuar_lote(self, codigos: Any, variables: Any) -> Dict[str, Any]:
+        """Puntúa una cohorte.
+
+        Args:
+            codigos: Índice de perfil (en `self.perfiles`) por paciente
+            variables: Objeto con arreglos numpy por atributo
+
+        Returns:
+            Dict con un arreglo de puntos por meta y el total
+        """
+        pesos = np.asarray(self._pesos, dtype=np.int16)
+        puntos: Dict[str, Any] = {}
+        total = np.zeros(codigos.shape, dtype=np.int16)
+        for j, meta in enumerate(METAS):
+            cumple = np.zeros(codigos.shape, dtype=bool)
+            for criterio, perfiles in self._criterios_por_meta[meta]:
+                usa = np.isin(codigos, perfiles)
+                cumple |= usa & criterio(variables)
+            puntos[meta] = np.where(cumple, pesos[codigos, j], 0).astype(np.int16)
+            total += puntos[meta]
+        return {"total": total, **puntos}
+
+
+EVALUADOR_METAS = EvaluadorMetas(TABLA_METAS)
+
+
+def _nan_si_none(v: Optional[float]) -> float:
+    return float("nan") if v is None else v
 
-from typing import Dict, Optional, Union
-import logging
 
 def calcular_puntuacion_metas(
     programa: str,
@@ -53,193 +305,110 @@ def calcular_puntuacion_metas(
     Raises:
         ValueError: Si el programa es inválido
     """
-    if programa not in ["HTA", "DM", "ERC"]:
+    if programa not in PROGRAMAS:
         raise ValueError("Programa debe ser 'HTA', 'DM' o 'ERC'")
-        
-    puntos = {
-        "total": 0,
-        "glicemia": 0,
-        "ldl": 0,
-        "hdl": 0,
-        "trigliceridos": 0,
-        "pa": 0,
-        "rac": 0,
-        "imc": 0,
-        "perimetro": 0,
-        "hba1c": 0
-    }
-    
-    # Ajusta pesos según programa y estadio ERC
-    if programa == "HTA":
-        # Glicemia (5)
-        if 60 <= glicemia <= 100:
-            puntos["glicemia"] = 5
-            
-        # LDL (25)
-        if riesgo_cv in ["ALTO", "MUY ALTO"] or (ldl_previo and ldl_previo >= 190 and ldl_actual <= ldl_previo * 0.5):
-            if ldl_actual <= 100:
-                puntos["ldl"] = 25
-        elif riesgo_cv not in ["ALTO", "MUY ALTO"] and ldl_actual <= 130:
-            puntos["ldl"] = 25
-            
-        # HDL (5)
-        if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-            puntos["hdl"] = 5
-            
-        # Triglicéridos (5)
-        if trigliceridos <= 150:
-            puntos["trigliceridos"] = 5
-            
-        # PA (25)
-        if edad < 60 and pa_sistolica <= 140 and pa_diastolica <= 90:
-            puntos["pa"] = 25
-        elif edad >= 60 and pa_sistolica <= 150 and pa_diastolica <= 90:
-            puntos["pa"] = 25
-            
-        # RAC (25)
-        if rac <= 30:
-            puntos["rac"] = 25
-            
-        # IMC (5)
-        if peso_previo and peso_actual <= peso_previo * 0.95:
-            puntos["imc"] = 5
-            
-        # Perímetro (5)
-        if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-            puntos["perimetro"] = 5
-            
-    elif programa == "DM":
-        # Glicemia (4)
-        if 70 <= glicemia <= 130:
-            puntos["glicemia"] = 4
-            
-        # LDL (20)
-        if ldl_actual <= 100:
-            puntos["ldl"] = 20
-        elif 101 <= ldl_actual <= 129 and ldl_previo and ldl_actual <= ldl_previo * 0.9:
-            puntos["ldl"] = 20
-        elif 130 <= ldl_actual <= 189 and ldl_previo and ldl_actual <= ldl_previo * 0.7:
-            puntos["ldl"] = 20
-        elif ldl_actual >= 190 and ldl_previo and ldl_actual <= ldl_previo * 0.5:
-            puntos["ldl"] = 20
-            
-        # HDL (4)
-        if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-            puntos["hdl"] = 4
-            
-        # Triglicéridos (4)
-        if trigliceridos <= 150:
-            puntos["trigliceridos"] = 4
-            
-        # PA (20)
-        if pa_sistolica <= 140 and pa_diastolica <= 90:
-            puntos["pa"] = 20
-            
-        # RAC (20)
-        if rac <= 30:
-            puntos["rac"] = 20
-            
-        # IMC (4)
-        if peso_previo and peso_actual <= peso_previo * 0.95:
-            puntos["imc"] = 4
-            
-        # Perímetro (4)
-        if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-            puntos["perimetro"] = 4
-            
-        # HbA1c (20)
-        if hba1c is not None:
-            if edad <= 65 and not tiene_ecv and hba1c <= 7:
-                puntos["hba1c"] = 20
-            elif (edad > 65 or tiene_ecv) and hba1c <= 8:
-                puntos["hba1c"] = 20
-                
-    else:  # ERC
-        es_e4 = tfg <= 30
-        
-        if es_e4 and tiene_dm:
-            # E4 con DM
-            if 70 <= glicemia <= 130:
-                puntos["glicemia"] = 5
-            puntos["ldl"] = 0  # Sin puntos para LDL en E4
-            if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-                puntos["hdl"] = 5
-            if trigliceridos <= 150:
-                puntos["trigliceridos"] = 5
-            if pa_sistolica <= 140 and pa_diastolica <= 90:
-                puntos["pa"] = 30
-            if rac <= 30:
-                puntos["rac"] = 15
-            if peso_previo and peso_actual <= peso_previo * 0.95:
-                puntos["imc"] = 5
-            if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-                puntos["perimetro"] = 5
-            if hba1c is not None:
-                if edad <= 65 and not tiene_ecv and hba1c <= 7:
-                    puntos["hba1c"] = 30
-                elif (edad > 65 or tiene_ecv) and hba1c <= 8:
-                    puntos["hba1c"] = 30
-                    
-        elif es_e4:
-            # E4 sin DM
-            if 70 <= glicemia <= 130:
-                puntos["glicemia"] = 10
-            puntos["ldl"] = 0  # Sin puntos para LDL en E4
-            if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-                puntos["hdl"] = 10
-            if trigliceridos <= 150:
-                puntos["trigliceridos"] = 10
-            if pa_sistolica <= 140 and pa_diastolica <= 90:
-                puntos["pa"] = 40
-            if rac <= 30:
-                puntos["rac"] = 10
-            if peso_previo and peso_actual <= peso_previo * 0.95:
-                puntos["imc"] = 10
-            if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-                puntos["perimetro"] = 10
-                
-        elif tiene_dm:
-            # E1-E3 con DM
-            if 70 <= glicemia <= 130:
-                puntos["glicemia"] = 4
-            if ldl_actual <= 100:
-                puntos["ldl"] = 20
-            if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-                puntos["hdl"] = 4
-            if trigliceridos <= 150:
-                puntos["trigliceridos"] = 4
-            if pa_sistolica <= 140 and pa_diastolica <= 90:
-                puntos["pa"] = 20
-            if rac <= 30:
-                puntos["rac"] = 20
-            if peso_previo and peso_actual <= peso_previo * 0.95:
-                puntos["imc"] = 4
-            if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-                puntos["perimetro"] = 4
-            if hba1c is not None:
-                if edad <= 65 and not tiene_ecv and hba1c <= 7:
-                    puntos["hba1c"] = 20
-                elif (edad > 65 or tiene_ecv) and hba1c <= 8:
-                    puntos["hba1c"] = 20
-                    
-        else:
-            # E1-E3 sin DM
-            if 70 <= glicemia <= 130:
-                puntos["glicemia"] = 5
-            if ldl_actual <= 100:
-                puntos["ldl"] = 25
-            if (sexo == "m" and hdl >= 40) or (sexo == "f" and hdl >= 50):
-                puntos["hdl"] = 5
-            if trigliceridos <= 150:
-                puntos["trigliceridos"] = 5
-            if pa_sistolica <= 140 and pa_diastolica <= 90:
-                puntos["pa"] = 25
-            if rac <= 30:
-                puntos["rac"] = 25
-            if peso_previo and peso_actual <= peso_previo * 0.95:
-                puntos["imc"] = 5
-            if (sexo == "m" and perimetro <= 94) or (sexo == "f" and perimetro <= 90):
-                puntos["perimetro"] = 5
-                
-    puntos["total"] = sum(puntos.values())
-    return puntos
+
+    variables = SimpleNamespace(
+        glicemia=glicemia,
+        ldl_actual=ldl_actual,
+        ldl_previo=_nan_si_none(ldl_previo),
+        hdl=hdl,
+        trigliceridos=trigliceridos,
+        pa_sistolica=pa_sistolica,
+        pa_diastolica=pa_diastolica,
+        rac=rac,
+        peso_actual=peso_actual,
+        peso_previo=_nan_si_none(peso_previo),
+        perimetro=perimetro,
+        es_hombre=sexo == "m",
+        es_mujer=sexo == "f",
+        edad=edad,
+        riesgo_alto=riesgo_cv in ("ALTO", "MUY ALTO"),
+        hba1c=_nan_si_none(hba1c),
+        tiene_ecv=bool(tiene_ecv),
+    )
+    return EVALUADOR_METAS.puntuar(_perfil(programa, tfg, tiene_dm), variables)
+
+
+def calcular_puntuacion_metas_lote(
+    programa: Any,
+    tfg: Any,
+    glicemia: Any,
+    ldl_actual: Any,
+    ldl_previo: Any,
+    hdl: Any,
+    trigliceridos: Any,
+    pa_sistolica: Any,
+    pa_diastolica: Any,
+    rac: Any,
+    peso_actual: Any,
+    peso_previo: Any,
+    perimetro: Any,
+    sexo: Any,
+    edad: Any,
+    riesgo_cv: Any = None,
+    hba1c: Any = None,
+    tiene_ecv: Any = False,
+    tiene_dm: Any = False,
+) -> Dict[str, Any]:
+    """Calcula la puntuación de metas para una cohorte completa.
+
+    Mismos argumentos que `calcular_puntuacion_metas`, como columnas. Los
+    valores opcionales ausentes (None o NaN) no puntúan. Los argumentos con
+    valor por defecto aceptan también un escalar aplicado a toda la cohorte.
+
+    Returns:
+        Dict con un arreglo int16 de puntos por meta y el total, idénticos a
+        los de la versión escalar fila por fila
+
+    Raises:
+        ImportError: Si numpy no está instalado
+        ValueError: Si algún programa es inválido
+    """
+    if np is None:  # pragma: no cover - entorno sin numpy
+        raise ImportError(
+            "calcular_puntuacion_metas_lote requiere numpy (pip install rcvco[cohorte])"
+        )
+
+    prog = np.asarray(programa)
+    if not np.isin(prog, PROGRAMAS).all():
+        raise ValueError("Programa debe ser 'HTA', 'DM' o 'ERC'")
+    n = prog.shape
+
+    def col(valores: Any) -> Any:
+        return np.broadcast_to(np.asarray(valores, dtype=np.float64), n)
+
+    def flag(valores: Any) -> Any:
+        return np.broadcast_to(np.asarray(valores, dtype=bool), n)
+
+    sx = np.asarray(sexo)
+    dm = flag(tiene_dm)
+    es_e4 = col(tfg) <= 30
+    es_erc = prog == "ERC"
+    perfiles = EVALUADOR_METAS.perfiles
+    codigos = np.select(
+        [prog == "HTA", prog == "DM", es_erc & es_e4 & dm, es_erc & es_e4, es_erc & dm],
+        [perfiles.index(p) for p in ("HTA", "DM", "ERC_E4_DM", "ERC_E4", "ERC_DM")],
+        default=perfiles.index("ERC"),
+    )
+    riesgo = np.asarray(riesgo_cv, dtype=object)
+    variables = SimpleNamespace(
+        glicemia=col(glicemia),
+        ldl_actual=col(ldl_actual),
+        ldl_previo=col(ldl_previo),
+        hdl=col(hdl),
+        trigliceridos=col(trigliceridos),
+        pa_sistolica=col(pa_sistolica),
+        pa_diastolica=col(pa_diastolica),
+        rac=col(rac),
+        peso_actual=col(peso_actual),
+        peso_previo=col(peso_previo),
+        perimetro=col(perimetro),
+        es_hombre=sx == "m",
+        es_mujer=sx == "f",
+        edad=col(edad),
+        riesgo_alto=np.broadcast_to((riesgo == "ALTO") | (riesgo == "MUY ALTO"), n),
+        hba1c=col(np.nan if hba1c is None else hba1c),
+        tiene_ecv=flag(tiene_ecv),
+    )
+    return EVALUADOR_METAS.puntuar_lote(codigos, variables)
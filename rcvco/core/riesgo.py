@@ -1,7 +1,11 @@
 """Clasificación de riesgo cardiovascular usando el protocolo de 4 pasos."""
 
-from typing import Dict, Union
-import logging
+from typing import Any, Dict, Iterator, NamedTuple
+
+try:  # numpy solo es necesario para la clasificación por lote (extra "cohorte")
+    import numpy as np
+except ImportError:  # pragma: no cover - entorno sin numpy
+    np = None  # type: ignore[assignment]
 
 def clasificar_riesgo_cv_4_pasos(
     tfg: float,
@@ -92,3 +96,168 @@ def clasificar_riesgo_cv_4_pasos(
         "nivel": "BAJO",
         "justificacion": "Sin factores de riesgo significativos"
     }
+
+
+# --- Clasificación por lote (estratificación poblacional) ---
+
+# Códigos categóricos de nivel (índice en NIVELES_RIESGO)
+NIVELES_RIESGO = ("MUY ALTO", "ALTO", "MODERADO", "BAJO")
+MUY_ALTO, ALTO, MODERADO, BAJO = range(4)
+
+# Bits de criterios evaluados
+CRIT_ECV = 1 << 0
+CRIT_TFG_MENOR_30 = 1 << 1
+CRIT_DM_DANO_ORGANO = 1 << 2
+CRIT_DM_FACTORES = 1 << 3
+CRIT_DM_DURACION = 1 << 4
+CRIT_TFG_30_60 = 1 << 5
+CRIT_PA_SEVERA = 1 << 6
+CRIT_LDL_190 = 1 << 7
+CRIT_FACTORES_3 = 1 << 8
+CRIT_RAC_POTENCIADOR = 1 << 9
+
+# Textos de justificación por paso, en el mismo orden que la versión escalar
+_TEXTOS_PASO_1 = (
+    (CRIT_ECV, "ECV establecida"),
+    (CRIT_TFG_MENOR_30, "TFG ≤ 30"),
+    (CRIT_DM_DANO_ORGANO, "Diabetes con daño de órgano"),
+    (CRIT_DM_FACTORES, "Diabetes con ≥3 factores de riesgo"),
+    (CRIT_DM_DURACION, "Diabetes >10 años de duración"),
+)
+_TEXTOS_PASO_2 = (
+    (CRIT_TFG_30_60, "TFG entre 30-60"),
+    (CRIT_PA_SEVERA, "PA ≥ 180/110"),
+    (CRIT_LDL_190, "LDL >190"),
+    (CRIT_FACTORES_3, "≥3 factores de riesgo"),
+)
+_MASCARA_PASO_2 = CRIT_TFG_30_60 | CRIT_PA_SEVERA | CRIT_LDL_190 | CRIT_FACTORES_3
+
+
+class RiesgoLote(NamedTuple):
+    """Resultado de la clasificación por lote.
+
+    Attributes:
+        codigos: Código de nivel por paciente (índice en NIVELES_RIESGO)
+        criterios: Máscara de bits CRIT_* con todos los criterios que se
+            cumplen, independientemente del paso que decidió el nivel
+        factores: Factores de riesgo efectivos (incluye RAC >30 como potenciador)
+    """
+
+    codigos: Any
+    criterios: Any
+    factores: Any
+
+    def nivel(self, i: int) -> str:
+        """Nivel de riesgo legible del paciente i."""
+        return NIVELES_RIESGO[self.codigos[i]]
+
+    def justificacion(self, i: int) -> str:
+        """Construye la justificación del paciente i (idéntica a la escalar)."""
+        codigo = int(self.codigos[i])
+        criterios = int(self.criterios[i])
+        if codigo == MUY_ALTO:
+            return "; ".join(t for bit, t in _TEXTOS_PASO_1 if criterios & bit)
+        if codigo == ALTO and criterios & _MASCARA_PASO_2:
+            return "; ".join(t for bit, t in _TEXTOS_PASO_2 if criterios & bit)
+        if codigo == ALTO:
+            return "≥3 factores de riesgo potenciadores"
+        if codigo == MODERADO:
+            return f"{int(self.factores[i])} factores de riesgo presentes"
+        return "Sin factores de riesgo significativos"
+
+    def justificaciones(self) -> Iterator[str]:
+        """Genera las justificaciones bajo demanda, una por paciente."""
+        return (self.justificacion(i) for i in range(len(self.codigos)))
+
+    def como_dict(self, i: int) -> Dict[str, str]:
+        """Paciente i en el formato de `clasificar_riesgo_cv_4_pasos`."""
+        return {"nivel": self.nivel(i), "justificacion": self.justificacion(i)}
+
+
+def clasificar_riesgo_cv_4_pasos_lote(
+    tfg: Any,
+    tiene_ecv: Any,
+    tiene_dm: Any,
+    tiene_hta: Any,
+    dano_organo: Any,
+    duracion_dm_10_anos: Any,
+    pa_sistolica: Any,
+    pa_diastolica: Any,
+    ldl: Any,
+    factores_riesgo: Any,
+    rac: Any,
+) -> RiesgoLote:
+    """Evalúa el protocolo de 4 pasos sobre columnas de una cohorte.
+
+    Mismas reglas que `clasificar_riesgo_cv_4_pasos`, evaluadas con operaciones
+    vectorizadas. Devuelve códigos categóricos y una máscara de criterios; las
+    justificaciones en texto solo se construyen al pedirlas al resultado.
+
+    Args:
+        tfg: TFG en mL/min
+        tiene_ecv: Presencia de ECV aterosclerótica establecida
+        tiene_dm: Diagnóstico de diabetes
+        tiene_hta: Diagnóstico de hipertensión (no altera la clasificación)
+        dano_organo: Presencia de daño en órgano blanco
+        duracion_dm_10_anos: DM con duración >10 años
+        pa_sistolica: PA sistólica en mmHg
+        pa_diastolica: PA diastólica en mmHg
+        ldl: Colesterol LDL en mg/dL
+        factores_riesgo: Número de factores de riesgo adicionales
+        rac: Relación albúmina/creatinina en mg/g
+
+    Returns:
+        RiesgoLote con códigos, criterios y factores efectivos
+
+    Raises:
+        ImportError: Si numpy no está instalado
+    """
+    if np is None:  # pragma: no cover - entorno sin numpy
+        raise ImportError(
+            "clasificar_riesgo_cv_4_pasos_lote requiere numpy (pip install rcvco[cohorte])"
+        )
+
+    tfg = np.asarray(tfg, dtype=np.float64)
+    ecv = np.asarray(tiene_ecv, dtype=bool)
+    dm = np.asarray(tiene_dm, dtype=bool)
+    dano = np.asarray(dano_organo, dtype=bool)
+    duracion = np.asarray(duracion_dm_10_anos, dtype=bool)
+    pas = np.asarray(pa_sistolica, dtype=np.float64)
+    pad = np.asarray(pa_diastolica, dtype=np.float64)
+    ldl = np.asarray(ldl, dtype=np.float64)
+    fr = np.asarray(factores_riesgo, dtype=np.int64)
+    rac_alto = np.asarray(rac, dtype=np.float64) > 30
+
+    fr_3 = fr >= 3
+    dm_dano = dm & dano
+    dm_factores = dm & ~dano & fr_3
+    dm_duracion = dm & ~dano & ~fr_3 & duracion
+    tfg_30 = tfg <= 30
+    tfg_30_60 = (tfg > 30) & (tfg <= 60)
+    pa_severa = (pas >= 180) | (pad >= 110)
+    ldl_190 = ldl > 190
+
+    criterios = np.zeros(tfg.shape, dtype=np.uint16)
+    for mascara, bit in (
+        (ecv, CRIT_ECV),
+        (tfg_30, CRIT_TFG_MENOR_30),
+        (dm_dano, CRIT_DM_DANO_ORGANO),
+        (dm_factores, CRIT_DM_FACTORES),
+        (dm_duracion, CRIT_DM_DURACION),
+        (tfg_30_60, CRIT_TFG_30_60),
+        (pa_severa, CRIT_PA_SEVERA),
+        (ldl_190, CRIT_LDL_190),
+        (fr_3, CRIT_FACTORES_3),
+        (rac_alto, CRIT_RAC_POTENCIADOR),
+    ):
+        criterios[mascara] |= bit
+
+    factores = fr + rac_alto
+    paso_1 = ecv | tfg_30 | dm_dano | dm_factores | dm_duracion
+    paso_2 = tfg_30_60 | pa_severa | ldl_190 | fr_3
+    codigos = np.select(
+        [paso_1, paso_2, factores >= 3, factores >= 1],
+        [MUY_ALTO, ALTO, ALTO, MODERADO],
+        default=BAJO,
+    ).astype(np.int8)
+    return RiesgoLote(codigos=codigos, criterios=criterios, factores=factores)
@@ -0,0 +1,154 @@
+"""Contexto de evaluación de un paciente.
+
+Calcula cada valor derivado (puntaje, categoría, ASCVD, CrCl, estadio,
+umbrales superados...) una sola vez y lo comparte entre todos los
+consumidores de `analizar_paciente`. Registra el tiempo de cada paso.
+"""
+from __future__ import annotations
+from datetime import date
+from functools import cached_property, wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
+from .models import AgendaItem, Paciente
+from .labs import agenda_labs
+from .scoring import calcula_puntaje
+from .risk import ascvd_por_puntaje, categoria_por_puntaje
+from .tfg import crcl_cockcroft_gault
+
+T = TypeVar("T")
+
+# Umbrales "algún valor del historial ≥ umbral" usados por razones y metas
+UMBRALES_LABS: Dict[str, tuple[str, float]] = {
+    "ldl": ("COLESTEROL LDL", 130),
+    "hba1c": ("HEMOGLOBINA GLICOSILADA (HBA1C)", 7),
+    "pas": ("PRESION ARTERIAL SISTOLICA", 140),
+    "creatinina": ("CREATININA EN SUERO U OTROS", 1.3),
+}
+
+
+def _paso(func: Callable[[Any], T]) -> cached_property[T]:
+    """Convierte un método en propiedad calculada una vez y cronometrada."""
+
+    @wraps(func)
+    def envoltura(self: "ContextoEvaluacion") -> T:
+        inicio = perf_counter()
+        valor = func(self)
+        self.tiempos_ms[func.__name__] = (perf_counter() - inicio) * 1000
+        return valor
+
+    return cached_property(envoltura)
+
+
+def estadio_por_crcl(crcl: float) -> Union[int, str]:
+    """Estadio ERC (1, 2, '3a', '3b', 4, 5) a partir del aclaramiento."""
+    if crcl >= 90:
+        return 1
+    if crcl >= 60:
+        return 2
+    if crcl >= 45:
+        return "3a"
+    if crcl >= 30:
+        return "3b"
+    if crcl >= 15:
+        return 4
+    return 5
+
+
+class ContextoEvaluacion:
+    """Valores derivados de un paciente, calculados bajo demanda y una sola vez.
+
+    `tiempos_ms` acumula la duración de cada paso en el orden en que se
+    calcularon (milisegundos).
+    """
+
+    def __init__(self, paciente: Paciente, hoy: Optional[date] = None):
+        self.paciente = paciente
+        self.hoy = hoy
+        self.indice = paciente.indice_labs
+        self.tiempos_ms: Dict[str, float] = {}
+
+    @_paso
+    def agenda(self) -> List[AgendaItem]:
+        return agenda_labs(self.paciente, hoy=self.hoy)
+
+    @_paso
+    def puntaje(self) -> int:
+        return calcula_puntaje(self.paciente)
+
+    @_paso
+    def riesgo_categoria(self) -> str:
+        return categoria_por_puntaje(self.puntaje)
+
+    @_paso
+    def ascvd(self) -> float:
+        return ascvd_por_puntaje(self.puntaje)
+
+    @_paso
+    def crcl(self) -> Optional[float]:
+        return crcl_cockcroft_gault(self.paciente)
+
+    @_paso
+    def estadio_calculado(self) -> Optional[Union[int, str]]:
+        """Estadio derivado del CrCl si no fue provisto explícitamente."""
+        if self.paciente.estadio_erc or self.crcl is None:
+            return None
+        return estadio_por_crcl(self.crcl)
+
+    @_paso
+    def programa(self) -> str:
+        # Heurística mínima: si creatinina presente => ERC, else HTA si PAS, else GENERAL
+        if "CREATININA EN SUERO U OTROS" in self.indice:
+            return "ERC"
+        if "PRESION ARTERIAL SISTOLICA" in self.indice:
+            return "HTA"
+        return "GENERAL"
+
+    @_paso
+    def umbrales(self) -> Dict[str, bool]:
+        """Para cada clave de UMBRALES_LABS, si algún valor lo alcanza."""
+        superados = {}
+        for clave, (nombre, umbral) in UMBRALES_LABS.items():
+            maximo = self.indice.maximo(nombre)
+            superados[clave] = maximo is not None and maximo >= umbral
+        return superados
+
+    @_paso
+    def razones(self) -> List[str]:
+        """Razones principales que justifican la categoría de riesgo."""
+        p = self.paciente
+        razones = []
+        if self.umbrales["ldl"]:
+            razones.append("LDL elevado")
+        if p.has_dm:
+            razones.append("Diabetes mellitus")
+        if self.umbrales["hba1c"]:
+            razones.append("HbA1c elevada")
+        if self.umbrales["pas"]:
+            razones.append("Hipertensión sistólica")
+        if self.umbrales["creatinina"]:
+            razones.append("Función renal reducida")
+        if p.estadio_erc:
+            razones.append(f"ERC estadio {p.estadio_erc}")
+        if self.crcl is not None and self.crcl < 60:
+            razones.append(f"Aclaramiento <60 ({self.crcl} ml/min)")
+        if self.estadio_calculado is not None:
+            razones.append(f"ERC estadio {self.estadio_calculado} (calculado)")
+        return razones
+
+    @_paso
+    def metas_incumplidas(self) -> List[str]:
+        return [m for m in [
+            "LDL por encima de objetivo" if self.umbrales["ldl"] else None,
+            "HbA1c por encima de objetivo" if self.umbrales["hba1c"] else None,
+            "Presión arterial sistólica elevada" if self.umbrales["pas"] else None,
+        ] if m]
+
+    @_paso
+    def metas_cumplidas(self) -> List[str]:
+        return [m for m in [
+            "Creatinina monitorizada" if "CREATININA EN SUERO U OTROS" in self.indice else None,
+            "Función renal evaluada (CrCl)" if self.crcl is not None else None,
+        ] if m]
+
+
+__all__ = ["ContextoEvaluacion", "UMBRALES_LABS", "estadio_por_crcl"]
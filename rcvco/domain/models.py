@@ -1,6 +1,6 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List, Literal
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Any, Dict, Iterable, Optional, List, Literal, Tuple
 from datetime import date, datetime
 
 LabNombre = Literal[
@@ -15,6 +15,11 @@ LabNombre = Literal[
 ]
 
 
+# Se incrementa al modificar cualquier LabResult en su lugar; invalida los
+# índices de labs cacheados en Paciente.
+_version_labs = 0
+
+
 class LabResult(BaseModel):
     nombre: str = Field(..., description="Nombre estandarizado del examen")
     valor: float = Field(..., description="Valor numérico del resultado")
@@ -25,6 +30,55 @@ class LabResult(BaseModel):
     def normalizar_nombre(cls, v: str) -> str:  # type: ignore[override]
         return v.strip().upper()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        global _version_labs
+        super().__setattr__(name, value)
+        _version_labs += 1
+
+
+class IndiceLabs:
+    """Índice de laboratorios por nombre estandarizado.
+
+    Agrupa el historial de cada examen ordenado por fecha (estable: ante
+    fechas iguales, el último agregado queda al final) y precalcula el último
+    resultado y el valor máximo de cada uno.
+    """
+
+    __slots__ = ("_historial", "_maximos", "fecha_mas_reciente")
+
+    def __init__(self, labs: Iterable[LabResult]):
+        historial: Dict[str, List[LabResult]] = {}
+        for lab in labs:
+            historial.setdefault(lab.nombre, []).append(lab)
+        for serie in historial.values():
+            serie.sort(key=lambda lab: lab.fecha)
+        self._historial = historial
+        self._maximos = {nombre: max(lab.valor for lab in serie) for nombre, serie in historial.items()}
+        self.fecha_mas_reciente: Optional[date] = max(
+            (serie[-1].fecha for serie in historial.values()), default=None
+        )
+
+    def __contains__(self, nombre: object) -> bool:
+        return nombre in self._historial
+
+    def ultimo(self, nombre: str) -> Optional[LabResult]:
+        """Resultado más reciente del examen, o None si no hay."""
+        serie = self._historial.get(nombre)
+        return serie[-1] if serie else None
+
+    def valor(self, nombre: str) -> Optional[float]:
+        """Valor del resultado más reciente del examen, o None si no hay."""
+        serie = self._historial.get(nombre)
+        return serie[-1].valor if serie else None
+
+    def maximo(self, nombre: str) -> Optional[float]:
+        """Valor máximo registrado en todo el historial del examen."""
+        return self._maximos.get(nombre)
+
+    def historial(self, nombre: str) -> List[LabResult]:
+        """Historial del examen ordenado por fecha ascendente (no modificar)."""
+        return self._historial.get(nombre, [])
+
 
 class Paciente(BaseModel):
     pseudo_id: str = Field(..., description="Identificador anonimizado")
@@ -37,6 +91,36 @@ class Paciente(BaseModel):
     estadio_erc: Optional[int] = Field(None, ge=1, le=5, description="Estadio de enfermedad renal crónica (1-5)")
     labs: List[LabResult] = Field(default_factory=list)
 
+    _indice_labs: Optional[IndiceLabs] = PrivateAttr(default=None)
+    # lista de la que se construyó el índice, su longitud y _version_labs
+    _indice_fuente: Optional[List[LabResult]] = PrivateAttr(default=None)
+    _indice_clave: Tuple[int, int] = PrivateAttr(default=(-1, -1))
+
+    @property
+    def indice_labs(self) -> IndiceLabs:
+        """Índice de laboratorios, construido una vez y reutilizado.
+
+        Se reconstruye si `labs` es otra lista (reasignación, `model_copy`
+        con update), cambia de longitud (append, remove) o se modifica algún
+        LabResult en su lugar. Si se reemplaza un elemento de la lista
+        (`labs[i] = ...`), llamar a `invalidar_indice_labs`.
+        """
+        clave = (len(self.labs), _version_labs)
+        if self._indice_labs is None or self._indice_fuente is not self.labs or self._indice_clave != clave:
+            self._indice_labs = IndiceLabs(self.labs)
+            self._indice_fuente = self.labs
+            self._indice_clave = clave
+        return self._indice_labs
+
+    def invalidar_indice_labs(self) -> None:
+        """Descarta el índice de laboratorios para reconstruirlo en el próximo uso."""
+        self._indice_labs = None
+
+    def agregar_lab(self, lab: LabResult) -> None:
+        """Agrega un resultado de laboratorio e invalida el índice."""
+        self.labs.append(lab)
+        self._indice_labs = None
+
 
 class AgendaItem(BaseModel):
     examen: str
@@ -58,9 +142,6 @@ class Informe(BaseModel):
     texto: str
 
 
-from typing import Dict, Any
-from pydantic import Field
-
 class AsistenteResultado(BaseModel):
     """Modelo único de salida del asistente.
 
@@ -80,4 +161,4 @@ class AsistenteResultado(BaseModel):
     riesgo_cv: Dict[str, Any] = Field(default_factory=dict)
     alertas_tfg: List[str] = Field(default_factory=list)
 
-__all__ = ["LabResult", "Paciente", "AgendaItem", "ResumenRiesgo", "Informe", "AsistenteResultado"]
+__all__ = ["LabResult", "IndiceLabs", "Paciente", "AgendaItem", "ResumenRiesgo", "Informe", "AsistenteResultado"]
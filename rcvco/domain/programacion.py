@@ -0,0 +1,224 @@
+"""Programación de laboratorios de toda una clínica con cupos diarios.
+
+`generar_agenda_avanzada` agenda a cada paciente por separado; con miles de
+pacientes ERC con la misma fecha base todos caen el mismo día. Aquí se
+programa la cohorte completa:
+
+1. Ventana por examen a partir de INTERVALOS: [base + d_min - ventana,
+   base + d_max]. El margen de `ventana_dias` hacia atrás es el mismo que ya
+   aplica la unificación (un examen puede adelantarse hasta 14 días para
+   compartir toma). Nunca antes de `hoy`; un examen vencido (base + d_max <
+   hoy) recibe [hoy, hoy + ventana]. La fecha preferida es la de
+   `_calcular_fecha`.
+2. Tomas por paciente con `agrupar_dias` (regla de 14 días, un solo sort para
+   toda la cohorte). La ventana de una toma es la intersección de las de sus
+   exámenes y siempre contiene el ancla, que es su fecha preferida.
+3. Cupos: barrido por días con un heap por fecha límite (earliest deadline
+   first) liberando cada toma en su fecha preferida; una toma = un cupo. Las
+   que se quedan sin cupo antes de su límite se adelantan al último día libre
+   de su ventana (union-find de días llenos) y, si no cabe, se programan en el
+   primer día libre posterior marcadas `en_ventana=False`.
+
+Todo trabaja con ordinales enteros: O(E log E) para E exámenes. Con cohortes
+de cientos de miles de pacientes buena parte del tiempo se va en el GC cíclico
+recorriendo objetos acíclicos; un proceso por lotes puede llamar a
+`gc.freeze()` antes (no se hace aquí: es estado global del proceso).
+"""
+from __future__ import annotations
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+from .models import AgendaItem
+from .rcv_rules import examenes_programables
+from .unificacion import DIAS_REVISION, VENTANA_UNIFICACION_DIAS, agrupar_dias
+
+
+@dataclass(frozen=True)
+class Solicitud:
+    clave: Hashable  # pseudo_id
+    fecha_base: date
+    estadio: str = "E1"
+    tiene_dm: bool = False
+
+
+@dataclass(frozen=True)
+class Visita:
+    clave: Hashable
+    fecha: date
+    examenes: Tuple[str, ...]
+    preferida: date  # fecha sin restricción de cupos
+    limite: date  # último día permitido por las ventanas de sus exámenes
+    en_ventana: bool = True
+
+
+@dataclass
+class Programacion:
+    visitas: List[Visita]  # por paciente (orden de entrada) y fecha
+    carga: Dict[date, int]  # tomas por día
+    _por_clave: Optional[Dict[Hashable, List[Visita]]] = field(default=None, init=False, repr=False)
+
+    @property
+    def fuera_de_ventana(self) -> int:
+        return sum(1 for v in self.visitas if not v.en_ventana)
+
+    @property
+    def desplazadas(self) -> int:
+        return sum(1 for v in self.visitas if v.fecha != v.preferida)
+
+    def por_clave(self, clave: Hashable) -> List[Visita]:
+        if self._por_clave is None:
+            indice: Dict[Hashable, List[Visita]] = {}
+            for v in self.visitas:
+                indice.setdefault(v.clave, []).append(v)
+            self._por_clave = indice
+        return self._por_clave.get(clave, [])
+
+    def agenda(self, clave: Hashable, dias_revision: int = DIAS_REVISION) -> List[AgendaItem]:
+        """Agenda de un paciente en el formato de `generar_agenda_avanzada`."""
+        items: List[AgendaItem] = []
+        for v in self.por_clave(clave):
+            revision = v.fecha + timedelta(days=dias_revision)
+            for examen in v.examenes:
+                items.append(AgendaItem(
+                    examen=examen,
+                    fecha_programada=v.fecha,
+                    motivo=f"Seguimiento {examen.lower()}",
+                    revision_fecha=revision,
+                ))
+        return items
+
+
+def programar_cohorte(
+    solicitudes: Iterable[Solicitud],
+    cupos_dia: int,
+    hoy: date,
+    cupos: Optional[Mapping[date, int]] = None,
+    ventana_dias: int = VENTANA_UNIFICACION_DIAS,
+) -> Programacion:
+    """Programa los exámenes de todos los pacientes con `cupos_dia` tomas por
+    día (`cupos` sobrescribe días concretos, p. ej. festivos a 0)."""
+    if cupos_dia < 1:
+        raise ValueError("cupos_dia debe ser >= 1")
+    hoy_o = hoy.toordinal()
+    cupos_o = {f.toordinal(): n for f, n in (cupos or {}).items()}
+
+    # 1. ventanas por examen (columnas paralelas)
+    claves: List[Hashable] = []
+    paciente: List[int] = []
+    examenes: List[str] = []
+    objetivo: List[int] = []
+    inicio: List[int] = []
+    fin: List[int] = []
+    planes: Dict[Tuple[str, bool], List[Tuple[str, int, int]]] = {}
+    for s in solicitudes:
+        llave = (s.estadio, bool(s.tiene_dm))
+        plan = planes.get(llave)
+        if plan is None:
+            plan = planes[llave] = [(e, a, b) for e, (a, b) in examenes_programables(s.estadio, s.tiene_dm)]
+        p = len(claves)
+        claves.append(s.clave)
+        base = s.fecha_base.toordinal()
+        for examen, d_min, d_max in plan:
+            f_min, f_max = base + d_min, base + d_max
+            if f_max < hoy_o:  # vencido
+                obj, ini, lim = hoy_o, hoy_o, hoy_o + ventana_dias
+            else:
+                obj = f_min if f_min >= hoy_o else f_max
+                ini, lim = max(hoy_o, f_min - ventana_dias), f_max
+            paciente.append(p)
+            examenes.append(examen)
+            objetivo.append(obj)
+            inicio.append(ini)
+            fin.append(lim)
+
+    # 2. tomas: regla de 14 días por paciente
+    grupos = agrupar_dias(objetivo, paciente, ventana_dias)
+    n = len(grupos)
+    pref = [objetivo[g[0]] for g in grupos]
+    desde = [max([inicio[i] for i in g]) for g in grupos]
+    hasta = [min([fin[i] for i in g]) for g in grupos]
+
+    # 3. cupos
+    asignada: List[int] = [0] * n
+    en_ventana: List[bool] = [True] * n
+    carga: Dict[int, int] = {}
+
+    def cupo(d: int) -> int:
+        return cupos_o.get(d, cupos_dia)
+
+    orden = sorted(range(n), key=pref.__getitem__)
+    pendientes: List[int] = []
+    heap: List[Tuple[int, int]] = []
+    k, dia = 0, 0
+    while k < n or heap:
+        if not heap:
+            dia = max(dia, pref[orden[k]])
+        while k < n and pref[orden[k]] <= dia:
+            v = orden[k]
+            heapq.heappush(heap, (hasta[v], v))
+            k += 1
+        while heap and heap[0][0] < dia:
+            pendientes.append(heapq.heappop(heap)[1])
+        libres = cupo(dia)
+        usados = 0
+        while heap and usados < libres:
+            asignada[heapq.heappop(heap)[1]] = dia
+            usados += 1
+        if usados:
+            carga[dia] = usados
+        dia += 1
+
+    # días llenos -> siguiente candidato (hacia atrás / hacia delante), con
+    # compresión de caminos: cada búsqueda de día libre es casi O(1)
+    atras: Dict[int, int] = {}
+    delante: Dict[int, int] = {}
+
+    def libre_antes(d: int, minimo: int) -> Optional[int]:
+        """Último día libre <= d, o None si no lo hay desde `minimo`."""
+        ruta = []
+        while d >= minimo and carga.get(d, 0) >= cupo(d):
+            ruta.append(d)
+            d = atras.get(d, d - 1)
+        for x in ruta:
+            atras[x] = d
+        return d if d >= minimo else None
+
+    def libre_desde(d: int) -> int:
+        """Primer día libre >= d (siempre existe: cupos_dia >= 1)."""
+        ruta = []
+        while carga.get(d, 0) >= cupo(d):
+            ruta.append(d)
+            d = delante.get(d, d + 1)
+        for x in ruta:
+            delante[x] = d
+        return d
+
+    # sin cupo entre su fecha preferida y su límite: último día libre de la ventana;
+    # si no hay, primer día libre tras el límite
+    pendientes.sort(key=lambda v: (hasta[v], v))
+    for v in pendientes:
+        d = libre_antes(hasta[v], desde[v])
+        if d is None:
+            d = libre_desde(hasta[v] + 1)
+            en_ventana[v] = False
+        asignada[v] = d
+        carga[d] = carga.get(d, 0) + 1
+
+    fechas = {d: date.fromordinal(d) for d in {*asignada, *pref, *hasta}}
+    llaves = [(paciente[g[0]] << 22) | d for g, d in zip(grupos, asignada, strict=True)]  # ordinal < 2**22
+    visitas: List[Visita] = []
+    for v in sorted(range(n), key=llaves.__getitem__):
+        g = grupos[v]
+        visitas.append(Visita(
+            claves[paciente[g[0]]],
+            fechas[asignada[v]],
+            tuple([examenes[i] for i in g]),
+            fechas[pref[v]],
+            fechas[hasta[v]],
+            en_ventana[v],
+        ))
+    return Programacion(visitas, {fechas[d]: c for d, c in sorted(carga.items())})
+
+
+__all__ = ["Solicitud", "Visita", "Programacion", "programar_cohorte"]
@@ -2,8 +2,9 @@ from __future__ import annotations
 from datetime import date, timedelta
 from typing import List, Optional, Tuple
 from .models import AgendaItem
+from .unificacion import VENTANA_UNIFICACION_DIAS, unificar_agenda
 
-UNIFICACION_DIAS = 14
+UNIFICACION_DIAS = VENTANA_UNIFICACION_DIAS
 _RANGO = lambda x: (x, x)
 
 INTERVALOS = {
@@ -35,16 +36,22 @@ def _calcular_fecha(fecha_base: date, rango: Tuple[int, int], hoy: date) -> date
         return fecha_base + timedelta(days=d_max)
     return fecha_min
 
-def generar_agenda_avanzada(fecha_base: date, estadio: str, tiene_dm: bool, ldl_val: Optional[float] = None, hoy: Optional[date] = None) -> List[AgendaItem]:
-    hoy = hoy or fecha_base
+def examenes_programables(estadio: str, tiene_dm: bool) -> List[Tuple[str, Tuple[int, int]]]:
+    """(examen, (d_min, d_max)) que aplican al estadio, en el orden de EXAM_ORDER."""
     estadio_n = _normalizar_estadio(estadio)
-    agenda: List[AgendaItem] = []
+    plan: List[Tuple[str, Tuple[int, int]]] = []
     for examen in EXAM_ORDER:
         if examen == "HEMOGLOBINA GLICOSILADA (HBA1C)" and not tiene_dm:
             continue
         conf = INTERVALOS[examen][estadio_n]
-        if conf is None:
-            continue
+        if conf is not None:
+            plan.append((examen, conf))
+    return plan
+
+def generar_agenda_avanzada(fecha_base: date, estadio: str, tiene_dm: bool, ldl_val: Optional[float] = None, hoy: Optional[date] = None) -> List[AgendaItem]:
+    hoy = hoy or fecha_base
+    agenda: List[AgendaItem] = []
+    for examen, conf in examenes_programables(estadio, tiene_dm):
         fecha_prog = _calcular_fecha(fecha_base, conf, hoy)
         agenda.append(AgendaItem(
             examen=examen,
@@ -52,20 +59,6 @@ def generar_agenda_avanzada(fecha_base: date, estadio: str, tiene_dm: bool, ldl_
             motivo=f"Seguimiento {examen.lower()}",
             revision_fecha=fecha_prog + timedelta(days=7),
         ))
-    agenda.sort(key=lambda a: a.fecha_programada)
-    i = 0
-    while i < len(agenda):
-        grupo = [agenda[i]]
-        j = i + 1
-        while j < len(agenda) and (agenda[j].fecha_programada - agenda[i].fecha_programada).days <= UNIFICACION_DIAS:
-            grupo.append(agenda[j])
-            j += 1
-        if len(grupo) > 1:
-            fecha_ref = grupo[0].fecha_programada
-            for g in grupo:
-                g.fecha_programada = fecha_ref
-                g.revision_fecha = fecha_ref + timedelta(days=7)
-        i = j
-    return agenda
+    return unificar_agenda(agenda, UNIFICACION_DIAS)
 
-__all__ = ["generar_agenda_avanzada"]
+__all__ = ["generar_agenda_avanzada", "examenes_programables"]
@@ -17,19 +17,30 @@ CATEGORIAS = [
 ]
 
 
-def clasificar_riesgo_cv_4_pasos(paciente: Paciente) -> str:
-    score = calcula_puntaje(paciente)
+def categoria_por_puntaje(score: int) -> str:
     for umbral, nombre in CATEGORIAS:
         if score >= umbral:
             return nombre
     return "Bajo"
 
 
-def ascvd_ajustado(paciente: Paciente) -> float:
+def ascvd_por_puntaje(score: int) -> float:
     # Placeholder: derivar de score * factor
-    score = calcula_puntaje(paciente)
     # Supuesto: 5% base + 2% por punto
     return min(100.0, 5 + score * 2.0)
 
 
-__all__ = ["clasificar_riesgo_cv_4_pasos", "ascvd_ajustado"]
+def clasificar_riesgo_cv_4_pasos(paciente: Paciente) -> str:
+    return categoria_por_puntaje(calcula_puntaje(paciente))
+
+
+def ascvd_ajustado(paciente: Paciente) -> float:
+    return ascvd_por_puntaje(calcula_puntaje(paciente))
+
+
+__all__ = [
+    "clasificar_riesgo_cv_4_pasos",
+    "ascvd_ajustado",
+    "categoria_por_puntaje",
+    "ascvd_por_puntaje",
+]
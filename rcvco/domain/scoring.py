@@ -15,10 +15,8 @@ def calcula_puntaje(paciente: Paciente) -> int:
     if paciente.edad >= 65:
         score += 2
 
-    # Buscar labs relevantes
-    def last(nombre: str):
-        labs = [l for l in paciente.labs if l.nombre == nombre]
-        return max(labs, key=lambda x: x.fecha) if labs else None
+    # Último resultado de cada lab relevante
+    last = paciente.indice_labs.ultimo
 
     ldl = last("COLESTEROL LDL")
     if ldl:
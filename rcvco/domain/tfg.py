@@ -11,10 +11,9 @@ def crcl_cockcroft_gault(paciente: Paciente, creatinina_mg_dl: float | None = No
         return None
     if creatinina_mg_dl is None:
         # buscar creatinina sérica
-        labs = [l for l in paciente.labs if l.nombre == "CREATININA EN SUERO U OTROS"]
-        if not labs:
+        creatinina_mg_dl = paciente.indice_labs.valor("CREATININA EN SUERO U OTROS")
+        if creatinina_mg_dl is None:
             return None
-        creatinina_mg_dl = sorted(labs, key=lambda x: x.fecha)[-1].valor
     if creatinina_mg_dl <= 0:
         return None
     factor_sexo = 0.85 if paciente.sexo == "F" else 1.0
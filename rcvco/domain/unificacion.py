@@ -0,0 +1,127 @@
+"""Unificación de exámenes en ventanas de días (barrido lineal, O(n log n)).
+
+Regla: se ordenan las fechas y cada grupo se ancla en la fecha más temprana
+aún sin asignar; entran todas las que caen a `ventana_dias` o menos del ancla
+y se mueven a ella. El resultado depende solo de las fechas (no del orden de
+mutación) y cuesta un sort más un barrido.
+
+Con `claves` (p. ej. pseudo_id) se agrupa por clave en la misma pasada, de
+modo que la agenda de toda una clínica se unifica de una vez.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+from .models import AgendaItem
+
+VENTANA_UNIFICACION_DIAS = 14
+DIAS_REVISION = 7
+
+
+@dataclass(frozen=True)
+class Grupo:
+    clave: Hashable
+    fecha: date  # ancla: fecha más temprana del grupo
+    indices: Tuple[int, ...]  # posiciones en la entrada, en orden cronológico
+
+
+def agrupar_ventanas(
+    fechas: Sequence[date],
+    ventana_dias: int = VENTANA_UNIFICACION_DIAS,
+    claves: Optional[Sequence[Hashable]] = None,
+) -> List[Grupo]:
+    """Grupos de fechas a `ventana_dias` o menos de su ancla, por clave."""
+    if claves is not None and len(claves) != len(fechas):
+        raise ValueError("claves y fechas deben tener la misma longitud")
+    dias = [f.toordinal() for f in fechas]
+    if claves is None:
+        grupos_dias = agrupar_dias(dias, None, ventana_dias)
+        return [Grupo(None, fechas[idx[0]], idx) for idx in grupos_dias]
+    # número de clave por orden de aparición: no exige que las claves sean ordenables
+    numeros: Dict[Hashable, int] = {}
+    grupo_de = [numeros.setdefault(c, len(numeros)) for c in claves]
+    return [Grupo(claves[idx[0]], fechas[idx[0]], idx) for idx in agrupar_dias(dias, grupo_de, ventana_dias)]
+
+
+def agrupar_dias(
+    dias: Sequence[int], grupo_de: Optional[Sequence[int]], ventana_dias: int = VENTANA_UNIFICACION_DIAS
+) -> List[Tuple[int, ...]]:
+    """Núcleo de `agrupar_ventanas` sobre días ordinales y grupos enteros (>= 0).
+
+    Devuelve los índices de cada grupo en orden cronológico (el primero es el
+    ancla). Un único sort por llave entera (grupo, día) y un barrido lineal.
+    """
+    if grupo_de is None:
+        llaves: Sequence[int] = dias
+    else:
+        llaves = [(g << 22) | d for g, d in zip(grupo_de, dias, strict=True)]  # ordinal < 2**22
+    orden = sorted(range(len(dias)), key=llaves.__getitem__)
+    grupos: List[Tuple[int, ...]] = []
+    actual: List[int] = []
+    ancla = -1
+    for i in orden:
+        if actual and (grupo_de is None or grupo_de[i] == grupo_de[ancla]) and dias[i] - dias[ancla] <= ventana_dias:
+            actual.append(i)
+            continue
+        if actual:
+            grupos.append(tuple(actual))
+        ancla, actual = i, [i]
+    if actual:
+        grupos.append(tuple(actual))
+    return grupos
+
+
+def unificar_agenda(
+    items: Sequence[AgendaItem],
+    ventana_dias: int = VENTANA_UNIFICACION_DIAS,
+    dias_revision: int = DIAS_REVISION,
+) -> List[AgendaItem]:
+    """Agenda unificada, ordenada por fecha; no modifica los items recibidos
+    (los que no cambian se devuelven tal cual)."""
+    resultado: List[AgendaItem] = []
+    for grupo in agrupar_ventanas([it.fecha_programada for it in items], ventana_dias):
+        for i in grupo.indices:
+            resultado.append(_mover(items[i], grupo.fecha, dias_revision))
+    return resultado
+
+
+def unificar_agendas(
+    agendas: Mapping[Hashable, Sequence[AgendaItem]],
+    ventana_dias: int = VENTANA_UNIFICACION_DIAS,
+    dias_revision: int = DIAS_REVISION,
+) -> Dict[Hashable, List[AgendaItem]]:
+    """`unificar_agenda` para muchos pacientes en un solo sort + barrido."""
+    planos: List[AgendaItem] = []
+    claves: List[Hashable] = []
+    for clave, items in agendas.items():
+        planos.extend(items)
+        claves.extend([clave] * len(items))
+    resultado: Dict[Hashable, List[AgendaItem]] = {clave: [] for clave in agendas}
+    grupos = agrupar_ventanas([it.fecha_programada for it in planos], ventana_dias, claves)
+    for grupo in grupos:
+        destino = resultado[grupo.clave]
+        for i in grupo.indices:
+            destino.append(_mover(planos[i], grupo.fecha, dias_revision))
+    return resultado
+
+
+def _mover(item: AgendaItem, fecha: date, dias_revision: int) -> AgendaItem:
+    revision = fecha + timedelta(days=dias_revision)
+    if item.fecha_programada == fecha and item.revision_fecha == revision:
+        return item  # sin cambios: se reutiliza
+    # model_construct: los campos ya vienen validados y copiar con model_copy
+    # domina el coste en agendas de clínica completa
+    return AgendaItem.model_construct(
+        examen=item.examen, fecha_programada=fecha, motivo=item.motivo, revision_fecha=revision
+    )
+
+
+__all__ = [
+    "VENTANA_UNIFICACION_DIAS",
+    "DIAS_REVISION",
+    "Grupo",
+    "agrupar_ventanas",
+    "agrupar_dias",
+    "unificar_agenda",
+    "unificar_agendas",
+]
@@ -1,66 +1,118 @@
 from __future__ import annotations
+import mmap
+import os
 import re
-from datetime import datetime
-from pathlib import Path
-from typing import List
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Any, Iterator, List, Optional, Tuple
 from rcvco.domain.models import Paciente, LabResult
-
-# Mapeo simple nombres -> etiqueta estandarizada
-MAP_NOMBRES = {
-    re.compile(r"creatinina.*suero", re.I): "CREATININA EN SUERO U OTROS",
-    re.compile(r"hba1c|hemoglobina glic", re.I): "HEMOGLOBINA GLICOSILADA (HBA1C)",
-    re.compile(r"glucosa", re.I): "GLUCOSA EN AYUNAS",
-    re.compile(r"ldl", re.I): "COLESTEROL LDL",
-    re.compile(r"hdl", re.I): "COLESTEROL HDL",
-    re.compile(r"triglic", re.I): "TRIGLICERIDOS",
-    re.compile(r"presion.*sistol", re.I): "PRESION ARTERIAL SISTOLICA",
-    re.compile(r"presion.*diastol", re.I): "PRESION ARTERIAL DIASTOLICA",
-}
+from rcvco.parsing.labs import mapear_nombre_lab
+from rcvco.parsing.pdf import extraer_labs_pdf
 
 RE_FECHA = re.compile(r"(\d{4}-\d{2}-\d{2})")
 RE_VALOR = re.compile(r"([0-9]+(?:\.[0-9]+)?)")
 
 
-def _mapear_nombre(original: str) -> str | None:
-    o = original.strip().lower()
-    # descartar creatinina orina parcial
-    if "creatinina" in o and "orina" in o:
+def _parse_campos(partes: List[str], linea: str, hoy: date) -> Optional[LabResult]:
+    if len(partes) < 2:
+        return None
+    nombre = mapear_nombre_lab(partes[0])
+    if not nombre:
+        return None
+    match_v = RE_VALOR.search(partes[1])
+    if not match_v:
         return None
-    for pat, estandar in MAP_NOMBRES.items():
-        if pat.search(original):
-            return estandar
-    return None
+    match_f = RE_FECHA.search(linea)
+    fecha = date.fromisoformat(match_f.group(1)) if match_f else hoy
+    return LabResult(nombre=nombre, valor=float(match_v.group(1)), unidad="", fecha=fecha)
 
 
-def parse_txt(path: str, pseudo_id: str = "anon", sexo: str = "M", edad: int = 50) -> Paciente:
-    contenido = Path(path).read_text(encoding="utf-8", errors="ignore")
+def iter_lineas(path: str, desde: int = 0) -> Iterator[Tuple[int, int, str]]:
+    """Recorre el archivo con mmap y produce (inicio, fin, linea) por cada línea.
+
+    `fin` es el offset en bytes donde empieza la línea siguiente: pasarlo como
+    `desde` reanuda la lectura justo después. Si `desde` cae en medio de una
+    línea, esa línea parcial se descarta.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            tam = len(mm)
+            pos = max(0, desde)
+            if 0 < pos < tam and mm[pos - 1:pos] != b"\n":
+                salto = mm.find(b"\n", pos)
+                pos = tam if salto == -1 else salto + 1
+            while pos < tam:
+                salto = mm.find(b"\n", pos)
+                fin = tam if salto == -1 else salto + 1
+                linea = mm[pos:fin].rstrip(b"\r\n").decode("utf-8", errors="ignore")
+                yield pos, fin, linea
+                pos = fin
+
+
+def iter_labs_txt(path: str, desde: int = 0, con_offset: bool = False) -> Iterator[Any]:
+    """Genera los LabResult del export `nombre|valor|fecha` en memoria acotada.
+
+    Con `con_offset=True` produce tuplas (offset, lab), donde offset es la
+    posición desde la que reanudar tras ese resultado.
+    """
+    hoy = datetime.today().date()
+    for _, fin, linea in iter_lineas(path, desde):
+        lab = _parse_campos(linea.split("|"), linea, hoy)
+        if lab is not None:
+            yield (fin, lab) if con_offset else lab
+
+
+def iter_pacientes_txt(
+    path: str,
+    columna_id: int = 0,
+    desde: int = 0,
+    con_offset: bool = False,
+    sexo: str = "M",
+    edad: int = 50,
+) -> Iterator[Any]:
+    """Agrupa en Pacientes las líneas contiguas con el mismo id en `columna_id`.
+
+    Formato: `id|nombre|valor|fecha` (la columna del id se retira antes de
+    interpretar el resto). El export debe venir ordenado por id; solo se
+    mantiene en memoria el paciente en curso. Con `con_offset=True` produce
+    (offset, paciente), donde offset es el inicio de la primera línea del
+    paciente siguiente.
+    """
+    hoy = datetime.today().date()
+    actual: Optional[str] = None
     labs: List[LabResult] = []
-    for linea in contenido.splitlines():
+    for inicio, _, linea in iter_lineas(path, desde):
         partes = linea.split("|")
-        if len(partes) < 2:
+        if len(partes) <= columna_id:
             continue
-        nombre_raw = partes[0]
-        nombre = _mapear_nombre(nombre_raw)
-        if not nombre:
+        pid = partes.pop(columna_id).strip()
+        lab = _parse_campos(partes, "|".join(partes), hoy)
+        if lab is None:
             continue
-        match_v = RE_VALOR.search(partes[1])
-        match_f = RE_FECHA.search(linea)
-        if not match_v:
-            continue
-        valor = float(match_v.group(1))
-        fecha = (
-            datetime.strptime(match_f.group(1), "%Y-%m-%d").date()
-            if match_f
-            else datetime.today().date()
-        )
-        labs.append(LabResult(nombre=nombre, valor=valor, unidad="", fecha=fecha))
-    return Paciente(pseudo_id=pseudo_id, sexo=sexo, edad=edad, labs=labs)
+        if pid != actual:
+            if labs:
+                p = Paciente(pseudo_id=actual, sexo=sexo, edad=edad, labs=labs)
+                yield (inicio, p) if con_offset else p
+            actual, labs = pid, []
+        labs.append(lab)
+    if labs:
+        p = Paciente(pseudo_id=actual, sexo=sexo, edad=edad, labs=labs)
+        yield (os.path.getsize(path), p) if con_offset else p
 
 
-def parse_pdf(path: str, **kwargs) -> Paciente:
-    # Placeholder: tratar PDF como texto plano (se podría integrar pdfplumber)
-    return parse_txt(path, **kwargs)
+def parse_txt(path: str, pseudo_id: str = "anon", sexo: str = "M", edad: int = 50) -> Paciente:
+    return Paciente(pseudo_id=pseudo_id, sexo=sexo, edad=edad, labs=list(iter_labs_txt(path)))
+
+
+def parse_pdf(path: str, pseudo_id: str = "anon", sexo: str = "M", edad: int = 50) -> Paciente:
+    """PDF de laboratorio vía pdftotext (ver rcvco.parsing.pdf); sin fecha se usa hoy."""
+    hoy = datetime.today().date()
+    labs = [
+        LabResult(nombre=lab["nombre"], valor=lab["valor"], unidad=lab["unidad"] or "", fecha=lab.get("fecha") or hoy)
+        for lab in extraer_labs_pdf(path)
+    ]
+    return Paciente(pseudo_id=pseudo_id, sexo=sexo, edad=edad, labs=labs)
 
 
-__all__ = ["parse_txt", "parse_pdf"]
+__all__ = ["parse_txt", "parse_pdf", "iter_lineas", "iter_labs_txt", "iter_pacientes_txt"]
@@ -1,5 +1,9 @@
 from __future__ import annotations
-from typing import Dict
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from rcvco.config import settings
 
 # Mapping variantes -> canon
 LAB_NAME_MAP: Dict[str, str] = {
@@ -11,3 +15,130 @@ LAB_NAME_MAP: Dict[str, str] = {
 def normalize_lab_name(raw: str) -> str:
     key = raw.strip().lower()
     return LAB_NAME_MAP.get(key, raw.strip().upper())
+
+
+# Catálogo de sinónimos (patrón, nombre estándar) en orden de prioridad.
+# Un nombre None descarta la coincidencia (p.ej. creatinina en orina).
+# Los patrones de dos palabras usan un hueco acotado sin números ni separadores
+# para no saltar, en texto libre, por encima de otros exámenes y sus valores.
+_HUECO = r"[^\d\n,;]{0,30}"
+SINONIMOS_LABS: List[Tuple[str, Optional[str]]] = [
+    (rf"creatinina{_HUECO}orina|orina(?:\s*24\s*h)?{_HUECO}creatinina", None),
+    (r"creatinina", "CREATININA EN SUERO U OTROS"),
+    (r"hba1c|hemoglobina glic", "HEMOGLOBINA GLICOSILADA (HBA1C)"),
+    (r"glucosa", "GLUCOSA EN AYUNAS"),
+    (r"ldl", "COLESTEROL LDL"),
+    (r"hdl", "COLESTEROL HDL"),
+    (r"triglic", "TRIGLICERIDOS"),
+    (rf"presion{_HUECO}sistol", "PRESION ARTERIAL SISTOLICA"),
+    (rf"presion{_HUECO}diastol", "PRESION ARTERIAL DIASTOLICA"),
+]
+
+RE_NUMERO = re.compile(r"([0-9]+(?:\.[0-9]+)?)")
+
+
+class MapeadorLabs:
+    """Reconoce nombres de laboratorio con una única expresión alternada.
+
+    Todos los sinónimos se compilan en `(?P<_0>...)|(?P<_1>...)|...`, así que
+    cada texto se recorre una sola vez. Si hay varias coincidencias gana la de
+    menor índice en el catálogo. Los resultados de `mapear` se memorizan por
+    nombre crudo: los exports repiten las mismas cabeceras millones de veces.
+    """
+
+    def __init__(self, sinonimos: Iterable[Tuple[str, Optional[str]]] = (), max_memo: int = 4096):
+        self._sinonimos: List[Tuple[str, Optional[str]]] = []
+        self._max_memo = max_memo
+        self._memo: Dict[str, Optional[str]] = {}
+        self._regex: re.Pattern[str] = re.compile(r"(?!)")
+        self.agregar(sinonimos)
+
+    @property
+    def sinonimos(self) -> Sequence[Tuple[str, Optional[str]]]:
+        return tuple(self._sinonimos)
+
+    def agregar(self, sinonimos: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """Añade sinónimos al final del catálogo (menor prioridad) y recompila."""
+        nuevos = [(patron, nombre) for patron, nombre in sinonimos]
+        for patron, _ in nuevos:
+            re.compile(patron)  # error temprano con el patrón culpable
+        self._sinonimos.extend(nuevos)
+        alternativas = "|".join(f"(?P<_{i}>{p})" for i, (p, _) in enumerate(self._sinonimos))
+        self._regex = re.compile(alternativas or r"(?!)", re.I)
+        self._memo.clear()
+
+    def cargar_catalogo(self, ruta: str | Path) -> None:
+        """Carga sinónimos desde un JSON `[{"patron": ..., "nombre": ...}, ...]`."""
+        entradas = json.loads(Path(ruta).read_text(encoding="utf-8"))
+        self.agregar((e["patron"], e.get("nombre")) for e in entradas)
+
+    def _indice(self, m: re.Match[str]) -> int:
+        return int(m.lastgroup[1:])  # type: ignore[index]
+
+    def buscar(self, texto: str) -> Optional[Tuple[Optional[str], re.Match[str]]]:
+        """Mejor coincidencia (nombre estándar o None, match) en `texto`, sin memo."""
+        mejor: Optional[re.Match[str]] = None
+        for m in self._regex.finditer(texto):
+            if mejor is None or self._indice(m) < self._indice(mejor):
+                mejor = m
+                if self._indice(m) == 0:
+                    break
+        if mejor is None:
+            return None
+        return self._sinonimos[self._indice(mejor)][1], mejor
+
+    def mapear(self, nombre: str) -> Optional[str]:
+        """Nombre estándar para una cabecera cruda, o None si no se reconoce."""
+        try:
+            return self._memo[nombre]
+        except KeyError:
+            pass
+        encontrado = self.buscar(nombre)
+        resultado = encontrado[0] if encontrado else None
+        if len(self._memo) >= self._max_memo:
+            self._memo.clear()
+        self._memo[nombre] = resultado
+        return resultado
+
+    def coincidencias(self, texto: str) -> Iterator[Tuple[Optional[str], re.Match[str]]]:
+        """Recorre texto libre y produce (nombre estándar o None, match) en orden."""
+        for m in self._regex.finditer(texto):
+            yield self._sinonimos[self._indice(m)][1], m
+
+
+MAPEADOR_LABS = MapeadorLabs(SINONIMOS_LABS)
+if settings.LAB_SYNONYMS_PATH:
+    MAPEADOR_LABS.cargar_catalogo(settings.LAB_SYNONYMS_PATH)
+
+
+def mapear_nombre_lab(nombre: str) -> Optional[str]:
+    return MAPEADOR_LABS.mapear(nombre)
+
+
+def extraer_labs_texto(texto: str, mapeador: MapeadorLabs = MAPEADOR_LABS) -> List[Dict[str, float | str]]:
+    """Extrae pares `nombre: valor` de texto pegado (p.ej. 'LDL: 120 mg/dL').
+
+    El valor es el primer número tras el nombre; si un examen aparece varias
+    veces se conserva la primera aparición.
+    """
+    labs: List[Dict[str, float | str]] = []
+    vistos = set()
+    for nombre, m in mapeador.coincidencias(texto):
+        if nombre is None or nombre in vistos:
+            continue
+        v = RE_NUMERO.search(texto, m.end())
+        if v:
+            vistos.add(nombre)
+            labs.append({"nombre": nombre, "valor": float(v.group(1))})
+    return labs
+
+
+__all__ = [
+    "LAB_NAME_MAP",
+    "normalize_lab_name",
+    "SINONIMOS_LABS",
+    "MapeadorLabs",
+    "MAPEADOR_LABS",
+    "mapear_nombre_lab",
+    "extraer_labs_texto",
+]
@@ -1,15 +1,57 @@
 from __future__ import annotations
-from typing import Any, Dict
-from .labs import normalize_lab_name
+import hashlib
+import io
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+from .labs import MAPEADOR_LABS
+from .pdf import es_pdf, extraer_labs_pdf, labs_desde_lineas
 
 # ParsedData estructura mínima
 # patient: dict, labs: list[dict]
 
+# Subir al cambiar la salida de parse_document: invalida la caché de uploads.
+PARSER_VERSION = "2"
+
+
+def version_parser() -> str:
+    """PARSER_VERSION más huella del catálogo de sinónimos vigente.
+
+    Ampliar el catálogo (LAB_SYNONYMS_PATH) cambia la salida igual que una
+    nueva versión del parser, así que también invalida lo cacheado.
+    """
+    huella = hashlib.sha256(repr(MAPEADOR_LABS.sinonimos).encode("utf-8")).hexdigest()[:12]
+    return f"{PARSER_VERSION}-{huella}"
+
+
 def parse_document(content: bytes, filename: str) -> Dict[str, Any]:
-    # Simulación simple: no OCR real, devolver placeholder
+    return parse_document_archivo(io.BytesIO(content), filename)
+
+
+def modo_parseo(archivo: BinaryIO, filename: str) -> str:
+    """"pdf" o "texto": lo deciden la cabecera y la extensión del nombre."""
+    archivo.seek(0)
+    cabecera = archivo.read(5)
+    archivo.seek(0)
+    return "pdf" if es_pdf(cabecera, filename) else "texto"
+
+
+def parse_document_archivo(archivo: BinaryIO, filename: str) -> Dict[str, Any]:
+    """Extrae labs de un informe subido (PDF vía pdftotext o texto plano).
+
+    Lee el archivo desde el inicio y por bloques/líneas, sin cargarlo entero.
+    Bloqueante: en la API se llama desde el threadpool. Puede lanzar
+    ExtraccionPDFError si el PDF no se puede convertir.
+    """
+    if modo_parseo(archivo, filename) == "pdf":
+        labs = extraer_labs_pdf(archivo)
+    else:
+        texto = io.TextIOWrapper(archivo, encoding="utf-8", errors="ignore", newline=None)
+        try:
+            labs = labs_desde_lineas((linea.rstrip("\n") for linea in texto), MAPEADOR_LABS)
+        finally:
+            texto.detach()  # no cerrar el archivo del llamador
     return {
-        "patient": {"pseudo_id": filename.split('.')[0], "sexo": "M", "edad": 60},
-        "labs": [
-            {"nombre": normalize_lab_name("creatinina"), "valor": 1.1, "unidad": "mg/dL"}
-        ],
+        # sexo/edad por defecto: forman parte del contrato de /api/upload
+        "patient": {"pseudo_id": Path(filename or "documento").stem, "sexo": "M", "edad": 60},
+        "labs": labs,
     }
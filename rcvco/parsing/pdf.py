@@ -0,0 +1,234 @@
+"""Extracción de laboratorios desde PDF con poppler (`pdftotext -layout`).
+
+Cada página se convierte en un subproceso independiente; los subprocesos se
+lanzan desde un pool de hilos acotado (PDF_MAX_PROCESOS), de modo que un
+informe de muchas páginas se procesa en paralelo sin abrir procesos sin
+límite. Todo el documento está sujeto a PDF_TIMEOUT_S: cada subproceso recibe
+solo el tiempo que queda hasta el plazo y, al vencer, se matan los que siguen
+vivos (grupo de procesos) antes de soltar el archivo. El texto resultante
+pasa por el catálogo compartido de sinónimos (rcvco.parsing.labs).
+"""
+from __future__ import annotations
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Union
+from rcvco.config import settings
+from .labs import MAPEADOR_LABS, MapeadorLabs
+
+OrigenPDF = Union[bytes, str, Path, BinaryIO]
+
+RE_VALOR_UNIDAD = re.compile(r"(?<![\w.,])(\d+(?:[.,]\d+)?)(?:[ \t]*(%|[a-zA-Zµμ][\w/µμ.^]*))?")
+RE_FECHA = re.compile(r"(\d{4}-\d{2}-\d{2})|(\d{2}/\d{2}/\d{4})")
+RE_PAGINAS = re.compile(rb"^Pages:\s+(\d+)", re.M)
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+class ExtraccionPDFError(RuntimeError):
+    """El PDF no pudo convertirse a texto (poppler ausente, PDF dañado o timeout)."""
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=settings.PDF_MAX_PROCESOS, thread_name_prefix="pdftotext")
+        return _POOL
+
+
+def _matar(proc: subprocess.Popen) -> None:
+    """SIGKILL al grupo del subproceso (sus hijos incluidos)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass  # ya terminó
+
+
+class _Procesos:
+    """Subprocesos vivos de una extracción, para matarlos al vencer el plazo."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._vivos: Set[subprocess.Popen] = set()
+        self.cancelado = False
+
+    def lanzar(self, args: List[str]) -> subprocess.Popen:
+        with self._lock:
+            if self.cancelado:
+                raise ExtraccionPDFError("Extracción PDF cancelada")
+            proc = subprocess.Popen(
+                args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+            )
+            self._vivos.add(proc)
+            return proc
+
+    def terminar(self, proc: subprocess.Popen) -> None:
+        with self._lock:
+            self._vivos.discard(proc)
+
+    def cancelar(self) -> None:
+        with self._lock:
+            self.cancelado = True
+            for proc in self._vivos:
+                _matar(proc)
+
+
+def _ejecutar(args: List[str], limite: float, procesos: Optional[_Procesos] = None) -> bytes:
+    """Ejecuta `args` con el tiempo que queda hasta `limite` (time.monotonic)."""
+    procesos = procesos or _Procesos()
+    proc = procesos.lanzar(args)
+    try:
+        try:
+            salida, error = proc.communicate(timeout=max(limite - time.monotonic(), 0.1))
+        except subprocess.TimeoutExpired as e:
+            _matar(proc)
+            proc.communicate()
+            raise ExtraccionPDFError(f"{args[0]} excedió el plazo") from e
+    finally:
+        procesos.terminar(proc)
+    if procesos.cancelado:
+        raise ExtraccionPDFError("Extracción PDF cancelada")
+    if proc.returncode != 0:
+        detalle = error.decode("utf-8", errors="ignore").strip()[:200]
+        raise ExtraccionPDFError(f"{args[0]} falló ({proc.returncode}): {detalle}")
+    return salida
+
+
+def contar_paginas(ruta: str, timeout: float) -> Optional[int]:
+    """Número de páginas según `pdfinfo`, o None si no se puede determinar."""
+    if shutil.which("pdfinfo") is None:
+        return None
+    try:
+        m = RE_PAGINAS.search(_ejecutar(["pdfinfo", ruta], time.monotonic() + timeout))
+    except ExtraccionPDFError:
+        return None
+    return int(m.group(1)) if m else None
+
+
+def _pdftotext(ruta: str, pagina: Optional[int], limite: float, procesos: _Procesos) -> str:
+    args = ["pdftotext", "-layout", "-enc", "UTF-8"]
+    if pagina is not None:
+        args += ["-f", str(pagina), "-l", str(pagina)]
+    return _ejecutar(args + [ruta, "-"], limite, procesos).decode("utf-8", errors="ignore")
+
+
+def _extraer_paginas_ruta(ruta: str, timeout: float) -> List[str]:
+    limite = time.monotonic() + timeout
+    procesos = _Procesos()
+    paginas = contar_paginas(ruta, timeout)
+    if not paginas:
+        return [_pdftotext(ruta, None, limite, procesos)]
+    paginas = min(paginas, settings.PDF_MAX_PAGINAS)
+    futuros = [_pool().submit(_pdftotext, ruta, n, limite, procesos) for n in range(1, paginas + 1)]
+    hechos, pendientes = wait(futuros, timeout=max(limite - time.monotonic(), 0))
+    if pendientes:
+        for f in pendientes:
+            f.cancel()
+        procesos.cancelar()
+        # los que ya corrían terminan en cuanto muere su subproceso: así el pool
+        # queda libre y el llamador puede borrar el temporal sin carreras
+        wait(futuros)
+        raise ExtraccionPDFError(f"Extracción PDF excedió {timeout:.0f}s ({len(hechos)}/{paginas} páginas)")
+    return [f.result() for f in futuros]
+
+
+def extraer_paginas_pdf(origen: OrigenPDF, timeout: Optional[float] = None) -> List[str]:
+    """Texto (modo layout) de cada página del PDF, en orden (hasta PDF_MAX_PAGINAS).
+
+    `origen` puede ser la ruta del archivo, su contenido en bytes o un archivo
+    binario abierto (estos dos se vuelcan por bloques a un temporal). Lanza ExtraccionPDFError si poppler no está disponible, el
+    PDF no es legible o se supera el timeout.
+    """
+    if shutil.which("pdftotext") is None:
+        raise ExtraccionPDFError("pdftotext no disponible (instalar poppler-utils)")
+    timeout = settings.PDF_TIMEOUT_S if timeout is None else timeout
+    if isinstance(origen, (str, Path)):
+        return _extraer_paginas_ruta(str(origen), timeout)
+    fd, ruta = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(origen, bytes):
+                f.write(origen)
+            else:
+                shutil.copyfileobj(origen, f)
+        return _extraer_paginas_ruta(ruta, timeout)
+    finally:
+        os.unlink(ruta)
+
+
+def _fecha(linea: str) -> Optional[date]:
+    m = RE_FECHA.search(linea)
+    if not m:
+        return None
+    try:
+        if m.group(1):
+            return date.fromisoformat(m.group(1))
+        return datetime.strptime(m.group(2), "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+
+def labs_desde_lineas(lineas: Iterable[str], mapeador: MapeadorLabs = MAPEADOR_LABS) -> List[Dict[str, Any]]:
+    """Labs de un texto tabular: una fila por examen con nombre, valor y unidad.
+
+    En cada línea se toma el examen reconocido y el primer número posterior
+    (acepta coma decimal); la unidad y la fecha se incluyen si aparecen. Se
+    conserva la primera aparición de cada (examen, fecha).
+    """
+    labs: List[Dict[str, Any]] = []
+    vistos = set()
+    for linea in lineas:
+        encontrado = mapeador.buscar(linea)
+        if encontrado is None or encontrado[0] is None:
+            continue
+        nombre, m = encontrado
+        v = RE_VALOR_UNIDAD.search(linea, m.end())
+        if not v:
+            continue
+        fecha = _fecha(linea)
+        if (nombre, fecha) in vistos:
+            continue
+        vistos.add((nombre, fecha))
+        lab: Dict[str, Any] = {"nombre": nombre, "valor": float(v.group(1).replace(",", ".")), "unidad": v.group(2)}
+        if fecha:
+            lab["fecha"] = fecha.isoformat()
+        labs.append(lab)
+    return labs
+
+
+def labs_desde_texto(texto: str, mapeador: MapeadorLabs = MAPEADOR_LABS) -> List[Dict[str, Any]]:
+    return labs_desde_lineas(texto.splitlines(), mapeador)
+
+
+def extraer_labs_pdf(origen: OrigenPDF, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    return labs_desde_lineas(
+        linea for pagina in extraer_paginas_pdf(origen, timeout) for linea in pagina.splitlines()
+    )
+
+
+def es_pdf(content: bytes, filename: str = "") -> bool:
+    return content[:5] == b"%PDF-" or filename.lower().endswith(".pdf")
+
+
+__all__ = [
+    "ExtraccionPDFError",
+    "extraer_paginas_pdf",
+    "extraer_labs_pdf",
+    "labs_desde_texto",
+    "labs_desde_lineas",
+    "contar_paginas",
+    "es_pdf",
+]
@@ -0,0 +1,86 @@
+"""Análisis masivo de pacientes en NDJSON (un registro JSON por línea).
+
+El cuerpo se consume como flujo de bytes, se agrupa en bloques de tamaño
+acotado y cada bloque se procesa en un hilo del pool; los resultados se
+emiten en NDJSON a medida que termina cada bloque. La memoria usada depende
+del tamaño del bloque y de la línea más larga, no del tamaño de la carga.
+"""
+from __future__ import annotations
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from rcvco.adapters.ui_bridge import procesar_json
+
+Linea = Tuple[int, Optional[bytes]]  # (número de línea, contenido | None si excede el máximo)
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_linea: int) -> AsyncIterator[Linea]:
+    """Divide un flujo de bytes en líneas NDJSON no vacías, numeradas desde 1.
+
+    Las líneas de más de `max_linea` bytes se descartan sin acumularlas y se
+    reportan con contenido None.
+    """
+    buffer = b""
+    n = 0
+    descartando = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lineas, buffer = buffer.split(b"\n")
+        for linea in lineas:
+            n += 1
+            if descartando:
+                descartando = False
+                continue
+            if len(linea) > max_linea:
+                yield n, None
+            elif linea.strip():
+                yield n, linea
+        if len(buffer) > max_linea and not descartando:
+            yield n + 1, None
+            descartando = True
+        if descartando:
+            buffer = b""
+    if buffer.strip() and not descartando:
+        yield n + 1, buffer
+
+
+def analizar_registro(linea: int, raw: Optional[bytes]) -> Dict[str, Any]:
+    """Analiza un registro PatientInput; los fallos se devuelven como objeto de error."""
+    if raw is None:
+        return {"linea": linea, "error": "Línea demasiado larga"}
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        return {"linea": linea, "error": "JSON inválido", "detalles": str(e)[:200]}
+    if not isinstance(data, dict):
+        return {"linea": linea, "error": "Validación", "detalles": "Se esperaba un objeto JSON"}
+    try:
+        resultado = procesar_json(data)
+    except Exception as e:  # noqa: BLE001 - un registro no debe abortar el lote
+        return {"linea": linea, "error": "Procesamiento", "detalles": str(e)[:200]}
+    return {"linea": linea, **resultado}
+
+
+def analizar_bloque(bloque: List[Linea]) -> bytes:
+    """Analiza un bloque de líneas y lo serializa en NDJSON."""
+    return b"".join(
+        json.dumps(analizar_registro(n, raw), ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        for n, raw in bloque
+    )
+
+
+async def analizar_ndjson(
+    chunks: AsyncIterator[bytes], tamano_bloque: int, max_linea: int
+) -> AsyncIterator[bytes]:
+    """Analiza un flujo NDJSON y emite los resultados NDJSON por bloques."""
+    bloque: List[Linea] = []
+    async for item in iter_ndjson_lines(chunks, max_linea):
+        bloque.append(item)
+        if len(bloque) >= tamano_bloque:
+            yield await run_in_threadpool(analizar_bloque, bloque)
+            bloque = []
+    if bloque:
+        yield await run_in_threadpool(analizar_bloque, bloque)
+
+
+__all__ = ["iter_ndjson_lines", "analizar_registro", "analizar_bloque", "analizar_ndjson"]
@@ -0,0 +1,112 @@
+"""Datos de las gráficas de tendencias (LDL, HbA1c) para la UI.
+
+El servidor arma las series a partir de los labs registrados, las reduce a
+como mucho CHART_MAX_PUNTOS con LTTB (Largest-Triangle-Three-Buckets, que
+conserva picos y valles) y calcula un parche con solo los puntos añadidos o
+cambiados respecto a lo ya enviado al navegador. El cliente
+(assets/js/charts.js) aplica el parche sobre el Chart.js existente sin
+destruirlo.
+"""
+from __future__ import annotations
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (id de lab, etiqueta, color)
+SERIES_TENDENCIAS: Tuple[Tuple[str, str, str], ...] = (
+    ("ldl", "LDL", "#364FC7"),
+    ("hba1c", "HbA1c", "#f59e0b"),
+)
+
+Punto = Dict[str, Any]  # {"x": fecha ISO | "", "y": float}
+Series = Dict[str, List[Punto]]
+
+
+def _x_numerico(punto: Punto, i: int) -> float:
+    try:
+        return float(date.fromisoformat(punto["x"]).toordinal())
+    except (TypeError, ValueError):
+        return float(i)
+
+
+def reducir_lttb(puntos: Sequence[Punto], max_puntos: int) -> List[Punto]:
+    """Reduce una serie a `max_puntos` con LTTB; primero y último se conservan."""
+    n = len(puntos)
+    max_puntos = max(3, max_puntos)
+    if n <= max_puntos:
+        return list(puntos)
+    xs = [_x_numerico(p, i) for i, p in enumerate(puntos)]
+    ys = [float(p["y"]) for p in puntos]
+    salida = [puntos[0]]
+    tamano = (n - 2) / (max_puntos - 2)
+    a = 0
+    for b in range(max_puntos - 2):
+        inicio = int(b * tamano) + 1
+        fin = int((b + 1) * tamano) + 1
+        sig_inicio, sig_fin = fin, min(int((b + 2) * tamano) + 1, n)
+        if sig_fin <= sig_inicio:  # último bucket: el "siguiente" es el punto final
+            sig_inicio, sig_fin = n - 1, n
+        cx = sum(xs[sig_inicio:sig_fin]) / (sig_fin - sig_inicio)
+        cy = sum(ys[sig_inicio:sig_fin]) / (sig_fin - sig_inicio)
+        ax, ay = xs[a], ys[a]
+        mejor, mejor_area = inicio, -1.0
+        for j in range(inicio, fin):
+            area = abs((ax - cx) * (ys[j] - ay) - (ax - xs[j]) * (cy - ay))
+            if area > mejor_area:
+                mejor, mejor_area = j, area
+        salida.append(puntos[mejor])
+        a = mejor
+    salida.append(puntos[-1])
+    return salida
+
+
+def series_tendencias(labs: Iterable[Dict[str, Any]], max_puntos: int) -> Series:
+    """Series por lab (orden cronológico, sin fecha al final) ya reducidas."""
+    series: Series = {}
+    for lab_id, _, _ in SERIES_TENDENCIAS:
+        puntos: List[Punto] = []
+        for lab in labs:
+            if lab.get("id") != lab_id:
+                continue
+            try:
+                y = float(lab.get("valor"))
+            except (TypeError, ValueError):
+                continue
+            puntos.append({"x": lab.get("fecha") or "", "y": y})
+        if puntos:
+            puntos.sort(key=lambda p: (p["x"] == "", p["x"]))
+            series[lab_id] = reducir_lttb(puntos, max_puntos)
+    return series
+
+
+def parche_series(previas: Series, nuevas: Series) -> Dict[str, Dict[str, Any]]:
+    """Diferencia mínima por serie: `{"desde": k, "puntos": [...]}`.
+
+    El cliente trunca la serie en `k` y añade `puntos`; si solo se agregaron
+    puntos al final, `k` es la longitud previa y viajan solo los nuevos. Las
+    series eliminadas llegan como `{"desde": 0, "puntos": []}`; las que no
+    cambian no aparecen.
+    """
+    parche: Dict[str, Dict[str, Any]] = {}
+    for lab_id in previas.keys() | nuevas.keys():
+        antes, ahora = previas.get(lab_id, []), nuevas.get(lab_id, [])
+        k = 0
+        limite = min(len(antes), len(ahora))
+        while k < limite and antes[k] == ahora[k]:
+            k += 1
+        if k == len(antes) == len(ahora):
+            continue
+        parche[lab_id] = {"desde": k, "puntos": ahora[k:]}
+    return parche
+
+
+def estilos_series(ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+    """Etiqueta y color por serie (se envían una vez al crear la gráfica)."""
+    filtro = set(ids) if ids is not None else None
+    return {
+        lab_id: {"label": etiqueta, "color": color}
+        for lab_id, etiqueta, color in SERIES_TENDENCIAS
+        if filtro is None or lab_id in filtro
+    }
+
+
+__all__ = ["SERIES_TENDENCIAS", "reducir_lttb", "series_tendencias", "parche_series", "estilos_series"]
@@ -0,0 +1,56 @@
+"""Forma compacta del estado de sesión de la UI y su medición.
+
+AppState guarda labs y medicamentos solo en backend como tuplas; aquí están
+las conversiones desde las filas que devuelve el cliente (modelo o dict) y
+`medir_estado`, que mide cuántos bytes ocupa una sesión. No depende de
+Reflex: recibe cualquier objeto con `dict()` y `_serialize()`.
+"""
+from __future__ import annotations
+import json
+from typing import Any, Dict, Optional, Tuple
+
+# Laboratorio compacto en estado backend: (nombre, valor, fecha ISO); la unidad
+# sale de LABS_MAP al construir la vista.
+LabCompacto = Tuple[str, Optional[float], Optional[str]]
+# Medicamento compacto: (nombre, dosis, frecuencia)
+MedCompacto = Tuple[str, str, str]
+
+
+def campos_fila(item: Any, *campos: str) -> Tuple[Any, ...]:
+    """Campos de una fila de la vista: el modelo o el dict que devuelve el cliente."""
+    if isinstance(item, dict):
+        return tuple(item.get(c) for c in campos)
+    return tuple(getattr(item, c, None) for c in campos)
+
+
+def med_compacto(item: Any) -> MedCompacto:
+    nombre, dosis, frecuencia = campos_fila(item, "nombre", "dosis", "frecuencia")
+    return (nombre or "", dosis or "", frecuencia or "")
+
+
+def lab_compacto(item: Any) -> LabCompacto:
+    nombre, valor, fecha = campos_fila(item, "nombre", "valor", "fecha")
+    return (nombre or "", valor, fecha)
+
+
+def medir_estado(state: Any) -> Dict[str, int]:
+    """Bytes del estado de una sesión.
+
+    - cliente: JSON de las vars sincronizadas (incluye computed), lo que
+      recibe el navegador al hidratar.
+    - persistido: pickle que guarda el state manager (Redis/disco) por sesión.
+    """
+    return {
+        "cliente": len(json.dumps(state.dict(), default=str).encode("utf-8")),
+        "persistido": len(state._serialize()),
+    }
+
+
+__all__ = [
+    "LabCompacto",
+    "MedCompacto",
+    "campos_fila",
+    "med_compacto",
+    "lab_compacto",
+    "medir_estado",
+]
@@ -0,0 +1,144 @@
+"""Fachada de servicios para los handlers de estado de Reflex.
+
+Por defecto (UI_API_MODE="local") los handlers llaman en proceso a las mismas
+funciones que exponen las rutas /api/*: sin conexión TCP, sin serializar JSON
+y sin crear un cliente por acción. Si la API se despliega aparte
+(UI_API_MODE="http"), se usa un único httpx.AsyncClient con pool de
+conexiones contra BASE_API_URL, reutilizado entre llamadas.
+"""
+from __future__ import annotations
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Protocol
+from rcvco.adapters.llm.factory import get_llm_client
+from rcvco.config import settings
+from rcvco.parsing.labs import extraer_labs_texto
+from rcvco.services.content_service import load_content, save_content
+from rcvco.services.patient_service import merge_patient_data
+from rcvco.services.report_service import astream_report, build_prompt
+from rcvco.services.upload_cache import parse_archivo_cacheado
+from rcvco.services.upload_service import recibir_upload, registrar_memoria
+
+
+class ServiciosRCV(Protocol):
+    async def parse_text(self, raw: str) -> Dict[str, Any]: ...
+    async def preview_report(self, data: Dict[str, Any]) -> Dict[str, Any]: ...
+    def stream_report(self, data: Dict[str, Any]) -> AsyncIterator[str]: ...
+    async def subir_archivo(self, upload: Any) -> Dict[str, Any]: ...
+    async def cargar_contenido(self) -> Dict[str, Any]: ...
+    async def guardar_contenido(self, data: Dict[str, Any]) -> Dict[str, Any]: ...
+
+
+class ServiciosLocales:
+    """Implementación en proceso; las rutas FastAPI delegan aquí también."""
+
+    async def parse_text(self, raw: str) -> Dict[str, Any]:
+        return {"labs": extraer_labs_texto(raw)}
+
+    async def preview_report(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"prompt": build_prompt(data)}
+
+    async def stream_report(self, data: Dict[str, Any]) -> AsyncIterator[str]:
+        async for fragmento in astream_report(get_llm_client(), merge_patient_data(data)):
+            yield fragmento
+
+    async def subir_archivo(self, upload: Any) -> Dict[str, Any]:
+        archivo = await recibir_upload(upload)
+        resultado = await asyncio.to_thread(parse_archivo_cacheado, archivo.archivo, archivo.nombre, archivo.sha256)
+        registrar_memoria(archivo)
+        return resultado
+
+    async def cargar_contenido(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(load_content)
+
+    async def guardar_contenido(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.to_thread(save_content, data)
+        return {"ok": True}
+
+
+class ServiciosHTTP:
+    """Cliente de la API remota con un pool de conexiones compartido."""
+
+    def __init__(self, base_url: str, timeout: float = 15.0, max_conexiones: int = 20, transport: Any = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_conexiones = max_conexiones
+        self.transport = transport
+        self._cliente: Any = None
+
+    def _http(self) -> Any:
+        if self._cliente is None or self._cliente.is_closed:
+            import httpx
+
+            self._cliente = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_conexiones, max_keepalive_connections=self.max_conexiones),
+                transport=self.transport,
+            )
+        return self._cliente
+
+    async def _json(self, metodo: str, ruta: str, **kwargs: Any) -> Dict[str, Any]:
+        resp = await self._http().request(metodo, ruta, **kwargs)
+        if resp.status_code != 200:
+            raise RuntimeError(f"{ruta} HTTP {resp.status_code}")
+        return resp.json()
+
+    async def parse_text(self, raw: str) -> Dict[str, Any]:
+        return await self._json("POST", "/api/parse-text", params={"raw": raw})
+
+    async def preview_report(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._json("POST", "/api/preview-report", json=data)
+
+    async def stream_report(self, data: Dict[str, Any]) -> AsyncIterator[str]:
+        """Consume el SSE de /api/report/stream y emite los fragmentos de texto."""
+        async with self._http().stream("POST", "/api/report/stream", json=data) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f"/api/report/stream HTTP {resp.status_code}")
+            evento = "message"
+            async for linea in resp.aiter_lines():
+                if linea.startswith("event:"):
+                    evento = linea[6:].strip()
+                elif linea.startswith("data:"):
+                    datos = json.loads(linea[5:])
+                    if evento == "error":
+                        raise RuntimeError(datos.get("detail") or "Error del proveedor LLM")
+                    if evento == "fin":
+                        return
+                    yield datos.get("delta", "")
+                elif not linea:
+                    evento = "message"
+
+    async def subir_archivo(self, upload: Any) -> Dict[str, Any]:
+        await upload.seek(0)
+        archivo = (upload.filename or "documento", upload.file, upload.content_type or "application/octet-stream")
+        return await self._json("POST", "/api/upload", files={"file": archivo})
+
+    async def cargar_contenido(self) -> Dict[str, Any]:
+        return await self._json("GET", "/api/content")
+
+    async def guardar_contenido(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._json("POST", "/api/content", json=data)
+
+    async def cerrar(self) -> None:
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+
+
+SERVICIOS_LOCALES = ServiciosLocales()
+_servicios: Optional[ServiciosRCV] = None
+
+
+def get_servicios() -> ServiciosRCV:
+    global _servicios
+    if _servicios is not None:
+        return _servicios
+    if settings.UI_API_MODE.lower() == "http":
+        _servicios = ServiciosHTTP(settings.BASE_API_URL, settings.UI_API_TIMEOUT_S, settings.UI_API_MAX_CONEXIONES)
+    else:
+        _servicios = SERVICIOS_LOCALES
+    return _servicios
+
+
+__all__ = ["ServiciosRCV", "ServiciosLocales", "ServiciosHTTP", "SERVICIOS_LOCALES", "get_servicios"]
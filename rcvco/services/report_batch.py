@@ -0,0 +1,166 @@
+"""Generación de informes por lotes (altas, cohortes) con concurrencia acotada.
+
+Los pacientes llegan como NDJSON (uno por línea) y se despachan al cliente LLM
+con como mucho `concurrencia` informes en vuelo; el cuerpo se sigue leyendo
+solo cuando se libera un hueco, así que la memoria no crece con el lote.
+Cada resultado se emite en cuanto termina (no en orden de entrada) con su
+`linea`; los fallos de un paciente se devuelven como objeto de error sin
+abortar el resto. La última línea es un `resumen` con throughput y
+percentiles de latencia.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import math
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from pydantic import ValidationError
+from rcvco.adapters.llm.base import ErrorLLM
+from rcvco.services.analysis_service import iter_ndjson_lines
+from rcvco.services.report_cache import CACHE_INFORMES, CacheInformes
+from rcvco.services.report_service import abuild_and_generate_report
+
+PERCENTILES = (50, 90, 95, 99)
+
+Validador = Callable[[Dict[str, Any]], Dict[str, Any]]
+Linea = Tuple[int, Optional[bytes]]  # (número de línea, bytes o None si excede el límite)
+
+
+def percentiles(valores: Sequence[float], ps: Iterable[int] = PERCENTILES) -> Dict[str, float]:
+    """Percentiles por rango más cercano (p50, p90...) y máximo; {} si no hay valores."""
+    if not valores:
+        return {}
+    orden = sorted(valores)
+    res = {f"p{p}": round(orden[max(0, math.ceil(p / 100 * len(orden)) - 1)], 1) for p in ps}
+    res["max"] = round(orden[-1], 1)
+    return res
+
+
+class Metricas:
+    """Contadores del lote y latencias por informe (ms)."""
+
+    def __init__(self) -> None:
+        self.inicio = time.perf_counter()
+        self.latencias_ms: List[float] = []
+        self.errores = 0
+
+    def registrar(self, resultado: Dict[str, Any]) -> None:
+        if "error" in resultado:
+            self.errores += 1
+        elif "ms" in resultado:
+            self.latencias_ms.append(resultado["ms"])
+
+    def resumen(self) -> Dict[str, Any]:
+        segundos = time.perf_counter() - self.inicio
+        ok = len(self.latencias_ms)
+        return {
+            "total": ok + self.errores,
+            "ok": ok,
+            "errores": self.errores,
+            "segundos": round(segundos, 3),
+            "informes_por_s": round(ok / segundos, 2) if segundos > 0 else 0.0,
+            "latencia_ms": percentiles(self.latencias_ms),
+        }
+
+
+async def _generar_uno(
+    client: Any, linea: int, raw: Optional[bytes], validar: Optional[Validador], cache: Optional[CacheInformes]
+) -> Dict[str, Any]:
+    if raw is None:
+        return {"linea": linea, "error": "Línea demasiado larga"}
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        return {"linea": linea, "error": "JSON inválido", "detalles": str(e)[:200]}
+    if not isinstance(data, dict):
+        return {"linea": linea, "error": "Validación", "detalles": "Se esperaba un objeto JSON"}
+    pid = data.get("pseudo_id")
+    try:
+        if validar is not None:
+            data = validar(data)
+    except ValidationError as e:
+        return {"linea": linea, "pseudo_id": pid, "error": "Validación", "detalles": e.errors(include_url=False)}
+    inicio = time.perf_counter()
+    try:
+        texto = await abuild_and_generate_report(client, data, cache=cache)
+    except ErrorLLM as e:
+        return {"linea": linea, "pseudo_id": pid, "error": "LLM", "detalles": str(e)[:200]}
+    except Exception as e:  # noqa: BLE001 - un paciente no debe abortar el lote
+        return {"linea": linea, "pseudo_id": pid, "error": "Procesamiento", "detalles": str(e)[:200]}
+    ms = round((time.perf_counter() - inicio) * 1000, 1)
+    return {"linea": linea, "pseudo_id": pid, "report_text": texto, "ms": ms}
+
+
+async def _siguiente(lineas: AsyncIterator[Linea]) -> Optional[Linea]:
+    """Siguiente línea de entrada, o None al agotarse."""
+    try:
+        return await lineas.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def generar_informes(
+    client: Any,
+    lineas: AsyncIterator[Linea],
+    concurrencia: int,
+    validar: Optional[Validador] = None,
+    cache: Optional[CacheInformes] = CACHE_INFORMES,
+    metricas: Optional[Metricas] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Genera un informe por línea con como mucho `concurrencia` en vuelo.
+
+    Emite cada resultado al completarse, también mientras se espera la
+    siguiente línea de entrada. Si el consumidor abandona (cliente
+    desconectado), las tareas pendientes se cancelan.
+    """
+    metricas = metricas or Metricas()
+    concurrencia = max(1, concurrencia)
+    pendientes: Set["asyncio.Task[Dict[str, Any]]"] = set()
+    lectura: Optional["asyncio.Task[Optional[Linea]]"] = None
+    agotado = False
+    try:
+        while not agotado or pendientes:
+            if not agotado and lectura is None and len(pendientes) < concurrencia:
+                lectura = asyncio.create_task(_siguiente(lineas))
+            esperadas: Set["asyncio.Future[Any]"] = set(pendientes)
+            if lectura is not None:
+                esperadas.add(lectura)
+            await asyncio.wait(esperadas, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in [t for t in pendientes if t.done()]:
+                pendientes.discard(tarea)
+                resultado = tarea.result()
+                metricas.registrar(resultado)
+                yield resultado
+            if lectura is not None and lectura.done():
+                siguiente = lectura.result()
+                lectura = None
+                if siguiente is None:
+                    agotado = True
+                else:
+                    linea, raw = siguiente
+                    pendientes.add(asyncio.create_task(_generar_uno(client, linea, raw, validar, cache)))
+    finally:
+        if lectura is not None:
+            lectura.cancel()
+        for tarea in pendientes:
+            tarea.cancel()
+
+
+async def generar_informes_ndjson(
+    client: Any,
+    chunks: AsyncIterator[bytes],
+    concurrencia: int,
+    max_linea: int,
+    validar: Optional[Validador] = None,
+    cache: Optional[CacheInformes] = CACHE_INFORMES,
+) -> AsyncIterator[bytes]:
+    """Flujo NDJSON de pacientes -> NDJSON de informes + línea final `resumen`."""
+    metricas = Metricas()
+    async for resultado in generar_informes(
+        client, iter_ndjson_lines(chunks, max_linea), concurrencia, validar, cache, metricas
+    ):
+        yield json.dumps(resultado, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+    yield json.dumps({"resumen": metricas.resumen()}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+__all__ = ["percentiles", "Metricas", "generar_informes", "generar_informes_ndjson"]
@@ -0,0 +1,139 @@
+"""Caché de informes generados, por prompt normalizado + proveedor + modelo.
+
+- TTL (REPORT_CACHE_TTL_S) y expulsión LRU (REPORT_CACHE_ITEMS).
+- Single-flight: peticiones idénticas concurrentes esperan la misma llamada
+  en curso en lugar de lanzar otra; una ráfaga de clics cuesta una llamada.
+- Los errores no se cachean (quienes esperaban reciben la misma excepción).
+- Contadores en `estadisticas` (aciertos, fallos, coalescidas, expulsiones).
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from rcvco.config import settings
+
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_prompt(prompt: str) -> str:
+    return _RE_ESPACIOS.sub(" ", prompt).strip()
+
+
+def clave_informe(client: Any, prompt: str) -> str:
+    proveedor = getattr(client, "proveedor", "") or type(client).__name__
+    modelo = getattr(client, "model", "") or ""
+    base = f"{proveedor}\0{modelo}\0{normalizar_prompt(prompt)}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+class CacheInformes:
+    def __init__(self, ttl_s: float = 600.0, max_items: int = 512, reloj: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_items = max_items
+        self._reloj = reloj
+        self._items: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._en_curso: Dict[str, "asyncio.Task[str]"] = {}
+        self._en_curso_sync: Dict[str, threading.Event] = {}
+        self.estadisticas = {"aciertos": 0, "fallos": 0, "coalescidas": 0, "expulsiones": 0}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def obtener(self, clave: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(clave)
+            if item is None:
+                return None
+            expira, texto = item
+            if expira <= self._reloj():
+                del self._items[clave]
+                self.estadisticas["expulsiones"] += 1
+                return None
+            self._items.move_to_end(clave)
+            return texto
+
+    def consultar(self, clave: str) -> Optional[str]:
+        """`obtener` contando acierto o fallo (para quien genera por su cuenta)."""
+        texto = self.obtener(clave)
+        self._contar("aciertos" if texto is not None else "fallos")
+        return texto
+
+    def guardar(self, clave: str, texto: str) -> None:
+        with self._lock:
+            self._items[clave] = (self._reloj() + self.ttl_s, texto)
+            self._items.move_to_end(clave)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.estadisticas["expulsiones"] += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def _contar(self, campo: str) -> None:
+        with self._lock:
+            self.estadisticas[campo] += 1
+
+    async def obtener_o_generar(self, clave: str, generar: Callable[[], Awaitable[str]]) -> str:
+        texto = self.obtener(clave)
+        if texto is not None:
+            self._contar("aciertos")
+            return texto
+        tarea = self._en_curso.get(clave)
+        if tarea is not None:
+            self._contar("coalescidas")
+        else:
+            self._contar("fallos")
+            tarea = asyncio.ensure_future(self._generar(clave, generar))
+            self._en_curso[clave] = tarea
+        # shield: si un solicitante se cancela, la llamada sigue para los demás
+        return await asyncio.shield(tarea)
+
+    async def _generar(self, clave: str, generar: Callable[[], Awaitable[str]]) -> str:
+        try:
+            texto = await generar()
+            self.guardar(clave, texto)
+            return texto
+        finally:
+            self._en_curso.pop(clave, None)
+
+    def obtener_o_generar_sync(self, clave: str, generar: Callable[[], str]) -> str:
+        """Variante síncrona (hilos) con el mismo single-flight."""
+        while True:
+            texto = self.obtener(clave)
+            if texto is not None:
+                self._contar("aciertos")
+                return texto
+            with self._lock:
+                existente = self._en_curso_sync.get(clave)
+                lider = existente is None
+                if existente is None:
+                    evento = self._en_curso_sync[clave] = threading.Event()
+                    self.estadisticas["fallos"] += 1
+                else:
+                    evento = existente
+                    self.estadisticas["coalescidas"] += 1
+            if not lider:
+                evento.wait()
+                texto = self.obtener(clave)
+                if texto is not None:
+                    return texto
+                continue  # el líder falló: reintentar como líder
+            try:
+                texto = generar()
+                self.guardar(clave, texto)
+                return texto
+            finally:
+                with self._lock:
+                    self._en_curso_sync.pop(clave, None)
+                evento.set()
+
+
+CACHE_INFORMES = CacheInformes(settings.REPORT_CACHE_TTL_S, settings.REPORT_CACHE_ITEMS)
+
+__all__ = ["CacheInformes", "CACHE_INFORMES", "clave_informe", "normalizar_prompt"]
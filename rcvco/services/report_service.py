@@ -1,6 +1,8 @@
 from __future__ import annotations
+import asyncio
 from rcvco.adapters.llm.base import SupportsGenerate
-from typing import Dict, Any
+from rcvco.services.report_cache import CACHE_INFORMES, CacheInformes, clave_informe
+from typing import Any, AsyncIterator, Dict
 
 KEY_LABS = {
     "CREATININA EN SUERO U OTROS": "creat",
@@ -28,6 +30,50 @@ def build_prompt(data: Dict[str, Any]) -> str:
         f"({fx}); labs: {resumen}; medicamentos={len(meds)}. Genera informe clínico breve con prioridades y recomendaciones resumidas."
     )
 
-def build_and_generate_report(client: SupportsGenerate, data: Dict[str, Any]) -> str:
+def build_and_generate_report(client: SupportsGenerate, data: Dict[str, Any], cache: CacheInformes | None = CACHE_INFORMES) -> str:
     prompt = build_prompt(data)
-    return client.generate_report(prompt)
+    if cache is None:
+        return client.generate_report(prompt)
+    return cache.obtener_o_generar_sync(clave_informe(client, prompt), lambda: client.generate_report(prompt))
+
+async def abuild_and_generate_report(client: SupportsGenerate, data: Dict[str, Any], cache: CacheInformes | None = CACHE_INFORMES) -> str:
+    """Como build_and_generate_report, sin bloquear el event loop.
+
+    Usa `agenerate_report` si el cliente lo tiene; si no, la versión síncrona
+    en un hilo. Prompts repetidos (o concurrentes) se sirven desde la caché.
+    """
+    prompt = build_prompt(data)
+    agenerate = getattr(client, "agenerate_report", None)
+
+    async def generar() -> str:
+        if agenerate is not None:
+            return await agenerate(prompt)
+        return await asyncio.to_thread(client.generate_report, prompt)
+
+    if cache is None:
+        return await generar()
+    return await cache.obtener_o_generar(clave_informe(client, prompt), generar)
+
+async def astream_report(client: Any, data: Dict[str, Any], cache: CacheInformes | None = CACHE_INFORMES) -> AsyncIterator[str]:
+    """Fragmentos del informe a medida que el proveedor los produce.
+
+    Un acierto de caché se emite como un único fragmento; un informe completo
+    generado en streaming se guarda en la caché al terminar (uno cortado, no).
+    """
+    prompt = build_prompt(data)
+    clave = clave_informe(client, prompt)
+    if cache is not None:
+        texto = cache.consultar(clave)
+        if texto is not None:
+            yield texto
+            return
+    astream = getattr(client, "astream_report", None)
+    if astream is None:
+        yield await asyncio.to_thread(client.generate_report, prompt)
+        return
+    partes: list[str] = []
+    async for fragmento in astream(prompt):
+        partes.append(fragmento)
+        yield fragmento
+    if cache is not None:
+        cache.guardar(clave, "".join(partes))
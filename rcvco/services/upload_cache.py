@@ -0,0 +1,188 @@
+"""Caché de resultados de parse_document direccionada por contenido.
+
+La clave es SHA-256(bytes del archivo) + modo de parseo (pdf/texto, que
+también depende de la extensión del nombre) + versión del parser, de modo que
+un re-upload del mismo PDF no vuelve a ejecutar pdftotext y un cambio de
+parser (o de catálogo de sinónimos) deja de encontrar las entradas antiguas
+sin borrarlas explícitamente. Dos niveles:
+
+- memoria: LRU de UPLOAD_CACHE_ITEMS resultados (acierto en microsegundos);
+- disco (solo si se configura UPLOAD_CACHE_DIR): un JSON por clave, acotado
+  a UPLOAD_CACHE_MAX_BYTES; al superarlo se eliminan los menos usados (mtime).
+"""
+from __future__ import annotations
+import copy
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional
+from rcvco.config import settings
+from rcvco.parsing.parser import modo_parseo, parse_document_archivo, version_parser
+
+Resultado = Dict[str, Any]
+
+
+def hash_contenido(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class CacheDocumentos:
+    def __init__(
+        self,
+        max_items: int = 256,
+        directorio: Optional[str | Path] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        version: Optional[str] = None,
+    ):
+        self.max_items = max_items
+        self.directorio = Path(directorio) if directorio else None
+        self.max_bytes = max_bytes
+        self.version = version or version_parser()
+        self._memoria: "OrderedDict[str, Resultado]" = OrderedDict()
+        self._bytes_disco: Optional[int] = None
+        self._lock = threading.Lock()
+        self.estadisticas = {"memoria": 0, "disco": 0, "fallos": 0}
+
+    def clave(self, sha256_hex: str, modo: str) -> str:
+        return f"{sha256_hex}-{modo}-{self.version}"
+
+    # --- nivel memoria ---
+
+    def _recordar(self, clave: str, resultado: Resultado) -> None:
+        self._memoria[clave] = resultado
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_items:
+            self._memoria.popitem(last=False)
+
+    # --- nivel disco ---
+
+    def _ruta(self, clave: str) -> Path:
+        assert self.directorio is not None
+        return self.directorio / f"{clave}.json"
+
+    def _leer_disco(self, clave: str) -> Optional[Resultado]:
+        if self.directorio is None:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            resultado = json.loads(ruta.read_text(encoding="utf-8"))
+            os.utime(ruta)  # marca de uso para la expulsión LRU
+        except (OSError, ValueError):
+            return None
+        return resultado
+
+    def _escribir_disco(self, clave: str, resultado: Resultado) -> None:
+        if self.directorio is None:
+            return
+        datos = json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+        if len(datos) > self.max_bytes:
+            return
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        actual = self._tamano_disco()
+        ruta = self._ruta(clave)
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(datos)
+        previo = ruta.stat().st_size if ruta.exists() else 0
+        os.replace(tmp, ruta)  # escritura atómica
+        self._bytes_disco = actual + len(datos) - previo
+        if self._bytes_disco > self.max_bytes:
+            self._expulsar_disco()
+
+    def _tamano_disco(self) -> int:
+        if self._bytes_disco is None:
+            self._bytes_disco = sum(p.stat().st_size for p in self.directorio.glob("*.json"))  # type: ignore[union-attr]
+        return self._bytes_disco
+
+    def _expulsar_disco(self) -> None:
+        entradas = []
+        for p in self.directorio.glob("*.json"):  # type: ignore[union-attr]
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entradas.append((st.st_mtime_ns, st.st_size, p))
+        entradas.sort()
+        total = sum(tam for _, tam, _ in entradas)
+        for _, tam, p in entradas:
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= tam
+            except OSError:
+                pass
+        self._bytes_disco = total
+
+    # --- API ---
+
+    def obtener(self, clave: str) -> Optional[Resultado]:
+        with self._lock:
+            resultado = self._memoria.get(clave)
+            if resultado is not None:
+                self._memoria.move_to_end(clave)
+                self.estadisticas["memoria"] += 1
+                return copy.deepcopy(resultado)
+            resultado = self._leer_disco(clave)
+            if resultado is not None:
+                self._recordar(clave, resultado)
+                self.estadisticas["disco"] += 1
+                return copy.deepcopy(resultado)
+            self.estadisticas["fallos"] += 1
+            return None
+
+    def guardar(self, clave: str, resultado: Resultado) -> None:
+        resultado = copy.deepcopy(resultado)
+        with self._lock:
+            self._recordar(clave, resultado)
+            try:
+                self._escribir_disco(clave, resultado)
+            except OSError:
+                pass  # el nivel disco es opcional: un fallo no rompe el upload
+
+    def obtener_o_calcular(self, sha256_hex: str, modo: str, calcular: Callable[[], Resultado]) -> Resultado:
+        """Resultado cacheado para el hash y modo, o `calcular()` y guardarlo.
+
+        Las excepciones de `calcular` se propagan y no se cachean.
+        """
+        clave = self.clave(sha256_hex, modo)
+        resultado = self.obtener(clave)
+        if resultado is None:
+            resultado = calcular()
+            self.guardar(clave, resultado)
+        return resultado
+
+    def limpiar_memoria(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+
+
+CACHE_UPLOADS = CacheDocumentos(
+    max_items=settings.UPLOAD_CACHE_ITEMS,
+    directorio=settings.UPLOAD_CACHE_DIR,
+    max_bytes=settings.UPLOAD_CACHE_MAX_BYTES,
+)
+
+
+def parse_archivo_cacheado(archivo: BinaryIO, filename: str, sha256_hex: str) -> Resultado:
+    """parse_document_archivo con caché por contenido (hash ya calculado al recibir).
+
+    `patient.pseudo_id` sigue al nombre subido, no al de la entrada cacheada.
+    """
+    resultado = CACHE_UPLOADS.obtener_o_calcular(
+        sha256_hex, modo_parseo(archivo, filename), lambda: parse_document_archivo(archivo, filename)
+    )
+    resultado["patient"] = {**resultado.get("patient", {}), "pseudo_id": Path(filename or "documento").stem}
+    return resultado
+
+
+def parse_document_cacheado(content: bytes, filename: str) -> Resultado:
+    return parse_archivo_cacheado(io.BytesIO(content), filename, hash_contenido(content))
+
+
+__all__ = ["CacheDocumentos", "CACHE_UPLOADS", "hash_contenido", "parse_archivo_cacheado", "parse_document_cacheado"]
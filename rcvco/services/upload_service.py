@@ -0,0 +1,168 @@
+"""Recepción de archivos subidos por bloques, sin cargarlos enteros en memoria.
+
+Los bloques se escriben en un SpooledTemporaryFile (pasa a disco al superar
+UPLOAD_SPOOL_BYTES) y se hashean (SHA-256) a medida que llegan, de modo que
+la clave de la caché de uploads está lista al terminar la recepción. Los
+cuerpos que superan UPLOAD_MAX_BYTES se rechazan en cuanto se detectan: por
+Content-Length antes de leer nada, o al sobrepasar el límite en el flujo.
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, MutableMapping, Optional, cast
+from rcvco.config import settings
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Receive = Callable[[], Awaitable[MutableMapping[str, Any]]]
+
+
+class ArchivoDemasiadoGrande(ValueError):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Archivo excede el máximo de {max_bytes // (1024 * 1024)} MB")
+        self.max_bytes = max_bytes
+
+
+# Umbral del SpooledTemporaryFile del parser multipart de Starlette
+try:
+    from starlette.formparsers import MultiPartParser
+
+    UMBRAL_SPOOL_MULTIPART: int = getattr(MultiPartParser, "spool_max_size", 1024 * 1024)
+except ImportError:  # pragma: no cover
+    UMBRAL_SPOOL_MULTIPART = 1024 * 1024
+
+
+@dataclass
+class ArchivoSubido:
+    archivo: BinaryIO
+    nombre: str
+    sha256: str
+    tamano: int
+    umbral_ram: int  # max_size del SpooledTemporaryFile que lo recibió
+
+    @property
+    def en_disco(self) -> bool:
+        # SpooledTemporaryFile vuelca a disco al superar max_size
+        return self.tamano > self.umbral_ram
+
+    def memoria(self) -> Dict[str, int]:
+        """Bytes de la petición retenidos en RAM y pico RSS de todo el proceso
+        (ru_maxrss: no baja nunca, no es el consumo de esta petición)."""
+        buffer_ram = 0 if self.en_disco else self.tamano
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+        return {"bytes": self.tamano, "buffer_ram": buffer_ram, "rss_pico_proceso_kb": rss_kb}
+
+    def cerrar(self) -> None:
+        self.archivo.close()
+
+
+def verificar_content_length(headers: MutableMapping[str, str] | Any, max_bytes: Optional[int] = None) -> None:
+    """Rechazo temprano por cabecera, antes de consumir el cuerpo."""
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        declarado = int(headers.get("content-length") or 0)
+    except ValueError:
+        return
+    if declarado > max_bytes:
+        raise ArchivoDemasiadoGrande(max_bytes)
+
+
+def receive_limitado(receive: Receive, max_bytes: Optional[int] = None) -> Receive:
+    """Envuelve `receive` de ASGI para cortar el cuerpo al superar `max_bytes`.
+
+    Sirve para formularios multipart: el parser de Starlette ya vuelca cada
+    archivo a un SpooledTemporaryFile, y este envoltorio aborta en cuanto el
+    cuerpo acumulado excede el máximo (aunque falte Content-Length).
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    total = 0
+
+    async def recibir() -> MutableMapping[str, Any]:
+        nonlocal total
+        mensaje = await receive()
+        if mensaje["type"] == "http.request":
+            total += len(mensaje.get("body", b""))
+            if total > max_bytes:
+                raise ArchivoDemasiadoGrande(max_bytes)
+        return mensaje
+
+    return recibir
+
+
+async def recibir_stream(
+    chunks: AsyncIterator[bytes],
+    nombre: str,
+    max_bytes: Optional[int] = None,
+) -> ArchivoSubido:
+    """Consume un flujo de bytes hacia un archivo temporal, hasheando al vuelo."""
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_BYTES, mode="w+b")
+    sha = hashlib.sha256()
+    tamano = 0
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            tamano += len(chunk)
+            if tamano > max_bytes:
+                raise ArchivoDemasiadoGrande(max_bytes)
+            sha.update(chunk)
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return ArchivoSubido(cast(BinaryIO, spool), nombre, sha.hexdigest(), tamano, settings.UPLOAD_SPOOL_BYTES)
+
+
+async def recibir_upload(upload: Any, max_bytes: Optional[int] = None) -> ArchivoSubido:
+    """Adopta un UploadFile ya volcado por el parser multipart.
+
+    Se recorre por bloques para hashear y medir sin copiarlo: el archivo
+    temporal de Starlette pasa a ser el del ArchivoSubido.
+    """
+    max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    sha = hashlib.sha256()
+    tamano = 0
+    await upload.seek(0)
+    while chunk := await upload.read(settings.UPLOAD_CHUNK_BYTES):
+        tamano += len(chunk)
+        if tamano > max_bytes:
+            raise ArchivoDemasiadoGrande(max_bytes)
+        sha.update(chunk)
+    await upload.seek(0)
+    return ArchivoSubido(upload.file, upload.filename or "documento", sha.hexdigest(), tamano, UMBRAL_SPOOL_MULTIPART)
+
+
+async def iter_upload(upload: Any) -> AsyncIterator[bytes]:
+    """Bloques de cualquier objeto con `async read(n)` (p.ej. rx.UploadFile)."""
+    while chunk := await upload.read(settings.UPLOAD_CHUNK_BYTES):
+        yield chunk
+
+
+def registrar_memoria(archivo: ArchivoSubido) -> Dict[str, int]:
+    uso = archivo.memoria()
+    logger.info(
+        "upload %s: %d bytes, buffer RAM %d bytes (RSS pico del proceso %d KB)",
+        archivo.nombre, uso["bytes"], uso["buffer_ram"], uso["rss_pico_proceso_kb"],
+    )
+    return uso
+
+
+__all__ = [
+    "ArchivoDemasiadoGrande",
+    "ArchivoSubido",
+    "verificar_content_length",
+    "receive_limitado",
+    "recibir_stream",
+    "recibir_upload",
+    "iter_upload",
+    "registrar_memoria",
+]
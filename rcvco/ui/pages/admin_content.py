@@ -1,6 +1,6 @@
 from __future__ import annotations
 import reflex as rx
-import httpx
+from rcvco.services.facade import get_servicios
 
 class ContentState(rx.State):
     about_md: str = ""
@@ -13,14 +13,9 @@ class ContentState(rx.State):
         self.cargando = True
         self.mensaje = ""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                    r = await client.get("/api/content")
-            if r.status_code == 200:
-                data = r.json()
-                self.about_md = data.get("about_md", "")
-                self.home_notice = data.get("home_notice", "")
-            else:
-                self.mensaje = f"Error HTTP {r.status_code} al cargar"
+            data = await get_servicios().cargar_contenido()
+            self.about_md = data.get("about_md", "")
+            self.home_notice = data.get("home_notice", "")
         except Exception as e:  # noqa: BLE001
             self.mensaje = f"Error: {e}"[:160]
         finally:
@@ -31,12 +26,8 @@ class ContentState(rx.State):
         self.mensaje = ""
         try:
             payload = {"about_md": self.about_md, "home_notice": self.home_notice}
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                    r = await client.post("/api/content", json=payload)
-            if r.status_code == 200:
-                self.mensaje = "Guardado ✅"
-            else:
-                self.mensaje = f"Error HTTP {r.status_code} al guardar"
+            await get_servicios().guardar_contenido(payload)
+            self.mensaje = "Guardado ✅"
         except Exception as e:  # noqa: BLE001
             self.mensaje = f"Error: {e}"[:160]
         finally:
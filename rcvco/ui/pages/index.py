@@ -12,11 +12,19 @@ Funcionalidades:
 """
 from __future__ import annotations
 
+import asyncio
+import json
+import time
 import reflex as rx
 from datetime import datetime
+from typing import Dict, List
 from zoneinfo import ZoneInfo
 
+from rcvco.adapters.session_history import get_historial
+from rcvco.config import settings
 from rcvco.ui.state.form_state import AppState
+from rcvco.services.chart_data import estilos_series, parche_series, series_tendencias
+from rcvco.services.facade import get_servicios
 from rcvco.ui.components.forms import patient_form, fragilidad_form, labs_form
 from rcvco.ui.components.risk_panel import risk_panel
 from rcvco.ui.components.meds import meds_panel, med_modal
@@ -28,6 +36,9 @@ from rcvco.ui.components.modals import (
 )
 
 TZ_BOGOTA = ZoneInfo("America/Bogota")
+# Reenvío de tendencias mientras el navegador carga Chart.js
+TENDENCIAS_MAX_REINTENTOS = 20
+TENDENCIAS_ESPERA_S = 0.25
 
 
 def index_page() -> rx.Component:
@@ -225,31 +236,50 @@ __all__ = ["index", "index_page"]
     def has_chart_labs(self) -> bool:  # type: ignore[override]
         return any(l.get("id") in {"ldl", "hba1c"} for l in self.labs_registrados)
 
-    @rx.var
-    def chart_script(self) -> str:  # type: ignore[override]
-        # Genera script Chart.js simple a partir de labs
-        labs = [l for l in self.labs_registrados if l.get("id") in {"ldl", "hba1c"}]
-        if not labs:
-            return ""
-        import json
-        datasets = []
-        for metric, label, color in [("ldl", "LDL", "#364FC7"), ("hba1c", "HbA1c", "#f59e0b")]:
-            pts = [
-                {"x": l.get("fecha") or "", "y": l.get("valor")}
-                for l in labs if l.get("id") == metric
-            ]
-            if pts:
-                datasets.append({"label": label, "data": pts, "borderColor": color, "backgroundColor": color + "33", "fill": False})
-        return (
-            "<script src=\"https://cdn.jsdelivr.net/npm/chart.js\"></script><script>"+
-            "(function(){const el=document.getElementById('chart-trends');if(!el)return;"+
-            "if(window.__trendChart__){window.__trendChart__.destroy();}"+
-            f"const data={{datasets:{json.dumps(datasets)}}};"+
-            "window.__trendChart__=new Chart(el.getContext('2d'),{type:'line',data:data,options:{responsive:true,parsing:false,scales:{x:{display:false}}}});})();"+
-            "</script>"
+    # --- Tendencias: feed incremental al Chart.js del cliente ---
+    # Series ya enviadas al navegador (backend-only) para calcular el parche
+    _series_enviadas: Dict[str, List[dict]] = {}
+    # Reenvíos completos seguidos sin confirmar (Chart.js aún cargando)
+    _reintentos_tendencias: int = 0
+
+    def _parche_tendencias(self, reiniciar: bool = False):
+        """Evento con solo los puntos nuevos o cambiados (None si no hay cambios).
+
+        El cliente confirma con `confirmar_tendencias`; si no pudo aplicarlo se
+        reenvían las series completas.
+        """
+        nuevas = series_tendencias(self.labs_registrados, settings.CHART_MAX_PUNTOS)
+        parche = parche_series({} if reiniciar else self._series_enviadas, nuevas)
+        self._series_enviadas = nuevas
+        if not parche and not reiniciar:
+            return None
+        estilos = json.dumps(estilos_series()) if reiniciar else "null"
+        return rx.call_script(
+            f"!!(window.rcvTrends&&window.rcvTrends.aplicar({json.dumps(parche)},{estilos},{json.dumps(reiniciar)}))",
+            callback=IndexState.confirmar_tendencias,
         )
 
-    # Historial pacientes (solo nombres + snapshot reducido)
+    def sincronizar_tendencias(self):
+        """on_mount del canvas: envía las series completas."""
+        self._reintentos_tendencias = 0
+        return self._parche_tendencias(reiniciar=True)
+
+    async def confirmar_tendencias(self, aplicado: bool):
+        """Respuesta de rcvTrends.aplicar: si no se aplicó, el navegador no tiene
+        lo que creemos enviado y se reenvía todo (con espera mientras carga
+        Chart.js, como mucho TENDENCIAS_MAX_REINTENTOS veces)."""
+        if aplicado:
+            self._reintentos_tendencias = 0
+            return None
+        self._series_enviadas = {}
+        if self._reintentos_tendencias >= TENDENCIAS_MAX_REINTENTOS:
+            return None
+        self._reintentos_tendencias += 1
+        await asyncio.sleep(TENDENCIAS_ESPERA_S)
+        return self._parche_tendencias(reiniciar=True)
+
+    # Historial pacientes: vive en el servidor (get_historial, por sesión);
+    # aquí solo la vista del modal, cargada al abrirlo y vaciada al cerrarlo
     historial: List[dict] = []
 
     # Modales / UI flags
@@ -284,8 +314,6 @@ __all__ = ["index", "index_page"]
     parsing: bool = False
     parse_error: str = ""
 
-    # Estado charts (se fuerza un contador para regenerar script)
-    charts_version: int = 0
     # Subida archivo
     upload_error: str = ""
     upload_name: str = ""
@@ -293,17 +321,7 @@ __all__ = ["index", "index_page"]
     async def subir_archivo(self, file: rx.UploadFile):  # type: ignore[override]
         self.upload_error = ""
         try:
-            import httpx, json
-            content = await file.read()
-            # Enviar como multipart
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                resp = await client.post(
-                    "/api/upload",
-                    files={"file": (file.filename, content, file.content_type or "application/octet-stream")},
-                )
-            if resp.status_code != 200:
-                raise RuntimeError(f"HTTP {resp.status_code}")
-            data = resp.json()
+            data = await get_servicios().subir_archivo(file)
             self.upload_name = file.filename
             # Agregar labs si vienen
             for l in data.get("labs", []):
@@ -317,9 +335,10 @@ __all__ = ["index", "index_page"]
                     }
                     if nombre in mapping:
                         lab_id, label = mapping[nombre]
-                        self.upsert_lab(lab_id, label, str(valor), "")
+                        self._upsert_lab(lab_id, label, str(valor), "")
         except Exception as e:  # noqa: BLE001
             self.upload_error = str(e)[:140]
+        yield self._parche_tendencias()
 
     def add_medicamento(self):
         self.medicamentos.append(("", "", ""))
@@ -410,6 +429,10 @@ __all__ = ["index", "index_page"]
 
     # Labs helper
     def upsert_lab(self, lab_id: str, label: str, valor: str, fecha: str):
+        self._upsert_lab(lab_id, label, valor, fecha)
+        return self._parche_tendencias()
+
+    def _upsert_lab(self, lab_id: str, label: str, valor: str, fecha: str):
         for lab in self.labs_registrados:
             if lab.get("id") == lab_id:
                 if valor:
@@ -452,6 +475,9 @@ __all__ = ["index", "index_page"]
         self.fragil = cnt >= 3
 
     # --- Historial ---
+    def _sesion(self) -> str:
+        return self.router.session.client_token
+
     def guardar_en_historial(self):
         snap = {
             "nombre": self.nombre or "PACIENTE",
@@ -460,31 +486,31 @@ __all__ = ["index", "index_page"]
             "tfg": self.tfg_display,
             "fecha_creat": self.creatinina_date,
         }
-        self.historial = [h for h in self.historial if h["nombre"] != snap["nombre"]]
-        self.historial.insert(0, snap)
+        get_historial().guardar(self._sesion(), snap)
         self.alerta_titulo = "Guardado"
         self.alerta_mensaje = f"Paciente {snap['nombre']} almacenado en historial."
         self.modal_alerta = True
 
-    def cargar_historial(self, idx: int):
+    def cargar_historial(self, clave: str):
         try:
-            if 0 <= idx < len(self.historial):
-                h = self.historial[idx]
-                logger.info(f"Cargando historial idx={idx} nombre={h.get('nombre')}")
+            h = get_historial().obtener(self._sesion(), clave)
+            if h is not None:
+                logger.info(f"Cargando historial clave={clave} nombre={h.get('nombre')}")
                 self.nombre = h.get("nombre", "")
                 self.edad = h.get("edad", "")
                 self.recompute()
-                self.modal_historial = False
+                self.cerrar_historial_modal()
             else:
-                logger.warning(f"cargar_historial índice fuera de rango idx={idx} total={len(self.historial)}")
+                logger.warning(f"cargar_historial clave inexistente={clave}")
         except Exception as e:  # noqa: BLE001
-            logger.exception(f"Error al cargar historial idx={idx}: {e}")
+            logger.exception(f"Error al cargar historial clave={clave}: {e}")
             self.alerta_titulo = "Error"
             self.alerta_mensaje = "No se pudo cargar historial." 
             self.modal_alerta = True
 
     def cerrar_historial_modal(self):
         self.modal_historial = False
+        self.historial = []
 
     # --- Alertas ---
     def cerrar_alerta(self):
@@ -501,6 +527,7 @@ __all__ = ["index", "index_page"]
         self.dark_mode = not self.dark_mode
 
     def abrir_historial_modal(self):
+        self.historial = get_historial().listar(self._sesion())
         self.modal_historial = True
 
     def abrir_fragilidad_modal(self):
@@ -531,8 +558,6 @@ __all__ = ["index", "index_page"]
         self._calc_tfg()
         self._calc_riesgo()
         # Ya no se llama a _calc_fragilidad aquí para evitar recursión infinita
-        # Actualizar versión charts para re-render
-        self.charts_version += 1
 
     # --- Parseo texto laboratorio ---
     async def parsear_texto(self):  # type: ignore[override]
@@ -542,31 +567,7 @@ __all__ = ["index", "index_page"]
         self.parsing = True
         self.parse_error = ""
         try:
-            try:
-                import httpx
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                        resp = await client.post("/api/parse-text", json={"raw": self.lab_text_raw}, headers={"Content-Type": "application/json"})
-                if resp.status_code != 200:
-                    raise RuntimeError(f"HTTP {resp.status_code}")
-                data = resp.json()
-            except Exception:
-                # Fallback parser local (regex simple)
-                import re
-                txt = self.lab_text_raw.lower()
-                pats = {
-                    "CREATININA EN SUERO U OTROS": r"creatinina[^0-9]*([0-9]+\.?[0-9]*)",
-                    "HEMOGLOBINA GLICOSILADA (HBA1C)": r"hba1c[^0-9]*([0-9]+\.?[0-9]*)",
-                    "COLESTEROL LDL": r"ldl[^0-9]*([0-9]+\.?[0-9]*)",
-                }
-                labs_found = []
-                for nombre, pat in pats.items():
-                    m = re.search(pat, txt)
-                    if m:
-                        try:
-                            labs_found.append({"nombre": nombre, "valor": float(m.group(1))})
-                        except Exception:
-                            pass
-                data = {"labs": labs_found}
+            data = await get_servicios().parse_text(self.lab_text_raw)
             # Integrar labs en labs_registrados
             for l in data.get("labs", []):
                 nombre = l.get("nombre")
@@ -580,12 +581,13 @@ __all__ = ["index", "index_page"]
                     }
                     if nombre in mapping:
                         lab_id, label = mapping[nombre]
-                        self.upsert_lab(lab_id, label, str(valor), "")
+                        self._upsert_lab(lab_id, label, str(valor), "")
             self.lab_text_raw = ""
         except Exception as e:  # noqa: BLE001
             self.parse_error = f"Error parseo: {e}"[:140]
         finally:
             self.parsing = False
+        yield self._parche_tendencias()
 
     # Evento principal: generar informe (usa servicio LLM si configurado)
     async def generar_informe(self):  # type: ignore[override]
@@ -610,27 +612,30 @@ __all__ = ["index", "index_page"]
             ],
         }
         datos["labs"] = [l for l in datos["labs"] if l["valor"] is not None]
+        import html
+        encabezado = "<h2>Informe Clínico</h2>"
+        pie = f"<p>Riesgo estimado: <strong>{self.riesgo_nivel}</strong></p>"
+        texto = ""
         try:
-            import httpx, html
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                resp = await client.post("/api/preview-report", json=datos)
-            if resp.status_code == 200:
-                prompt = resp.json().get("prompt", "")
-                self.informe_html = (
-                    f"<h2>Informe Clínico (Borrador)</h2>"
-                    f"<p><strong>Prompt Generado:</strong></p><pre style='white-space:pre-wrap;background:#f8fafc;padding:0.75rem;border-radius:0.5rem;'>{html.escape(prompt)}</pre>"
-                    f"<p>Riesgo estimado: <strong>{self.riesgo_nivel}</strong></p>"
-                )
-            else:
-                raise RuntimeError(f"preview-report HTTP {resp.status_code}")
+            # Render incremental: se empuja el estado como mucho cada 50 ms
+            ultimo = 0.0
+            async for fragmento in get_servicios().stream_report(datos):
+                texto += fragmento
+                ahora = time.monotonic()
+                if ahora - ultimo >= 0.05:
+                    ultimo = ahora
+                    self.informe_html = (
+                        f"{encabezado}<div style='white-space:pre-wrap;'>{html.escape(texto)}</div>{pie}"
+                    )
+                    yield
+            self.informe_html = f"{encabezado}<div style='white-space:pre-wrap;'>{html.escape(texto)}</div>{pie}"
         except Exception as e:  # noqa: BLE001
-            logger.exception(f"Fallo generar_informe remoto: {e}; usando prompt local")
-            import html
+            logger.exception(f"Fallo generar_informe: {e}; usando prompt local")
             prompt = build_prompt(datos)
             self.informe_html = (
                 f"<h2>Informe Clínico (Borrador Local)</h2>"
                 f"<pre style='white-space:pre-wrap;background:#f8fafc;padding:0.75rem;border-radius:0.5rem;'>{html.escape(prompt)}</pre>"
-                f"<p>Riesgo estimado: <strong>{self.riesgo_nivel}</strong></p>"
+                f"{pie}"
             )
         finally:
             self.generando = False
@@ -777,9 +782,9 @@ def _historial_modal():
                 rx.vstack(
                     rx.foreach(
                         IndexState.historial,
-                        lambda h, i: rx.hstack(
+                        lambda h: rx.hstack(
                             rx.text(f"{h['nombre']} (edad {h['edad']}) - {h['riesgo']}", class_name="text-sm"),
-                            rx.button("Cargar", size="1", on_click=lambda _=None, i=i: IndexState.cargar_historial(i)),
+                            rx.button("Cargar", size="1", on_click=IndexState.cargar_historial(h["clave"])),
                             spacing="2",
                             class_name="justify-between w-full bg-gray-50 p-2 rounded",
                         ),
@@ -912,7 +917,7 @@ def _parse_text_section():
 def _upload_section():
     return rx.box(
         rx.heading("Subir Archivo (PDF/TXT)", size="5", class_name="mb-2"),
-        rx.text("Placeholder: se procesa en backend parse_document"),
+        rx.text("Se procesa en backend (pdftotext + catálogo de labs)"),
         rx.upload(
             rx.vstack(
                 rx.text("Arrastra o haz click para seleccionar"),
@@ -935,8 +940,10 @@ def _charts_section():
         IndexState.has_chart_labs,
         rx.box(
             rx.heading("Tendencias", size="5", class_name="mb-2"),
-            rx.html('<canvas id="chart-trends" height="160"></canvas>'),
-            rx.html(IndexState.chart_script),
+            # Chart.js local (una vez por página) + glue que aplica los parches
+            rx.script(src="/js/vendor/chart.umd.js"),
+            rx.script(src="/js/charts.js"),
+            rx.el.canvas(id="chart-trends", height="160", on_mount=IndexState.sincronizar_tendencias),
             class_name="p-5 rounded-xl mb-6 bg-white shadow-sm",
         ),
         rx.box(),
@@ -9,7 +9,8 @@ Este módulo define la clase AppState que mantendrá:
 Iteración PR1: solo placeholders y estructura; lógica se llenará en PRs posteriores.
 """
 from __future__ import annotations
-from typing import List, Optional, Dict
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
 import reflex as rx
 
 from rcvco.ui.types import Programa
@@ -25,6 +26,46 @@ from rcvco.ui.catalogs import (
     POTENCIADORES_RIESGO,
     LABS_MAP,
 )
+from rcvco.services.estado_sesion import (
+    LabCompacto,
+    MedCompacto,
+    lab_compacto,
+    med_compacto,
+    medir_estado,
+)
+
+logger = logging.getLogger(__name__)
+
+# Grafo de dependencias de los recálculos: campo (entrada o derivado) -> pasos
+# de recálculo que lo leen. Los labs entran como "lab:<NOMBRE>".
+LAB_CREATININA = "CREATININA EN SUERO U OTROS"
+LAB_LDL = "COLESTEROL LDL"
+
+DEPENDENCIAS: Dict[str, FrozenSet[str]] = {
+    "paciente_edad": frozenset({"tfg_cg", "riesgo", "metas"}),
+    "paciente_sexo": frozenset({"tfg_cg", "riesgo"}),
+    "paciente_peso_kg": frozenset({"imc", "tfg_cg"}),
+    "paciente_talla_m": frozenset({"imc"}),
+    "dx_dm": frozenset({"riesgo", "metas"}),
+    "dx_hta": frozenset({"riesgo", "metas"}),
+    "dx_erc": frozenset({"metas"}),
+    "dx_cardiovascular": frozenset({"riesgo", "metas"}),
+    "pa_sistolica": frozenset({"riesgo"}),
+    f"lab:{LAB_CREATININA}": frozenset({"tfg_cg"}),
+    f"lab:{LAB_LDL}": frozenset({"riesgo"}),
+    # derivados que alimentan otros pasos
+    "tfg_cg": frozenset({"riesgo", "metas"}),
+}
+# Orden topológico de los pasos de recálculo
+ORDEN_RECALCULO = ("imc", "tfg_cg", "riesgo", "metas")
+# Campos que escribe cada paso (los que cambian propagan vía DEPENDENCIAS)
+SALIDAS_PASO: Dict[str, Tuple[str, ...]] = {
+    "imc": ("_imc",),
+    "tfg_cg": ("tfg_cg",),
+    "riesgo": ("riesgo_cv_categoria", "riesgo_justificacion"),
+    "metas": ("meta_pa_sys", "meta_pa_dia", "meta_ldl", "meta_hba1c"),
+}
+
 
 class LabItem(rx.Base):
     nombre: str
@@ -51,15 +92,16 @@ class AppState(rx.State):
     dx_erc: bool = False  # Enfermedad renal
     dx_cardiovascular: bool = False  # ECV establecida
 
-    # Laboratorios y medicamentos
-    labs: List[LabItem] = []
-    medicamentos: List[MedicamentoItem] = []
+    # Laboratorios y medicamentos: solo en backend y en forma compacta; el
+    # cliente recibe las vistas `labs` / `medicamentos` (computed vars)
+    _labs: List[LabCompacto] = []
+    _medicamentos: List[MedCompacto] = []
 
     # Edición medicamento
     med_edit_nombre: str = ""
     med_edit_dosis: str = ""
     med_edit_frecuencia: str = "" 
-    med_edit_idx: int | None = None
+    _med_edit_idx: int | None = None
 
     # Fragilidad Fried
     perdida_peso: bool = False
@@ -68,11 +110,16 @@ class AppState(rx.State):
     lentitud: bool = False
     inactividad: bool = False
 
+    # Índice de labs por nombre (backend-only, no viaja al cliente) y si los
+    # datos obligatorios estaban completos en el último recálculo
+    _valores_lab: Dict[str, float | None] = {}
+    _datos_completos: bool = False
+
     # Cálculos derivados
     riesgo_cv_categoria: str = ""  # Muy alto/Alto/Moderado/Bajo
     riesgo_justificacion: str = ""  # Explicación sin mencionar "pasos"
     tfg_cg: float | None = None  # TFG Cockcroft-Gault
-    imc: float | None = None
+    _imc: float | None = None  # no se muestra; solo backend
     es_fragil: bool = False  # ≥3 criterios Fried
 
     # Metas terapéuticas
@@ -88,19 +135,19 @@ class AppState(rx.State):
     # Próximos labs (fechas ISO)
     proximo_labs: Dict[str, str] = {}  # nombre_lab -> YYYY-MM-DD
 
-    # Factores y potenciadores de riesgo
-    factores_riesgo: List[str] = []
-    potenciadores: List[str] = []
+    # Factores y potenciadores de riesgo (entradas del cálculo, no se muestran)
+    _factores_riesgo: List[str] = []
+    _potenciadores: List[str] = []
 
     # Estado edición lab
     lab_edit_nombre: str = ""
     lab_edit_valor: float | None = None
     lab_edit_fecha: str = ""
-    lab_edit_idx: int | None = None
+    _lab_edit_idx: int | None = None
 
-    # Estado informe
+    # Estado informe (el HTML se muestra en el modal y se vacía al cerrarlo)
     informe_html: str = ""
-    informe_pdf_url: str = ""
+    _informe_pdf_url: str = ""
 
     # Flags UI modales
     modal_labs_abierto: bool = False
@@ -114,6 +161,23 @@ class AppState(rx.State):
     generando_informe: bool = False
     dark_mode: bool = False  # soporte tema oscuro
 
+    # Vistas para el cliente
+    @rx.var
+    def labs(self) -> List[LabItem]:
+        """Filas de la tabla de laboratorios."""
+        return [
+            LabItem(nombre=n, valor=v, unidad=LABS_MAP.get(n), fecha=f)
+            for n, v, f in self._labs
+        ]
+
+    @rx.var
+    def medicamentos(self) -> List[MedicamentoItem]:
+        """Filas de la tabla de medicamentos."""
+        return [
+            MedicamentoItem(nombre=n, dosis=d or None, frecuencia=fr or None)
+            for n, d, fr in self._medicamentos
+        ]
+
     # Computed flags
     @rx.var
     def pa_control_ok(self) -> bool:
@@ -128,7 +192,7 @@ class AppState(rx.State):
     @rx.var
     def ldl_control_ok(self) -> bool:
         """Verifica si LDL está en meta."""
-        ldl = next((lab.valor for lab in self.labs if lab.nombre == "COLESTEROL LDL"), None)
+        ldl = next((v for n, v, _ in self._labs if n == LAB_LDL), None)
         return bool(ldl and ldl <= self.meta_ldl)
 
     # Setters básicos
@@ -137,35 +201,39 @@ class AppState(rx.State):
 
     def set_paciente_edad(self, v: int):
         self.paciente_edad = v
-        self._recalc_all()
+        self._recalcular("paciente_edad")
 
     def set_paciente_sexo(self, v: str):
         self.paciente_sexo = v
-        self._recalc_all()
+        self._recalcular("paciente_sexo")
 
     def set_paciente_peso_kg(self, v: float):
         self.paciente_peso_kg = v
-        self._recalc_all()
+        self._recalcular("paciente_peso_kg")
 
     def set_paciente_talla_m(self, v: float):
         self.paciente_talla_m = v
-        self._recalc_all()
+        self._recalcular("paciente_talla_m")
 
     def set_dx_dm(self, v: bool):
         self.dx_dm = v
-        self._recalc_all()
+        self._recalcular("dx_dm")
 
     def set_dx_hta(self, v: bool):
         self.dx_hta = v
-        self._recalc_all()
+        self._recalcular("dx_hta")
 
     def set_dx_erc(self, v: bool):
         self.dx_erc = v
-        self._recalc_all()
+        self._recalcular("dx_erc")
 
     def set_dx_cardiovascular(self, v: bool):
         self.dx_cardiovascular = v
-        self._recalc_all()
+        self._recalcular("dx_cardiovascular")
+
+    def set_pa_sistolica(self, v: str):
+        self.pa_sistolica = v
+        self._recalcular("pa_sistolica")
 
     # Setters fragilidad
     def set_perdida_peso(self, v: bool):
@@ -191,40 +259,37 @@ class AppState(rx.State):
     # Gestión medicamentos
     def edit_medicamento(self, item: MedicamentoItem):
         """Abre modal edición medicamento."""
-        self.med_edit_nombre = item.nombre
-        self.med_edit_dosis = item.dosis or ""
-        self.med_edit_frecuencia = item.frecuencia or ""
-        self.med_edit_idx = next(
-            (i for i, m in enumerate(self.medicamentos) if m == item),
+        compacto = med_compacto(item)
+        self.med_edit_nombre, self.med_edit_dosis, self.med_edit_frecuencia = compacto
+        self._med_edit_idx = next(
+            (i for i, m in enumerate(self._medicamentos) if m == compacto),
             None
         )
         self.modal_meds_abierto = True
 
     def remove_medicamento(self, item: MedicamentoItem):
         """Elimina medicamento de la lista."""
-        self.medicamentos = [m for m in self.medicamentos if m != item]
+        compacto = med_compacto(item)
+        self._medicamentos = [m for m in self._medicamentos if m != compacto]
 
     def save_medicamento(self):
         """Guarda cambios medicamento."""
         if not self.med_edit_nombre:
             return
         
-        med = MedicamentoItem(
-            nombre=self.med_edit_nombre,
-            dosis=self.med_edit_dosis,
-            frecuencia=self.med_edit_frecuencia
-        )
+        med = (self.med_edit_nombre, self.med_edit_dosis, self.med_edit_frecuencia)
 
-        if self.med_edit_idx is not None:
-            self.medicamentos[self.med_edit_idx] = med
+        if self._med_edit_idx is not None:
+            self._medicamentos[self._med_edit_idx] = med
         else:
-            self.medicamentos.append(med)
+            self._medicamentos.append(med)
 
         self.med_edit_nombre = ""
         self.med_edit_dosis = ""
         self.med_edit_frecuencia = ""
-        self.med_edit_idx = None
+        self._med_edit_idx = None
         self.modal_meds_abierto = False
+        self._medir_estado()
         
     # Handlers laboratorios
     def set_lab_edit_nombre(self, v: str):
@@ -241,11 +306,11 @@ class AppState(rx.State):
 
     def edit_lab(self, item: LabItem):
         """Abre modal edición lab."""
-        self.lab_edit_nombre = item.nombre
-        self.lab_edit_valor = item.valor
-        self.lab_edit_fecha = item.fecha or ""
-        self.lab_edit_idx = next(
-            (i for i, lab in enumerate(self.labs) if lab == item),
+        compacto = lab_compacto(item)
+        self.lab_edit_nombre, self.lab_edit_valor, fecha = compacto
+        self.lab_edit_fecha = fecha or ""
+        self._lab_edit_idx = next(
+            (i for i, lab in enumerate(self._labs) if lab == compacto),
             None
         )
         self.modal_labs_abierto = True
@@ -259,24 +324,20 @@ class AppState(rx.State):
         ]):
             return
 
-        lab = LabItem(
-            nombre=self.lab_edit_nombre,
-            valor=self.lab_edit_valor,
-            unidad=LABS_MAP[self.lab_edit_nombre],
-            fecha=self.lab_edit_fecha,
-        )
+        lab = (self.lab_edit_nombre, self.lab_edit_valor, self.lab_edit_fecha)
 
-        if self.lab_edit_idx is not None:
-            self.labs[self.lab_edit_idx] = lab
+        if self._lab_edit_idx is not None:
+            self._labs[self._lab_edit_idx] = lab
         else:
-            self.labs.append(lab)
+            self._labs.append(lab)
 
         self.lab_edit_nombre = ""
         self.lab_edit_valor = None
         self.lab_edit_fecha = ""
-        self.lab_edit_idx = None
+        self._lab_edit_idx = None
         self.modal_labs_abierto = False
-        self._recalc_all()
+        self._recalcular(*self._reindexar_labs())
+        self._medir_estado()
 
     # Toggle modales
     def toggle_modal_labs(self):
@@ -286,7 +347,7 @@ class AppState(rx.State):
             self.lab_edit_nombre = ""
             self.lab_edit_valor = None
             self.lab_edit_fecha = ""
-            self.lab_edit_idx = None
+            self._lab_edit_idx = None
 
     def toggle_modal_fragilidad(self):
         """Toggle modal fragilidad."""
@@ -301,61 +362,84 @@ class AppState(rx.State):
         self.modal_informe_abierto = not self.modal_informe_abierto
         if not self.modal_informe_abierto:
             self.informe_html = ""
-            self.informe_pdf_url = ""
-        
-    # Laboratorios
-    def edit_lab(self, item: LabItem):
-        """Abre modal edición laboratorio."""
-        pass # TODO: Implementar en PR2
+            self._informe_pdf_url = ""
         
+    def _medir_estado(self):
+        """Registra el tamaño serializado de la sesión (solo con log DEBUG)."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Estado %s: %s", self.router.session.client_token, medir_estado(self))
+
     # Recálculos internos
-    def _recalc_all(self):
-        """Recalcula todos los valores derivados."""
+    def _reindexar_labs(self) -> List[str]:
+        """Reconstruye el índice de labs y devuelve los campos "lab:" que cambiaron."""
+        nuevo: Dict[str, float | None] = {}
+        for nombre, valor, _ in self._labs:
+            nuevo.setdefault(nombre, valor)  # primera aparición, como el next() original
+        previo = self._valores_lab
+        cambios = [
+            f"lab:{nombre}" for nombre in previo.keys() | nuevo.keys()
+            if previo.get(nombre) != nuevo.get(nombre)
+        ]
+        self._valores_lab = nuevo
+        return cambios
+
+    def _asignar(self, campo: str, valor: Any) -> bool:
+        """Asigna solo si cambia (cada asignación genera delta al cliente)."""
+        if getattr(self, campo) == valor:
+            return False
+        setattr(self, campo, valor)
+        return True
+
+    def _recalcular(self, *cambios: str):
+        """Recalcula solo los pasos afectados por `cambios`.
+
+        Recorre ORDEN_RECALCULO; un paso se ejecuta si alguna de sus entradas
+        cambió, y sus salidas solo propagan si su valor cambió de verdad.
+        Sin datos obligatorios no se recalcula nada; al completarse, todo.
+        """
         if not all([
             self.paciente_edad,
             self.paciente_peso_kg,
             self.paciente_talla_m,
             self.paciente_sexo
         ]):
+            self._datos_completos = False
             return
-
-        # 1. IMC
-        self.imc = calc_imc(
+        if not self._datos_completos:
+            self._datos_completos = True
+            sucios: Set[str] = set(ORDEN_RECALCULO)
+        else:
+            sucios = _pasos_afectados(cambios)
+        for paso in ORDEN_RECALCULO:
+            if paso not in sucios:
+                continue
+            cambiados = getattr(self, f"_paso_{paso}")()
+            if cambiados:
+                sucios |= _pasos_afectados(SALIDAS_PASO[paso])
+
+    def _paso_imc(self) -> bool:
+        return self._asignar("_imc", calc_imc(
             peso_kg=self.paciente_peso_kg,
             talla_m=self.paciente_talla_m,
-        )
+        ))
 
-        # 2. TFG (requiere creatinina)
-        creatinina = next(
-            (lab.valor for lab in self.labs 
-             if lab.nombre == "CREATININA EN SUERO U OTROS"),
-            None
-        )
-        if creatinina:
-            self.tfg_cg = calc_tfg_cg(
-                edad=self.paciente_edad,
-                peso_kg=self.paciente_peso_kg,
-                creatinina_mg_dl=creatinina,
-                sexo=self.paciente_sexo,
-            )
-            
-            # 3. Estadio para metas
-            estadio = get_estadio_erc(self.tfg_cg)
-        else:
-            self.tfg_cg = None
-            estadio = None
+    def _paso_tfg_cg(self) -> bool:
+        # TFG (requiere creatinina)
+        creatinina = self._valores_lab.get(LAB_CREATININA)
+        tfg = calc_tfg_cg(
+            edad=self.paciente_edad,
+            peso_kg=self.paciente_peso_kg,
+            creatinina_mg_dl=creatinina,
+            sexo=self.paciente_sexo,
+        ) if creatinina else None
+        return self._asignar("tfg_cg", tfg)
 
-        # 4. Riesgo CV
-        ldl = next(
-            (lab.valor for lab in self.labs 
-             if lab.nombre == "COLESTEROL LDL"),
-            None
-        )
+    def _paso_riesgo(self) -> bool:
         try:
             pas = float(self.pa_sistolica) if self.pa_sistolica else None
         except ValueError:
             pas = None
-            
+
         nivel, justificacion = calc_riesgo_cv_4_pasos(
             edad=self.paciente_edad,
             sexo=self.paciente_sexo,
@@ -364,20 +448,22 @@ class AppState(rx.State):
             has_hta=self.dx_hta,
             tfg=self.tfg_cg,
             pa_sistolica=pas,
-            ldl=ldl,
+            ldl=self._valores_lab.get(LAB_LDL),
             factores_riesgo=[
-                f for f in self.factores_riesgo
+                f for f in self._factores_riesgo
                 if f in FACTORES_RIESGO
             ],
             potenciadores=[
-                p for p in self.potenciadores
+                p for p in self._potenciadores
                 if p in POTENCIADORES_RIESGO
             ],
         )
-        self.riesgo_cv_categoria = nivel
-        self.riesgo_justificacion = justificacion
+        a = self._asignar("riesgo_cv_categoria", nivel)
+        b = self._asignar("riesgo_justificacion", justificacion)
+        return a or b
 
-        # 5. Metas por programa prioritario
+    def _paso_metas(self) -> bool:
+        # Metas por programa prioritario (sin programa se conservan)
         if self.dx_erc:
             programa = Programa.ERC
         elif self.dx_dm:
@@ -385,17 +471,16 @@ class AppState(rx.State):
         elif self.dx_hta:
             programa = Programa.HTA
         else:
-            return
-            
-        self.meta_pa_sys, self.meta_pa_dia, self.meta_ldl, self.meta_hba1c = get_metas_programa(
+            return False
+
+        metas = get_metas_programa(
             programa=programa,
             edad=self.paciente_edad,
             has_ecv=self.dx_cardiovascular,
-            estadio=estadio,
+            estadio=get_estadio_erc(self.tfg_cg) if self.tfg_cg else None,
         )
-
-        # 6. Estado fragilidad
-        self._recalc_fragilidad()
+        cambios = [self._asignar(c, v) for c, v in zip(SALIDAS_PASO["metas"], metas, strict=True)]
+        return any(cambios)
 
     def _recalc_fragilidad(self):
         """Recalcula estado fragilidad."""
@@ -414,4 +499,11 @@ class AppState(rx.State):
     def toggle_modal_meds(self):
         self.modal_meds_abierto = not self.modal_meds_abierto
 
-__all__ = ["AppState", "LabItem", "MedicamentoItem"]
+def _pasos_afectados(campos: Iterable[str]) -> Set[str]:
+    afectados: Set[str] = set()
+    for campo in campos:
+        afectados |= DEPENDENCIAS.get(campo, frozenset())
+    return afectados
+
+
+__all__ = ["AppState", "LabItem", "MedicamentoItem", "DEPENDENCIAS", "ORDEN_RECALCULO"]
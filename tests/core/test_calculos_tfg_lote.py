@@ -0,0 +1,60 @@
+"""Pruebas para el cálculo de TFG Cockcroft-Gault por lote (cohortes)."""
+
+import pytest
+
+from rcvco.core.calculos import calcular_tfg_cg, calcular_tfg_cg_lote, calcular_tfg_cg_tabla
+
+np = pytest.importorskip("numpy")
+
+
+def test_lote_identico_a_escalar():
+    """Cada fila válida coincide exactamente con el cálculo escalar."""
+    rng = np.random.default_rng(7)
+    n = 500
+    creatinina = rng.uniform(0.4, 6.0, n)
+    edad = rng.integers(18, 100, n)
+    peso = rng.uniform(40, 140, n)
+    sexo = rng.choice(["m", "f", "M", "F"], n)
+
+    res = calcular_tfg_cg_lote(creatinina, edad, sexo, peso)
+
+    assert res.valido.all()
+    for i in range(n):
+        assert res.tfg[i] == calcular_tfg_cg(creatinina[i], edad[i], sexo[i], peso[i])
+
+
+def test_lote_valores_esperados():
+    """Reproduce los valores de referencia 55.6 / 47.2 ml/min."""
+    res = calcular_tfg_cg_lote([1.2, 1.2], [65, 65], ["m", "f"], [70, 70])
+    assert np.round(res.tfg, 1).tolist() == [55.6, 47.2]
+
+
+def test_lote_mascara_invalidos():
+    """Las filas inválidas se marcan en la máscara y quedan en NaN."""
+    res = calcular_tfg_cg_lote(
+        creatinina=[1.2, 0, 1.2, 1.2, 1.2, "abc"],
+        edad=[65, 65, 0, 65, 65, 65],
+        sexo=["m", "m", "m", "x", "f", "m"],
+        peso=[70, 70, 70, 70, 0, 70],
+    )
+    assert res.valido.tolist() == [True, False, False, False, False, False]
+    assert np.isnan(res.tfg[1:]).all()
+
+
+def test_lote_tabla_columnar():
+    """Acepta una tabla columnar con tipos de texto."""
+    tabla = {
+        "creatinina": np.array(["1.2", "1.2"]),
+        "edad": np.array(["65", "65"]),
+        "sexo": np.array(["m", "f"]),
+        "peso": np.array(["70", "70"]),
+    }
+    res = calcular_tfg_cg_tabla(tabla)
+    assert res.tfg[0] == calcular_tfg_cg("1.2", "65", "m", "70")
+    assert res.tfg[1] == calcular_tfg_cg("1.2", "65", "f", "70")
+
+
+def test_lote_longitudes_distintas():
+    """Columnas de distinta longitud son un error."""
+    with pytest.raises(ValueError):
+        calcular_tfg_cg_lote([1.2], [65, 70], ["m"], [70])
@@ -0,0 +1,83 @@
+"""Pruebas para la clasificación de riesgo CV de 4 pasos por lote."""
+
+import itertools
+
+import pytest
+
+from rcvco.core.riesgo import (
+    ALTO,
+    CRIT_ECV,
+    CRIT_RAC_POTENCIADOR,
+    CRIT_TFG_MENOR_30,
+    MUY_ALTO,
+    clasificar_riesgo_cv_4_pasos,
+    clasificar_riesgo_cv_4_pasos_lote,
+)
+
+np = pytest.importorskip("numpy")
+
+
+def _malla():
+    """Combinaciones que recorren todos los umbrales del protocolo."""
+    return list(itertools.product(
+        [25, 30, 45, 60, 65],       # tfg
+        [False, True],              # ecv
+        [False, True],              # dm
+        [False, True],              # dano_organo
+        [False, True],              # duracion_dm_10_anos
+        [(130, 80), (180, 90), (120, 110)],  # pa
+        [100, 191],                 # ldl
+        [0, 1, 2, 3],               # factores_riesgo
+        [25, 31],                   # rac
+    ))
+
+
+def test_lote_identico_a_escalar():
+    """Niveles y justificaciones coinciden con la versión escalar."""
+    casos = _malla()
+    cols = list(zip(*casos, strict=True))
+    res = clasificar_riesgo_cv_4_pasos_lote(
+        tfg=cols[0],
+        tiene_ecv=cols[1],
+        tiene_dm=cols[2],
+        tiene_hta=[False] * len(casos),
+        dano_organo=cols[3],
+        duracion_dm_10_anos=cols[4],
+        pa_sistolica=[pa[0] for pa in cols[5]],
+        pa_diastolica=[pa[1] for pa in cols[5]],
+        ldl=cols[6],
+        factores_riesgo=cols[7],
+        rac=cols[8],
+    )
+    for i, (tfg, ecv, dm, dano, dur, pa, ldl, fr, rac) in enumerate(casos):
+        esperado = clasificar_riesgo_cv_4_pasos(
+            tfg=tfg, tiene_ecv=ecv, tiene_dm=dm, tiene_hta=False, dano_organo=dano,
+            duracion_dm_10_anos=dur, pa_sistolica=pa[0], pa_diastolica=pa[1],
+            ldl=ldl, factores_riesgo=fr, rac=rac,
+        )
+        assert res.como_dict(i) == esperado, casos[i]
+
+
+def test_lote_codigos_y_criterios():
+    """Expone códigos categóricos y la máscara de criterios cumplidos."""
+    res = clasificar_riesgo_cv_4_pasos_lote(
+        tfg=[25, 65, 65],
+        tiene_ecv=[True, False, False],
+        tiene_dm=[False, False, False],
+        tiene_hta=[False, False, False],
+        dano_organo=[False, False, False],
+        duracion_dm_10_anos=[False, False, False],
+        pa_sistolica=[130, 130, 130],
+        pa_diastolica=[80, 80, 80],
+        ldl=[100, 100, 100],
+        factores_riesgo=[0, 2, 0],
+        rac=[25, 40, 25],
+    )
+    assert res.codigos.tolist() == [MUY_ALTO, ALTO, 3]
+    assert res.criterios[0] == CRIT_ECV | CRIT_TFG_MENOR_30
+    assert res.criterios[1] == CRIT_RAC_POTENCIADOR
+    assert list(res.justificaciones()) == [
+        "ECV establecida; TFG ≤ 30",
+        "≥3 factores de riesgo potenciadores",
+        "Sin factores de riesgo significativos",
+    ]
@@ -0,0 +1,60 @@
+"""Pruebas para la puntuación de metas por lote (evaluador compilado)."""
+
+import itertools
+
+import pytest
+
+from rcvco.core.metas import calcular_puntuacion_metas, calcular_puntuacion_metas_lote
+
+np = pytest.importorskip("numpy")
+
+
+def _casos():
+    """Combinaciones que cruzan perfiles y umbrales principales."""
+    base = dict(glicemia=90, hdl=45, trigliceridos=140, pa_diastolica=85, rac=25,
+                peso_actual=70, perimetro=92)
+    casos = []
+    for programa, tfg, dm, sexo, edad, riesgo, ecv, ldl, ldl_prev, pas, peso_prev, hba1c in itertools.product(
+        ["HTA", "DM", "ERC"], [25, 65], [False, True], ["m", "f"], [55, 70],
+        [None, "ALTO"], [False, True], [95, 120, 150, 200], [None, 200, 400],
+        [135, 145], [None, 75], [None, 6.5, 7.5],
+    ):
+        casos.append(dict(base, programa=programa, tfg=tfg, tiene_dm=dm, sexo=sexo, edad=edad,
+                          riesgo_cv=riesgo, tiene_ecv=ecv, ldl_actual=ldl, ldl_previo=ldl_prev,
+                          pa_sistolica=pas, peso_previo=peso_prev, hba1c=hba1c))
+    return casos
+
+
+def test_lote_identico_a_escalar():
+    """Los puntos por lote coinciden fila a fila con la versión escalar."""
+    casos = _casos()
+    columnas = {k: [c[k] for c in casos] for k in casos[0]}
+    res = calcular_puntuacion_metas_lote(**columnas)
+    for i, caso in enumerate(casos):
+        esperado = calcular_puntuacion_metas(**caso)
+        assert {k: int(v[i]) for k, v in res.items()} == esperado, caso
+
+
+def test_lote_escalares_por_defecto():
+    """Los opcionales aceptan un escalar común a toda la cohorte."""
+    res = calcular_puntuacion_metas_lote(
+        programa=["ERC", "ERC"], tfg=[25, 25], glicemia=[110, 110], ldl_actual=[95, 95],
+        ldl_previo=[120, 120], hdl=[45, 45], trigliceridos=[140, 140],
+        pa_sistolica=[135, 135], pa_diastolica=[85, 85], rac=[25, 25],
+        peso_actual=[70, 70], peso_previo=[75, 75], perimetro=[92, 92],
+        sexo=["m", "m"], edad=[55, 55], hba1c=6.5, tiene_dm=[True, False],
+    )
+    assert res["hba1c"].tolist() == [30, 0]
+    assert res["pa"].tolist() == [30, 40]
+
+
+def test_lote_programa_invalido():
+    """Un programa inválido en la cohorte es un error."""
+    with pytest.raises(ValueError):
+        calcular_puntuacion_metas_lote(
+            programa=["HTA", "X"], tfg=[65, 65], glicemia=[90, 90], ldl_actual=[100, 100],
+            ldl_previo=[None, None], hdl=[45, 45], trigliceridos=[140, 140],
+            pa_sistolica=[135, 135], pa_diastolica=[85, 85], rac=[25, 25],
+            peso_actual=[70, 70], peso_previo=[None, None], perimetro=[92, 92],
+            sexo=["m", "m"], edad=[55, 55],
+        )
@@ -0,0 +1,42 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from rcvco.api.app import app
+from rcvco.services.analysis_service import iter_ndjson_lines
+
+client = TestClient(app)
+
+PACIENTE = {
+    "id": "p1", "sexo": "M", "edad": 66, "pesoKg": 70, "creatininaMgDl": 1.4,
+    "estadioERC": "E3A", "tieneDM": True, "ldl": 140, "fechaActual": "2025-01-10",
+}
+
+
+def test_analyze_ndjson_con_errores_en_linea():
+    cuerpo = "\n".join([
+        json.dumps(PACIENTE),
+        "{no es json",
+        "",
+        json.dumps({"id": "p2"}),
+        json.dumps(dict(PACIENTE, id="p3")),
+    ]) + "\n"
+    r = client.post("/api/analyze", content=cuerpo.encode("utf-8"))
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    filas = [json.loads(linea) for linea in r.text.splitlines()]
+    assert [f["linea"] for f in filas] == [1, 2, 4, 5]
+    assert filas[0]["programaPrioritario"] == "ERC"
+    assert filas[1]["error"] == "JSON inválido"
+    assert filas[2]["error"] == "Validación"
+    assert "riesgo" in filas[3]
+
+
+def test_iter_ndjson_lines_fragmentado_y_linea_larga():
+    async def flujo():
+        for parte in [b'{"a":', b'1}\n{"b"', b':2}\n', b"x" * 50, b"x" * 50, b"\n", b'{"c":3}']:
+            yield parte
+
+    async def recolectar():
+        return [item async for item in iter_ndjson_lines(flujo(), max_linea=40)]
+
+    assert asyncio.run(recolectar()) == [(1, b'{"a":1}'), (2, b'{"b":2}'), (3, None), (4, b'{"c":3}')]
@@ -0,0 +1,66 @@
+import io
+import json
+from datetime import date
+from rcvco.batch import Progreso, ejecutar, leer_csv, main
+
+CSV = """pseudo_id,sexo,edad,peso_kg,talla_cm,has_dm,has_hta,estadio_erc,nombre,valor,unidad,fecha
+p1,M,66,70,170,1,1,3,CREATININA EN SUERO U OTROS,1.4,mg/dL,2024-12-01
+p1,M,66,70,170,1,1,3,COLESTEROL LDL,140,mg/dL,2024-12-01
+p2,F,50,60,,0,1,,,,,
+p3,X,50,60,,0,1,,,,,
+"""
+
+
+def test_leer_csv_agrupa_filas_contiguas():
+    registros = list(leer_csv(io.StringIO(CSV)))
+    assert [r["pseudo_id"] for r in registros] == ["p1", "p2", "p3"]
+    assert len(registros[0]["labs"]) == 2
+    assert registros[0]["has_dm"] is True
+    assert registros[1]["labs"] == [] and "talla_cm" not in registros[1]
+
+
+def _ejecutar(tmp_path, workers):
+    entrada = tmp_path / "cohorte.csv"
+    entrada.write_text(CSV, encoding="utf-8")
+    salida = tmp_path / "resultados.ndjson"
+    progreso = ejecutar(entrada, salida, workers=workers, tamano_bloque=1,
+                        hoy=date(2025, 1, 10), progreso=Progreso(io.StringIO()))
+    filas = {f["pseudo_id"]: f for f in map(json.loads, salida.read_text(encoding="utf-8").splitlines())}
+    return progreso, filas
+
+
+def test_ejecutar_en_proceso_aisla_errores(tmp_path):
+    progreso, filas = _ejecutar(tmp_path, workers=1)
+    assert progreso.total == 3 and progreso.errores == 1
+    assert filas["p1"]["analisis"]["programa"] == "ERC"
+    examenes = {a["examen"] for a in filas["p1"]["agenda_avanzada"]}
+    assert "PTH" in examenes and "HEMOGLOBINA GLICOSILADA (HBA1C)" in examenes
+    assert filas["p3"]["error"] == "Validación"
+
+
+def test_pool_de_procesos_igual_que_en_proceso(tmp_path):
+    _, en_proceso = _ejecutar(tmp_path, workers=1)
+    _, con_pool = _ejecutar(tmp_path, workers=2)
+    assert con_pool == en_proceso
+
+
+def test_main_ndjson(tmp_path, capsys):
+    entrada = tmp_path / "cohorte.ndjson"
+    entrada.write_text(json.dumps({"pseudo_id": "p1", "sexo": "F", "edad": 40, "labs": []}) + "\n", encoding="utf-8")
+    salida = tmp_path / "out.ndjson"
+    assert main([str(entrada), str(salida), "--workers", "1", "--hoy", "2025-01-10"]) == 0
+    assert json.loads(salida.read_text(encoding="utf-8"))["pseudo_id"] == "p1"
+    assert "Completado: 1 pacientes" in capsys.readouterr().err
+
+
+def test_ndjson_lineas_invalidas_no_abortan(tmp_path):
+    entrada = tmp_path / "cohorte.ndjson"
+    paciente = json.dumps({"pseudo_id": "p1", "sexo": "F", "edad": 40, "labs": []})
+    entrada.write_text("not json\n\n[1,2]\n" + paciente + "\n", encoding="utf-8")
+    salida = tmp_path / "out.ndjson"
+    progreso = ejecutar(entrada, salida, workers=2, tamano_bloque=1, hoy=date(2025, 1, 10), progreso=Progreso(io.StringIO()))
+    filas = [json.loads(linea) for linea in salida.read_text(encoding="utf-8").splitlines()]
+    errores = {f["linea"]: f["error"] for f in filas if "linea" in f}
+    assert errores == {1: "JSON inválido", 3: "Validación"}
+    assert progreso.total == 3 and progreso.errores == 2
+    assert any(f.get("pseudo_id") == "p1" and "analisis" in f for f in filas)
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from rcvco.services.chart_data import parche_series, reducir_lttb, series_tendencias
+
+
+def _serie(valores, inicio=date(2024, 1, 1)):
+    return [{"x": (inicio + timedelta(days=i)).isoformat(), "y": float(v)} for i, v in enumerate(valores)]
+
+
+def test_lttb_conserva_extremos_y_limita_puntos():
+    valores = [100] * 500
+    valores[137] = 300  # pico aislado
+    valores[402] = 20   # valle aislado
+    reducida = reducir_lttb(_serie(valores), 50)
+    assert len(reducida) == 50
+    ys = [p["y"] for p in reducida]
+    assert 300 in ys and 20 in ys
+    assert reducida[0]["x"] == "2024-01-01" and reducida[-1] == _serie(valores)[-1]
+    assert [p["x"] for p in reducida] == sorted(p["x"] for p in reducida)
+
+
+def test_lttb_serie_corta_intacta():
+    serie = _serie([1, 2, 3])
+    assert reducir_lttb(serie, 10) == serie
+
+
+def test_series_ordenadas_y_filtradas():
+    labs = [
+        {"id": "ldl", "valor": "130", "fecha": "2024-05-01"},
+        {"id": "ldl", "valor": "150", "fecha": "2024-01-01"},
+        {"id": "ldl", "valor": "", "fecha": "2024-02-01"},
+        {"id": "hba1c", "valor": "7.1", "fecha": ""},
+        {"id": "creat", "valor": "1.2", "fecha": "2024-01-01"},
+    ]
+    series = series_tendencias(labs, 200)
+    assert series == {
+        "ldl": [{"x": "2024-01-01", "y": 150.0}, {"x": "2024-05-01", "y": 130.0}],
+        "hba1c": [{"x": "", "y": 7.1}],
+    }
+
+
+def test_parche_solo_envia_lo_nuevo():
+    previas = {"ldl": _serie([150, 140]), "hba1c": _serie([7.0])}
+    nuevas = {"ldl": _serie([150, 140, 120]), "hba1c": _serie([7.0])}
+    assert parche_series(previas, nuevas) == {"ldl": {"desde": 2, "puntos": _serie([150, 140, 120])[2:]}}
+    assert parche_series(nuevas, nuevas) == {}
+
+
+def test_parche_cambios_y_series_eliminadas():
+    previas = {"ldl": _serie([150, 140, 130]), "hba1c": _serie([7.0])}
+    nuevas = {"ldl": _serie([150, 145, 130])}
+    parche = parche_series(previas, nuevas)
+    assert parche["ldl"] == {"desde": 1, "puntos": _serie([150, 145, 130])[1:]}
+    assert parche["hba1c"] == {"desde": 0, "puntos": []}
+    assert parche_series({}, nuevas) == {"ldl": {"desde": 0, "puntos": nuevas["ldl"]}}
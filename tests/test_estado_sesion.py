@@ -0,0 +1,34 @@
+import pickle
+
+from rcvco.services.estado_sesion import campos_fila, lab_compacto, med_compacto, medir_estado
+
+
+class _Fila:
+    def __init__(self, **campos):
+        self.__dict__.update(campos)
+
+
+def test_lab_compacto_desde_modelo_o_dict():
+    fila = {"nombre": "COLESTEROL LDL", "valor": 120.0, "unidad": "mg/dL", "fecha": "2025-01-02"}
+    assert lab_compacto(fila) == ("COLESTEROL LDL", 120.0, "2025-01-02")
+    assert lab_compacto(_Fila(**fila)) == ("COLESTEROL LDL", 120.0, "2025-01-02")
+    assert lab_compacto({"valor": 1.1}) == ("", 1.1, None)
+
+
+def test_med_compacto_normaliza_vacios():
+    assert med_compacto({"nombre": "Losartán", "dosis": "50 mg", "frecuencia": None}) == ("Losartán", "50 mg", "")
+    assert med_compacto(_Fila(nombre="ASA")) == ("ASA", "", "")
+    assert campos_fila(_Fila(a=1), "a", "b") == (1, None)
+
+
+def test_medir_estado():
+    class _Estado:
+        def dict(self):
+            return {"labs": [{"nombre": "LDL", "valor": 120.0}], "informe_html": ""}
+
+        def _serialize(self):
+            return pickle.dumps(self.dict())
+
+    tamanos = medir_estado(_Estado())
+    assert tamanos["cliente"] == len('{"labs": [{"nombre": "LDL", "valor": 120.0}], "informe_html": ""}')
+    assert tamanos["persistido"] > 0
@@ -0,0 +1,43 @@
+from datetime import date
+from rcvco.domain import evaluacion
+from rcvco.domain.assistant import analizar_paciente
+from rcvco.domain.evaluacion import ContextoEvaluacion, estadio_por_crcl
+from rcvco.domain.models import Paciente, LabResult
+
+
+def _paciente():
+    return Paciente(pseudo_id="ctx", sexo="M", edad=70, peso_kg=70, has_dm=True, labs=[
+        LabResult(nombre="COLESTEROL LDL", valor=150, unidad="mg/dL", fecha=date(2025, 1, 1)),
+        LabResult(nombre="COLESTEROL LDL", valor=110, unidad="mg/dL", fecha=date(2025, 6, 1)),
+        LabResult(nombre="HEMOGLOBINA GLICOSILADA (HBA1C)", valor=8.2, unidad="%", fecha=date(2025, 6, 1)),
+        LabResult(nombre="CREATININA EN SUERO U OTROS", valor=1.8, unidad="mg/dL", fecha=date(2025, 6, 1)),
+    ])
+
+
+def test_puntaje_se_calcula_una_vez(monkeypatch):
+    llamadas = []
+    original = evaluacion.calcula_puntaje
+    monkeypatch.setattr(evaluacion, "calcula_puntaje", lambda p: llamadas.append(p) or original(p))
+    res = analizar_paciente(_paciente())
+    assert len(llamadas) == 1
+    assert res.riesgo_cv["puntaje"] == res.puntaje_total == res.riesgo.puntaje
+
+
+def test_razones_y_metas_comparten_umbrales():
+    p = _paciente()
+    ctx = ContextoEvaluacion(p)
+    res = analizar_paciente(p, contexto=ctx)
+    # LDL histórico 150 ≥130 aunque el último sea 110
+    assert "LDL elevado" in res.riesgo_cv["justificacion"]
+    assert "LDL por encima de objetivo" in res.puntuacion_metas["metas_incumplidas"]
+    assert "Presión arterial sistólica elevada" not in res.puntuacion_metas["metas_incumplidas"]
+    assert ctx.estadio_calculado == estadio_por_crcl(ctx.crcl) == "3b"
+    assert "ERC estadio 3b (calculado)" in ctx.razones
+
+
+def test_tiempos_por_paso():
+    p = _paciente()
+    ctx = ContextoEvaluacion(p)
+    analizar_paciente(p, contexto=ctx)
+    for paso in ("agenda", "puntaje", "riesgo_categoria", "ascvd", "crcl", "umbrales", "razones"):
+        assert ctx.tiempos_ms[paso] >= 0
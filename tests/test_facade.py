@@ -0,0 +1,47 @@
+import asyncio
+import httpx
+from rcvco.api.app import app
+from rcvco.services.facade import SERVICIOS_LOCALES, ServiciosHTTP
+
+TEXTO = "Creatinina: 1.3 mg/dL\nLDL 142"
+DATOS = {"pseudo_id": "P1", "sexo": "F", "edad": 60, "labs": [{"nombre": "COLESTEROL LDL", "valor": 142}]}
+
+
+def test_local_y_http_devuelven_lo_mismo():
+    async def escenario():
+        remoto = ServiciosHTTP("http://api", transport=httpx.ASGITransport(app=app))
+        try:
+            assert await remoto.parse_text(TEXTO) == await SERVICIOS_LOCALES.parse_text(TEXTO)
+            assert await remoto.preview_report(DATOS) == await SERVICIOS_LOCALES.preview_report(DATOS)
+        finally:
+            await remoto.cerrar()
+
+    asyncio.run(escenario())
+
+
+def test_http_reutiliza_un_solo_cliente():
+    async def escenario():
+        remoto = ServiciosHTTP("http://api", transport=httpx.ASGITransport(app=app))
+        await remoto.parse_text("LDL 100")
+        cliente = remoto._cliente
+        await remoto.parse_text("LDL 120")
+        assert remoto._cliente is cliente
+        await remoto.cerrar()
+        assert remoto._cliente is None
+
+    asyncio.run(escenario())
+
+
+def test_http_error_de_estado():
+    async def escenario():
+        remoto = ServiciosHTTP("http://api", transport=httpx.ASGITransport(app=app))
+        try:
+            await remoto._json("GET", "/api/no-existe")
+        except RuntimeError as e:
+            assert "HTTP 404" in str(e)
+        else:
+            raise AssertionError("debía fallar")
+        finally:
+            await remoto.cerrar()
+
+    asyncio.run(escenario())
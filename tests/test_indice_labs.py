@@ -0,0 +1,66 @@
+from datetime import date
+from rcvco.domain.models import Paciente, LabResult
+from rcvco.domain.scoring import calcula_puntaje
+from rcvco.domain.tfg import crcl_cockcroft_gault
+
+
+def _lab(nombre, valor, fecha):
+    return LabResult(nombre=nombre, valor=valor, unidad="mg/dL", fecha=fecha)
+
+
+def _paciente():
+    return Paciente(pseudo_id="idx", sexo="M", edad=60, peso_kg=80, labs=[
+        _lab("COLESTEROL LDL", 170, date(2025, 3, 1)),
+        _lab("COLESTEROL LDL", 120, date(2025, 5, 1)),
+        _lab("COLESTEROL LDL", 140, date(2025, 1, 1)),
+        _lab("CREATININA EN SUERO U OTROS", 1.2, date(2025, 2, 1)),
+    ])
+
+
+def test_indice_ultimo_historial_maximo():
+    idx = _paciente().indice_labs
+    assert idx.valor("COLESTEROL LDL") == 120
+    assert [lab.valor for lab in idx.historial("COLESTEROL LDL")] == [140, 170, 120]
+    assert idx.maximo("COLESTEROL LDL") == 170
+    assert idx.fecha_mas_reciente == date(2025, 5, 1)
+    assert "HEMOGLOBINA GLICOSILADA (HBA1C)" not in idx
+    assert idx.ultimo("HEMOGLOBINA GLICOSILADA (HBA1C)") is None
+
+
+def test_indice_se_reutiliza():
+    p = _paciente()
+    assert p.indice_labs is p.indice_labs
+
+
+def test_indice_invalida_al_cambiar_labs():
+    p = _paciente()
+    assert calcula_puntaje(p) == 0
+    p.labs.append(_lab("COLESTEROL LDL", 165, date(2025, 6, 1)))
+    assert calcula_puntaje(p) == 2
+    p.agregar_lab(_lab("CREATININA EN SUERO U OTROS", 2.0, date(2025, 6, 1)))
+    assert crcl_cockcroft_gault(p) == round((80 * 80) / (72 * 2.0), 2)
+    p.labs = []
+    assert crcl_cockcroft_gault(p) is None
+
+
+def test_indice_invalidacion_explicita():
+    p = _paciente()
+    assert p.indice_labs.valor("COLESTEROL LDL") == 120
+    p.labs[1] = _lab("COLESTEROL LDL", 200, date(2025, 5, 1))
+    p.invalidar_indice_labs()
+    assert p.indice_labs.valor("COLESTEROL LDL") == 200
+
+
+def test_indice_model_copy_con_update():
+    p = _paciente()
+    assert p.indice_labs.maximo("COLESTEROL LDL") == 170
+    q = p.model_copy(update={"labs": [_lab("COLESTEROL LDL", 200, date(2025, 7, 1))]})
+    assert q.indice_labs.maximo("COLESTEROL LDL") == 200
+    assert p.indice_labs.maximo("COLESTEROL LDL") == 170
+
+
+def test_indice_invalida_al_modificar_lab_en_su_lugar():
+    p = _paciente()
+    assert p.indice_labs.maximo("COLESTEROL LDL") == 170
+    p.labs[0].valor = 999
+    assert p.indice_labs.maximo("COLESTEROL LDL") == 999
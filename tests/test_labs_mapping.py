@@ -9,3 +9,50 @@ def test_creatinina_variants():
 
 def test_unknown_passthrough():
     assert normalize_lab_name("glucosa") == "GLUCOSA"
+
+
+def test_mapeador_prioridad_por_catalogo_y_exclusiones():
+    from rcvco.parsing.labs import MAPEADOR_LABS
+    assert MAPEADOR_LABS.mapear("Creatinina en suero") == "CREATININA EN SUERO U OTROS"
+    assert MAPEADOR_LABS.mapear("Creatinina orina parcial") is None
+    assert MAPEADOR_LABS.mapear("Orina 24h - creatinina") is None
+    # HbA1c tiene prioridad sobre glucosa aunque aparezca después
+    assert MAPEADOR_LABS.mapear("Glucosa promedio estimada (HbA1c)") == "HEMOGLOBINA GLICOSILADA (HBA1C)"
+    assert MAPEADOR_LABS.mapear("Sodio") is None
+
+
+def test_mapeador_extensible_desde_catalogo(tmp_path):
+    import json
+    from rcvco.parsing.labs import SINONIMOS_LABS, MapeadorLabs
+    m = MapeadorLabs(SINONIMOS_LABS)
+    assert m.mapear("PTH intacta") is None
+    catalogo = tmp_path / "sinonimos.json"
+    catalogo.write_text(json.dumps([{"patron": r"\bpth\b|paratohormona", "nombre": "PTH"}]), encoding="utf-8")
+    m.cargar_catalogo(catalogo)
+    assert m.mapear("PTH intacta") == "PTH"
+    assert m.mapear("LDL colesterol") == "COLESTEROL LDL"
+
+
+def test_extraer_labs_texto_libre():
+    from rcvco.parsing.labs import extraer_labs_texto
+    texto = "Creatinina orina 55\nCreatinina: 1.3 mg/dL  LDL 142 mg/dL\nHbA1c 7.2 %\nLDL 99"
+    assert extraer_labs_texto(texto) == [
+        {"nombre": "CREATININA EN SUERO U OTROS", "valor": 1.3},
+        {"nombre": "COLESTEROL LDL", "valor": 142.0},
+        {"nombre": "HEMOGLOBINA GLICOSILADA (HBA1C)", "valor": 7.2},
+    ]
+
+
+def test_extraer_labs_texto_no_salta_entre_examenes():
+    from rcvco.parsing.labs import extraer_labs_texto
+    assert extraer_labs_texto("Creatinina 1.2, LDL 130, HbA1c 7.1, uroanalisis orina normal") == [
+        {"nombre": "CREATININA EN SUERO U OTROS", "valor": 1.2},
+        {"nombre": "COLESTEROL LDL", "valor": 130.0},
+        {"nombre": "HEMOGLOBINA GLICOSILADA (HBA1C)", "valor": 7.1},
+    ]
+    assert extraer_labs_texto("Presion 130/80 LDL 120 sistolica") == [
+        {"nombre": "COLESTEROL LDL", "valor": 120.0},
+    ]
+    assert extraer_labs_texto("Presion arterial sistolica: 135") == [
+        {"nombre": "PRESION ARTERIAL SISTOLICA", "valor": 135.0},
+    ]
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from rcvco.adapters.llm.base import ErrorLLM
+from rcvco.adapters.llm.gemini_client import GeminiClient
+from rcvco.adapters.llm.http_client import ClienteLLMHTTP
+from rcvco.adapters.llm.openai_client import OpenAIClient
+from rcvco.config import settings
+
+
+class Stub:
+    """Servidor HTTP local que responde según un guion (status, retardo)."""
+
+    def __init__(self):
+        self.guion = []
+        self.peticiones = []
+        self.activas = 0
+        self.max_activas = 0
+        self._lock = threading.Lock()
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                cuerpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.peticiones.append((self.path, dict(self.headers), cuerpo))
+                    status, retardo = stub.guion.pop(0) if stub.guion else (200, 0)
+                    stub.activas += 1
+                    stub.max_activas = max(stub.max_activas, stub.activas)
+                time.sleep(retardo)
+                with stub._lock:
+                    stub.activas -= 1
+                if status == 200 and (cuerpo.get("stream") or "streamGenerateContent" in self.path):
+                    return self._sse(cuerpo)
+                if status == 200 and "generateContent" in self.path:
+                    data = {"candidates": [{"content": {"parts": [{"text": "informe gemini"}]}}]}
+                elif status == 200:
+                    data = {"choices": [{"message": {"content": "informe " + cuerpo["messages"][0]["content"]}}]}
+                else:
+                    data = {"error": status}
+                salida = json.dumps(data).encode()
+                try:
+                    self.send_response(status)
+                    if status == 429:
+                        self.send_header("Retry-After", "0")
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(salida)))
+                    self.end_headers()
+                    self.wfile.write(salida)
+                except OSError:
+                    pass  # el cliente abandonó por timeout
+
+            def _sse(self, cuerpo):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for palabra in ("uno ", "dos ", "tres"):
+                    if "streamGenerateContent" in self.path:
+                        evento = {"candidates": [{"content": {"parts": [{"text": palabra}]}}]}
+                    else:
+                        evento = {"choices": [{"delta": {"content": palabra}}]}
+                    self.wfile.write(f"data: {json.dumps(evento)}\n\n".encode())
+                    self.wfile.flush()
+                if cuerpo.get("stream"):
+                    self.wfile.write(b"data: [DONE]\n\n")
+
+        return Handler
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE_S", 0.01)
+    s = Stub()
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), s.handler())
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    s.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    yield s
+    servidor.shutdown()
+    servidor.server_close()
+    ClienteLLMHTTP._pools.clear()
+
+
+def _correr(coro):
+    async def envolver():
+        try:
+            return await coro
+        finally:
+            await ClienteLLMHTTP.cerrar_clientes()
+
+    return asyncio.run(envolver())
+
+
+def test_reintenta_transitorios_con_backoff(stub):
+    stub.guion = [(503, 0), (429, 0), (200, 0)]
+    c = OpenAIClient("k", "m", base_url=stub.url)
+    assert _correr(c.agenerate_report("hola")) == "informe hola"
+    assert len(stub.peticiones) == 3
+    ruta, cabeceras, cuerpo = stub.peticiones[0]
+    assert ruta == "/v1/chat/completions" and cabeceras["Authorization"] == "Bearer k"
+    assert cuerpo["model"] == "m"
+
+
+def test_error_no_reintentable(stub):
+    stub.guion = [(400, 0)]
+    c = OpenAIClient("k", "m", base_url=stub.url)
+    with pytest.raises(ErrorLLM, match="HTTP 400"):
+        _correr(c.agenerate_report("hola"))
+    assert len(stub.peticiones) == 1
+
+
+def test_timeout_por_llamada(stub):
+    stub.guion = [(200, 0.5), (200, 0.5)]
+    c = OpenAIClient("k", "m", base_url=stub.url, timeout=0.1, max_reintentos=1)
+    with pytest.raises(ErrorLLM, match="2 intentos"):
+        _correr(c.agenerate_report("hola"))
+
+
+def test_semaforo_limita_concurrencia(stub):
+    stub.guion = [(200, 0.05)] * 8
+    c = OpenAIClient("k", "m", base_url=stub.url, max_concurrencia=2)
+
+    async def muchas():
+        return await asyncio.gather(*(c.agenerate_report(f"p{i}") for i in range(8)))
+
+    assert _correr(muchas()) == [f"informe p{i}" for i in range(8)]
+    assert stub.max_activas <= 2
+
+
+def test_gemini_y_pool_compartido(stub):
+    a = GeminiClient("clave", "gemini-x", base_url=stub.url)
+    b = GeminiClient("clave", "gemini-x", base_url=stub.url)
+
+    async def dos():
+        r = await a.agenerate_report("x")
+        assert a._pool() is b._pool()
+        return r
+
+    assert _correr(dos()) == "informe gemini"
+    ruta, cabeceras, _ = stub.peticiones[0]
+    assert ruta == "/v1beta/models/gemini-x:generateContent"
+    assert cabeceras["x-goog-api-key"] == "clave"
+
+
+def test_sin_api_key_simula():
+    c = OpenAIClient(None, "m")
+    assert _correr(c.agenerate_report("hola")) == "[openai:m] hola"
+
+
+def _fragmentos(c, prompt):
+    async def juntar():
+        return [f async for f in c.astream_report(prompt)]
+
+    return _correr(juntar())
+
+
+def test_stream_openai_reintenta_antes_del_primer_fragmento(stub):
+    stub.guion = [(503, 0), (200, 0)]
+    c = OpenAIClient("k", "m", base_url=stub.url)
+    assert _fragmentos(c, "hola") == ["uno ", "dos ", "tres"]
+    assert len(stub.peticiones) == 2
+    assert stub.peticiones[1][2]["stream"] is True
+
+
+def test_stream_gemini_sse(stub):
+    c = GeminiClient("clave", "gemini-x", base_url=stub.url)
+    assert "".join(_fragmentos(c, "x")) == "uno dos tres"
+    assert stub.peticiones[0][0] == "/v1beta/models/gemini-x:streamGenerateContent?alt=sse"
+
+
+def test_stream_sin_api_key_por_palabras():
+    c = OpenAIClient(None, "m")
+    fragmentos = _fragmentos(c, "hola mundo")
+    assert len(fragmentos) > 1 and "".join(fragmentos) == "[openai:m] hola mundo"
+
+
+def test_generate_report_sincrono_cierra_su_cliente(stub):
+    c = OpenAIClient("k", "m", base_url=stub.url)
+    assert c.generate_report("uno") == "informe uno"
+    assert c.generate_report("dos") == "informe dos"
+    assert len(ClienteLLMHTTP._pools) == 0  # nada queda abierto tras cada asyncio.run
+
+
+def test_generate_report_sincrono_dentro_de_un_event_loop(stub):
+    c = OpenAIClient("k", "m", base_url=stub.url)
+
+    async def llamar():
+        return c.generate_report("uno")
+
+    assert asyncio.run(llamar()) == "informe uno"
+    assert len(ClienteLLMHTTP._pools) == 0
+
+
+def test_hooks_de_proveedor_abstractos():
+    class Incompleto(ClienteLLMHTTP):
+        def _simular(self, prompt):
+            return prompt
+
+    with pytest.raises(TypeError):
+        Incompleto("k", "m", base_url="http://x")
@@ -12,3 +12,31 @@ def test_parse_txt_creatinina_filtra_orina(tmp_path):
     assert "CREATININA EN SUERO U OTROS" in nombres
     # No debe mapear creatinina orina
     assert all("orina" not in l.nombre.lower() for l in p.labs)
+
+
+def test_iter_labs_txt_reanuda_desde_offset(tmp_path):
+    from rcvco.ingest.parsers import iter_labs_txt
+    f = tmp_path / "labs.txt"
+    f.write_bytes("Glucosa|95|2025-01-01\r\nsin separador\nLDL colesterol|140|2025-03-01\nHbA1c|7.1|2025-03-02".encode("utf-8"))
+    pares = list(iter_labs_txt(str(f), con_offset=True))
+    assert [lab.nombre for _, lab in pares] == ["GLUCOSA EN AYUNAS", "COLESTEROL LDL", "HEMOGLOBINA GLICOSILADA (HBA1C)"]
+    resto = list(iter_labs_txt(str(f), desde=pares[0][0]))
+    assert [lab.valor for lab in resto] == [140.0, 7.1]
+    # un offset en medio de una línea descarta la línea parcial
+    assert [lab.valor for lab in iter_labs_txt(str(f), desde=pares[1][0] - 5)] == [7.1]
+    assert list(iter_labs_txt(str(f), desde=f.stat().st_size)) == []
+
+
+def test_iter_pacientes_txt_agrupa_por_id(tmp_path):
+    from rcvco.ingest.parsers import iter_pacientes_txt
+    f = tmp_path / "export.txt"
+    f.write_text(
+        "A1|Creatinina suero|1.1|2025-01-01\nA1|LDL|150|2025-01-01\n"
+        "B2|Creatinina orina parcial|50|2025-01-02\nB2|Glucosa|101|2025-01-02\nC3|Triglic|200|2025-02-02\n",
+        encoding="utf-8",
+    )
+    pacientes = list(iter_pacientes_txt(str(f), con_offset=True))
+    assert [(p.pseudo_id, len(p.labs)) for _, p in pacientes] == [("A1", 2), ("B2", 1), ("C3", 1)]
+    assert pacientes[1][1].labs[0].fecha == date(2025, 1, 2)
+    reanudados = list(iter_pacientes_txt(str(f), desde=pacientes[0][0]))
+    assert [p.pseudo_id for p in reanudados] == ["B2", "C3"]
@@ -0,0 +1,120 @@
+import threading
+from datetime import date
+import pytest
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+from rcvco.adapters import patient_repository
+from rcvco.adapters.patient_repository import RepositorioPacientes
+from rcvco.api.endpoints import crear_paciente, listar_pacientes
+from rcvco.domain.models import LabResult, Paciente
+
+
+def _paciente(i, **extra):
+    labs = [
+        LabResult(nombre="CREATININA EN SUERO U OTROS", valor=1.0 + i / 10, unidad="mg/dL", fecha=date(2025, 1, 1)),
+        LabResult(nombre="COLESTEROL LDL", valor=100 + i, unidad="mg/dL", fecha=date(2025, 2, 1)),
+    ]
+    return Paciente(pseudo_id=f"P{i:04d}", sexo="F", edad=50 + i % 30, peso_kg=70, has_dm=i % 2 == 0, labs=labs, **extra)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    r = RepositorioPacientes(str(tmp_path / "pacientes.db"))
+    yield r
+    r.cerrar()
+
+
+def test_guardar_lote_y_keyset(repo):
+    assert repo.guardar_lote((_paciente(i) for i in range(25)), tamano_lote=10) == 25
+    vistos, cursor = [], None
+    while True:
+        pagina, cursor = repo.listar(cursor, limite=10)
+        vistos += [p.pseudo_id for p in pagina]
+        if cursor is None:
+            break
+    assert vistos == [f"P{i:04d}" for i in range(25)]
+    assert repo.obtener("P0003").labs[1].valor == 103
+    assert repo.obtener("P0003").indice_labs.valor("COLESTEROL LDL") == 103
+
+
+def test_reemplazo_persistencia_y_columnas_derivadas(repo, tmp_path):
+    repo.guardar(_paciente(1))
+    repo.guardar(_paciente(1, estadio_erc=4).model_copy(update={"labs": []}))
+    otro = RepositorioPacientes(str(tmp_path / "pacientes.db"))
+    p = otro.obtener("P0001")
+    assert p.estadio_erc == 4 and p.labs == []
+    fila = otro._conexion().execute("SELECT programa, estadio FROM pacientes").fetchone()
+    assert fila == ("GENERAL", "4")  # sin labs no hay programa ERC
+    assert otro._conexion().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert otro.contar() == 1
+
+
+@pytest.mark.parametrize("ruta", [":memory:", ""])
+def test_rechaza_base_en_memoria(ruta):
+    with pytest.raises(ValueError):
+        RepositorioPacientes(ruta)
+
+
+def test_conexion_por_hilo(repo):
+    errores = []
+
+    def escribir(base):
+        try:
+            repo.guardar_lote(_paciente(base + i) for i in range(20))
+        except Exception as e:  # noqa: BLE001
+            errores.append(e)
+
+    hilos = [threading.Thread(target=escribir, args=(k * 100,)) for k in range(4)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert errores == [] and repo.contar() == 80
+
+
+@pytest.fixture
+def client(repo, monkeypatch):
+    monkeypatch.setattr(patient_repository, "_repositorio", repo)
+    app = Starlette()
+    app.add_route("/api/pacientes", listar_pacientes, methods=["GET"])
+    app.add_route("/api/pacientes", crear_paciente, methods=["POST"])
+    return TestClient(app)
+
+
+def test_endpoints_usan_repositorio(client):
+    lab = {"nombre": "COLESTEROL LDL", "valor": 120, "fecha": "2025-01-01"}
+    assert client.post("/api/pacientes", json={"pseudo_id": "A", "sexo": "M", "edad": 60, "labs": [lab]}).status_code == 200
+    r = client.post("/api/pacientes", json=[{"pseudo_id": "B", "sexo": "F", "edad": 40}, {"pseudo_id": "C", "sexo": "F", "edad": 41}])
+    assert r.json() == {"status": "ok", "guardados": 2}
+    assert client.post("/api/pacientes", json={"pseudo_id": "D"}).status_code == 422
+    assert [p["pseudo_id"] for p in client.get("/api/pacientes").json()["items"]] == ["A", "B", "C"]
+
+
+def test_listado_paginado_con_cursor_y_proyeccion(repo, client):
+    repo.guardar_lote(_paciente(i) for i in range(7))
+    r = client.get("/api/pacientes", params={"limit": 3, "fields": "resumen"}).json()
+    assert [p["pseudo_id"] for p in r["items"]] == ["P0000", "P0001", "P0002"]
+    assert set(r["items"][0]) == {"pseudo_id", "sexo", "edad", "programa", "riesgo_categoria", "estadio"}
+    vistos = [p["pseudo_id"] for p in r["items"]]
+    while r["siguiente"]:
+        r = client.get("/api/pacientes", params={"limit": 3, "fields": "resumen", "cursor": r["siguiente"]}).json()
+        vistos += [p["pseudo_id"] for p in r["items"]]
+    assert vistos == [f"P{i:04d}" for i in range(7)]
+    r = client.get("/api/pacientes", params={"fields": "pseudo_id,labs", "limit": 1}).json()
+    assert r["items"] == [{"pseudo_id": "P0000", "labs": [lab.model_dump(mode="json") for lab in _paciente(0).labs]}]
+
+
+def test_listado_filtros(repo, client):
+    repo.guardar_lote([_paciente(1), _paciente(2, estadio_erc=4), _paciente(3).model_copy(update={"labs": []})])
+    r = client.get("/api/pacientes", params={"programa": "ERC", "fields": "pseudo_id"}).json()
+    assert r == {"items": [{"pseudo_id": "P0001"}, {"pseudo_id": "P0002"}], "siguiente": None}
+    r = client.get("/api/pacientes", params={"estadio": "4", "programa": "ERC", "fields": "pseudo_id,estadio"}).json()
+    assert r["items"] == [{"pseudo_id": "P0002", "estadio": "4"}]
+    riesgo = repo.listar_campos(["riesgo_categoria"], limite=1)[0][0]["riesgo_categoria"]
+    r = client.get("/api/pacientes", params={"riesgo": riesgo, "fields": "pseudo_id,riesgo_categoria"}).json()
+    assert r["items"] and all(p["riesgo_categoria"] == riesgo for p in r["items"])
+
+
+@pytest.mark.parametrize("params", [{"limit": "0"}, {"limit": "x"}, {"fields": "labs,clave"}, {"cursor": "%%%"}])
+def test_listado_parametros_invalidos(client, params):
+    assert client.get("/api/pacientes", params=params).status_code == 400
@@ -0,0 +1,96 @@
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from rcvco.api.app import app
+from rcvco.parsing.pdf import ExtraccionPDFError, _ejecutar, _Procesos, labs_desde_texto
+
+client = TestClient(app)
+
+LAYOUT = """
+  LABORATORIO CLÍNICO                              Fecha: 12/03/2025
+  Examen                          Resultado   Unidad     Referencia
+  Creatinina en suero             1,18        mg/dL      0.7 - 1.3
+  Creatinina en orina             85          mg/dL
+  Colesterol LDL (calculado)      142         mg/dL      < 100
+  Hemoglobina glicosilada HbA1c   7.4 %                  < 5.7
+  Colesterol LDL                  150         mg/dL
+"""
+
+
+def _pdf(paginas):
+    """PDF mínimo válido (una línea de texto por página) para pdftotext."""
+    objetos = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for texto in paginas:
+        flujo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET".encode("latin-1")
+        objetos.append(f"<< /Length {len(flujo)} >>\nstream\n{flujo.decode('latin-1')}\nendstream")
+        objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objetos)} 0 R >>")
+        kids.append(f"{len(objetos)} 0 R")
+    objetos[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    salida = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objetos, 1):
+        offsets.append(len(salida))
+        salida += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    salida += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return salida
+
+
+def test_labs_desde_texto_layout():
+    labs = labs_desde_texto(LAYOUT)
+    assert labs == [
+        {"nombre": "CREATININA EN SUERO U OTROS", "valor": 1.18, "unidad": "mg/dL"},
+        {"nombre": "COLESTEROL LDL", "valor": 142.0, "unidad": "mg/dL"},
+        {"nombre": "HEMOGLOBINA GLICOSILADA (HBA1C)", "valor": 7.4, "unidad": "%"},
+    ]
+
+
+def test_upload_texto_plano():
+    r = client.post("/api/upload", files={"file": ("informe.txt", "LDL 130 mg/dL\nGlucosa: 98 mg/dL 2025-02-01", "text/plain")})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["patient"] == {"pseudo_id": "informe", "sexo": "M", "edad": 60}
+    assert data["labs"][1] == {"nombre": "GLUCOSA EN AYUNAS", "valor": 98.0, "unidad": "mg/dL", "fecha": "2025-02-01"}
+
+
+@pytest.mark.skipif(shutil.which("pdftotext") is None, reason="requiere poppler-utils")
+def test_upload_pdf_multipagina():
+    pdf = _pdf(["Creatinina en suero   1.2   mg/dL", "Colesterol LDL   160   mg/dL"])
+    r = client.post("/api/upload", files={"file": ("labs.pdf", pdf, "application/pdf")})
+    assert r.status_code == 200
+    assert [(lab["nombre"], lab["valor"]) for lab in r.json()["labs"]] == [
+        ("CREATININA EN SUERO U OTROS", 1.2),
+        ("COLESTEROL LDL", 160.0),
+    ]
+
+
+@pytest.mark.skipif(shutil.which("pdftotext") is None, reason="requiere poppler-utils")
+def test_upload_pdf_danado_422():
+    r = client.post("/api/upload", files={"file": ("roto.pdf", b"%PDF-1.4 basura", "application/pdf")})
+    assert r.status_code == 422
+
+
+def test_plazo_mata_el_subproceso():
+    inicio = time.monotonic()
+    with pytest.raises(ExtraccionPDFError):
+        _ejecutar(["sleep", "30"], inicio + 0.2)
+    assert time.monotonic() - inicio < 5
+
+
+def test_cancelar_mata_subprocesos_en_curso():
+    procesos = _Procesos()
+    hilo = ThreadPoolExecutor(max_workers=1)
+    futuro = hilo.submit(_ejecutar, ["sleep", "30"], time.monotonic() + 60, procesos)
+    while not procesos._vivos:
+        time.sleep(0.01)
+    procesos.cancelar()
+    with pytest.raises(ExtraccionPDFError):
+        futuro.result(timeout=5)
+    with pytest.raises(ExtraccionPDFError):
+        procesos.lanzar(["true"])
+    hilo.shutdown()
@@ -0,0 +1,62 @@
+import random
+from datetime import date, timedelta
+from rcvco.domain.programacion import Solicitud, programar_cohorte
+from rcvco.domain.rcv_rules import INTERVALOS, examenes_programables, generar_agenda_avanzada
+
+HOY = date(2025, 1, 1)
+
+
+def _cohorte(n, seed=0, dias=30):
+    rnd = random.Random(seed)
+    return [
+        Solicitud(f"P{i}", HOY + timedelta(days=rnd.randint(0, dias)), rnd.choice(["E1", "E2", "E3A", "E3B", "E4"]), rnd.random() < 0.5)
+        for i in range(n)
+    ]
+
+
+def test_sin_limite_de_cupos_coincide_con_la_agenda_individual():
+    cohorte = _cohorte(300, seed=1)
+    prog = programar_cohorte(cohorte, cupos_dia=10_000, hoy=HOY)
+    assert prog.desplazadas == 0 and prog.fuera_de_ventana == 0
+    for s in cohorte:
+        esperado = generar_agenda_avanzada(s.fecha_base, s.estadio, s.tiene_dm, hoy=HOY)
+        assert sorted((a.examen, a.fecha_programada) for a in prog.agenda(s.clave)) == sorted(
+            (a.examen, a.fecha_programada) for a in esperado
+        )
+
+
+def test_respeta_cupos_y_ventanas():
+    cohorte = [Solicitud(f"P{i}", HOY, "E4", True) for i in range(400)]  # misma fecha base
+    festivo = HOY + timedelta(days=55)
+    prog = programar_cohorte(cohorte, cupos_dia=40, hoy=HOY, cupos={festivo: 0})
+    assert max(prog.carga.values()) <= 40 and festivo not in prog.carga
+    assert prog.desplazadas > 0 and prog.fuera_de_ventana == 0
+    for v in prog.visitas:
+        assert HOY <= v.fecha <= v.limite
+        for examen in v.examenes:
+            d_min, d_max = INTERVALOS[examen]["E4"]
+            assert HOY + timedelta(days=d_min - 14) <= v.fecha <= HOY + timedelta(days=d_max)
+    por_paciente = prog.agenda("P0")
+    assert len(por_paciente) == len(generar_agenda_avanzada(HOY, "E4", True))
+
+
+def test_sin_hueco_se_programa_despues_del_limite():
+    cohorte = [Solicitud(f"P{i}", HOY, "E1", False) for i in range(20)]
+    prog = programar_cohorte(cohorte, cupos_dia=1, hoy=HOY)
+    assert set(prog.carga.values()) == {1}
+    tarde = [v for v in prog.visitas if not v.en_ventana]
+    assert tarde and all(v.fecha > v.limite for v in tarde)
+
+
+def test_vencidos_desde_hoy():
+    prog = programar_cohorte([Solicitud("P", HOY - timedelta(days=400), "E4")], cupos_dia=5, hoy=HOY)
+    assert [v.fecha for v in prog.visitas] == [HOY]
+
+
+def test_escala_a_una_clinica():
+    cohorte = _cohorte(10_000, seed=2)
+    prog = programar_cohorte(cohorte, cupos_dia=150, hoy=HOY)
+    assert max(prog.carga.values()) <= 150
+    assert sum(len(v.examenes) for v in prog.visitas) == sum(
+        len(examenes_programables(s.estadio, s.tiene_dm)) for s in cohorte
+    )
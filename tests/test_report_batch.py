@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from rcvco.adapters.llm import factory
+from rcvco.adapters.llm.base import ErrorLLM
+from rcvco.api.app import app
+from rcvco.config import settings
+from rcvco.services.report_batch import Metricas, generar_informes, percentiles
+from rcvco.services.report_cache import CACHE_INFORMES
+
+
+class Latente:
+    proveedor = "stub"
+    model = "lote"
+
+    def __init__(self, retardo=0.05):
+        self.retardo = retardo
+        self.activas = 0
+        self.max_activas = 0
+
+    async def agenerate_report(self, prompt):
+        self.activas += 1
+        self.max_activas = max(self.max_activas, self.activas)
+        try:
+            await asyncio.sleep(self.retardo)
+            if "falla" in prompt:
+                raise ErrorLLM("stub HTTP 500")
+            return "informe: " + prompt.split()[1]
+        finally:
+            self.activas -= 1
+
+
+def _paciente(pid, edad=60):
+    return {"pseudo_id": pid, "sexo": "F", "edad": edad, "labs": [], "medications": []}
+
+
+def _ndjson(registros):
+    return "".join(json.dumps(r) + "\n" for r in registros)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    CACHE_INFORMES.limpiar()
+    cliente = Latente()
+    monkeypatch.setattr(factory, "_provider_cache", cliente)
+    yield cliente
+    CACHE_INFORMES.limpiar()
+
+
+def test_percentiles_rango_mas_cercano():
+    assert percentiles(list(range(1, 101))) == {"p50": 50, "p90": 90, "p95": 95, "p99": 99, "max": 100}
+    assert percentiles([7.0]) == {"p50": 7.0, "p90": 7.0, "p95": 7.0, "p99": 7.0, "max": 7.0}
+    assert percentiles([]) == {}
+
+
+def test_lote_concurrente_y_acotado(llm):
+    async def lineas():
+        for i in range(20):
+            yield i + 1, json.dumps(_paciente(f"p{i}")).encode()
+
+    async def escenario():
+        metricas = Metricas()
+        res = [r async for r in generar_informes(llm, lineas(), concurrencia=5, cache=None, metricas=metricas)]
+        return res, metricas.resumen()
+
+    inicio = time.perf_counter()
+    resultados, resumen = asyncio.run(escenario())
+    transcurrido = time.perf_counter() - inicio
+    assert sorted(r["linea"] for r in resultados) == list(range(1, 21))
+    assert all(r["report_text"] == f"informe: {r['pseudo_id']}" for r in resultados)
+    assert llm.max_activas == 5
+    assert transcurrido < 20 * llm.retardo / 2  # ~4 rondas, no 20 llamadas en serie
+    assert resumen["ok"] == 20 and resumen["errores"] == 0
+    assert set(resumen["latencia_ms"]) == {"p50", "p90", "p95", "p99", "max"}
+
+
+def test_emite_mientras_la_entrada_sigue_llegando(llm):
+    emitido = None
+
+    async def lineas():
+        nonlocal emitido
+        emitido = asyncio.Event()
+        yield 1, json.dumps(_paciente("p0")).encode()
+        await asyncio.wait_for(emitido.wait(), timeout=5)  # productor lento
+        yield 2, json.dumps(_paciente("p1")).encode()
+
+    async def escenario():
+        res = []
+        async for r in generar_informes(llm, lineas(), concurrencia=5, cache=None):
+            res.append(r["linea"])
+            emitido.set()
+        return res
+
+    assert asyncio.run(escenario()) == [1, 2]
+
+
+def test_endpoint_aisla_fallos_y_resume(llm, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_BATCH_CONCURRENCIA", 3)
+    cuerpo = _ndjson([_paciente("a"), _paciente("falla"), {"pseudo_id": "b", "sexo": "X", "edad": 1}, _paciente("c")])
+    cuerpo += "no es json\n"
+    resp = TestClient(app).post(
+        "/api/report/batch", content=cuerpo, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert resp.status_code == 200
+    *items, final = [json.loads(linea) for linea in resp.text.splitlines()]
+    por_linea = {r["linea"]: r for r in items}
+    assert por_linea[1]["report_text"] == "informe: a" and por_linea[4]["report_text"] == "informe: c"
+    assert por_linea[2]["error"] == "LLM" and por_linea[2]["pseudo_id"] == "falla"
+    assert por_linea[3]["error"] == "Validación"
+    assert por_linea[5]["error"] == "JSON inválido"
+    resumen = final["resumen"]
+    assert (resumen["total"], resumen["ok"], resumen["errores"]) == (5, 2, 3)
+    assert resumen["latencia_ms"]["max"] >= llm.retardo * 1000 * 0.9
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from rcvco.api.app import app
+from rcvco.services.report_cache import CACHE_INFORMES, CacheInformes, clave_informe
+from rcvco.services.report_service import abuild_and_generate_report, build_and_generate_report
+
+DATOS = {"pseudo_id": "p1", "sexo": "M", "edad": 60, "labs": [{"nombre": "COLESTEROL LDL", "valor": 140}]}
+
+
+class Lento:
+    proveedor = "stub"
+    model = "m1"
+
+    def __init__(self, falla=False):
+        self.llamadas = 0
+        self.falla = falla
+
+    async def agenerate_report(self, prompt):
+        self.llamadas += 1
+        await asyncio.sleep(0.05)
+        if self.falla:
+            raise RuntimeError("proveedor caído")
+        return f"informe {self.llamadas}"
+
+    def generate_report(self, prompt):
+        self.llamadas += 1
+        time.sleep(0.05)
+        return f"informe {self.llamadas}"
+
+
+def test_single_flight_async():
+    cache, llm = CacheInformes(), Lento()
+
+    async def rafaga():
+        return await asyncio.gather(*(abuild_and_generate_report(llm, DATOS, cache) for _ in range(10)))
+
+    assert asyncio.run(rafaga()) == ["informe 1"] * 10
+    assert llm.llamadas == 1
+    assert cache.estadisticas == {"aciertos": 0, "fallos": 1, "coalescidas": 9, "expulsiones": 0}
+    assert asyncio.run(abuild_and_generate_report(llm, DATOS, cache)) == "informe 1"
+    assert cache.estadisticas["aciertos"] == 1
+
+
+def test_single_flight_sync_hilos():
+    cache, llm = CacheInformes(), Lento()
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(build_and_generate_report(llm, DATOS, cache))) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert resultados == ["informe 1"] * 6 and llm.llamadas == 1
+
+
+def test_errores_no_se_cachean():
+    cache, llm = CacheInformes(), Lento(falla=True)
+    with pytest.raises(RuntimeError):
+        asyncio.run(abuild_and_generate_report(llm, DATOS, cache))
+    llm.falla = False
+    assert asyncio.run(abuild_and_generate_report(llm, DATOS, cache)) == "informe 2"
+
+
+def test_ttl_lru_y_normalizacion():
+    ahora = [0.0]
+    cache = CacheInformes(ttl_s=10, max_items=2, reloj=lambda: ahora[0])
+    llm = Lento()
+    assert clave_informe(llm, "a  b\n c ") == clave_informe(llm, "a b c")
+    otro_modelo = Lento()
+    otro_modelo.model = "m2"
+    assert clave_informe(llm, "a") != clave_informe(otro_modelo, "a")
+    for k in ("x", "y"):
+        cache.guardar(k, k.upper())
+    assert cache.obtener("x") == "X"
+    cache.guardar("z", "Z")  # expulsa "y" (menos usada)
+    assert cache.obtener("y") is None and cache.obtener("x") == "X"
+    ahora[0] = 11
+    assert cache.obtener("x") is None
+    assert cache.estadisticas["expulsiones"] == 2
+
+
+def test_endpoint_cache_stats(monkeypatch):
+    from rcvco.adapters.llm import factory
+    monkeypatch.setattr(factory, "_provider_cache", Lento())
+    CACHE_INFORMES.limpiar()
+    client = TestClient(app)
+    antes = client.get("/api/report/cache").json()
+    payload = {"pseudo_id": "cache1", "sexo": "F", "edad": 70, "labs": [], "medications": []}
+    assert client.post("/api/report", json=payload).json() == client.post("/api/report", json=payload).json()
+    despues = client.get("/api/report/cache").json()
+    assert despues["aciertos"] == antes["aciertos"] + 1
+    assert despues["fallos"] == antes["fallos"] + 1
+    CACHE_INFORMES.limpiar()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from rcvco.adapters.llm import factory
+from rcvco.adapters.llm.base import ErrorLLM
+from rcvco.api.app import app
+from rcvco.services.facade import SERVICIOS_LOCALES, ServiciosHTTP
+from rcvco.services.report_cache import CACHE_INFORMES
+
+PAYLOAD = {"pseudo_id": "sse1", "sexo": "F", "edad": 70, "labs": [], "medications": []}
+
+
+class PorFragmentos:
+    proveedor = "stub"
+    model = "sse"
+
+    def __init__(self, falla_tras=None):
+        self.llamadas = 0
+        self.falla_tras = falla_tras
+
+    async def astream_report(self, prompt):
+        self.llamadas += 1
+        for i, palabra in enumerate(("Informe ", "por ", "partes")):
+            if self.falla_tras == i:
+                raise ErrorLLM("stub: stream interrumpido")
+            await asyncio.sleep(0)
+            yield palabra
+
+
+def _eventos(texto):
+    eventos = []
+    for bloque in texto.strip().split("\n\n"):
+        nombre, datos = "message", None
+        for linea in bloque.splitlines():
+            if linea.startswith("event:"):
+                nombre = linea[6:].strip()
+            elif linea.startswith("data:"):
+                datos = json.loads(linea[5:])
+        eventos.append((nombre, datos))
+    return eventos
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    CACHE_INFORMES.limpiar()
+    cliente = PorFragmentos()
+    monkeypatch.setattr(factory, "_provider_cache", cliente)
+    yield cliente
+    CACHE_INFORMES.limpiar()
+
+
+def test_sse_emite_fragmentos_y_fin(llm):
+    resp = TestClient(app).post("/api/report/stream", json=PAYLOAD)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.headers["cache-control"] == "no-cache"
+    eventos = _eventos(resp.text)
+    assert [d["delta"] for n, d in eventos if n == "message"] == ["Informe ", "por ", "partes"]
+    assert eventos[-1] == ("fin", {"report_text": "Informe por partes"})
+
+
+def test_sse_informe_completo_queda_en_cache(llm):
+    client = TestClient(app)
+    client.post("/api/report/stream", json=PAYLOAD)
+    segundo = _eventos(client.post("/api/report/stream", json=PAYLOAD).text)
+    assert llm.llamadas == 1
+    assert segundo == [("message", {"delta": "Informe por partes"}), ("fin", {"report_text": "Informe por partes"})]
+    assert client.post("/api/report", json=PAYLOAD).json()["report_text"] == "Informe por partes"
+
+
+def test_sse_error_del_proveedor(llm):
+    llm.falla_tras = 1
+    eventos = _eventos(TestClient(app).post("/api/report/stream", json=PAYLOAD).text)
+    assert eventos[0] == ("message", {"delta": "Informe "})
+    assert eventos[-1][0] == "error" and "interrumpido" in eventos[-1][1]["detail"]
+    assert len(CACHE_INFORMES) == 0
+
+
+def test_fachada_local_y_http_emiten_el_mismo_texto(llm):
+    async def escenario():
+        remoto = ServiciosHTTP("http://api", transport=httpx.ASGITransport(app=app))
+        try:
+            local = [f async for f in SERVICIOS_LOCALES.stream_report(PAYLOAD)]
+            CACHE_INFORMES.limpiar()
+            http = [f async for f in remoto.stream_report(PAYLOAD)]
+        finally:
+            await remoto.cerrar()
+        return local, http
+
+    local, http = asyncio.run(escenario())
+    assert local == http == ["Informe ", "por ", "partes"]
@@ -0,0 +1,59 @@
+from rcvco.adapters.session_history import HistorialSesiones, clave_historial
+
+
+def _snap(nombre, **extra):
+    return {"nombre": nombre, "edad": "60", "riesgo": "ALTO", **extra}
+
+
+def test_guardar_reemplaza_y_ordena_por_uso():
+    h = HistorialSesiones()
+    h.guardar("s1", _snap("Ana"))
+    h.guardar("s1", _snap("Luis"))
+    h.guardar("s1", _snap("ana ", riesgo="BAJO"))  # misma clave normalizada
+    assert [s["nombre"] for s in h.listar("s1")] == ["ana ", "Luis"]
+    assert h.obtener("s1", "ANA")["riesgo"] == "BAJO"
+    assert h.obtener("s1", "  luis") is not None
+    assert [s["clave"] for s in h.listar("s1")] == ["LUIS", "ANA"]
+    assert h.listar("s2") == []
+
+
+def test_clave_por_pseudo_id():
+    assert clave_historial(_snap("Ana", pseudo_id="P-9")) == "P-9"
+    h = HistorialSesiones()
+    h.guardar("s1", _snap("Ana", pseudo_id="P-9"))
+    assert h.obtener("s1", "P-9")["nombre"] == "Ana"
+
+
+def test_expulsion_lru_por_sesion():
+    h = HistorialSesiones(max_items=3)
+    for n in ("a", "b", "c"):
+        h.guardar("s1", _snap(n))
+    h.obtener("s1", "A")  # "a" pasa a ser la más reciente
+    h.guardar("s1", _snap("d"))
+    assert [s["clave"] for s in h.listar("s1")] == ["D", "A", "C"]
+
+
+def test_persistencia_y_carga_diferida(tmp_path):
+    ruta = str(tmp_path / "historial.db")
+    h = HistorialSesiones(ruta, max_items=2, max_sesiones=1)
+    for n in ("a", "b", "c"):
+        h.guardar("s1", _snap(n))
+    h.guardar("s2", _snap("z"))  # expulsa s1 de memoria; sigue en disco
+    assert len(h) == 1
+    assert [s["clave"] for s in h.listar("s1")] == ["C", "B"]
+
+    otro = HistorialSesiones(ruta, max_items=2)
+    assert len(otro) == 0
+    assert otro.obtener("s1", "B")["nombre"] == "b"
+    assert [s["clave"] for s in otro.listar("s1")] == ["B", "C"]
+    assert otro.eliminar("s2", "Z") and otro.listar("s2") == []
+    assert HistorialSesiones(ruta).listar("s2") == []
+
+
+def test_obtener_busca_en_disco_lo_que_guardo_otro_worker(tmp_path):
+    ruta = str(tmp_path / "historial.db")
+    a, b = HistorialSesiones(ruta), HistorialSesiones(ruta)
+    assert b.listar("s1") == []  # b ya tiene la sesión en memoria
+    a.guardar("s1", _snap("Ana"))
+    assert b.obtener("s1", "ana")["nombre"] == "Ana"
+    assert [s["clave"] for s in b.listar("s1")] == ["ANA"]
@@ -0,0 +1,61 @@
+import random
+from datetime import date, timedelta
+from rcvco.domain.models import AgendaItem
+from rcvco.domain.unificacion import agrupar_ventanas, unificar_agenda, unificar_agendas
+
+D0 = date(2025, 1, 1)
+
+
+def _item(examen, dias):
+    f = D0 + timedelta(days=dias)
+    return AgendaItem(examen=examen, fecha_programada=f, motivo="x", revision_fecha=f + timedelta(days=7))
+
+
+def _anclado_cuadratico(fechas, ventana=14):
+    """Referencia: agrupación anclada con el bucle i/j anterior."""
+    orden = sorted(fechas)
+    salida, i = [], 0
+    while i < len(orden):
+        j = i + 1
+        while j < len(orden) and (orden[j] - orden[i]).days <= ventana:
+            j += 1
+        salida.extend([orden[i]] * (j - i))
+        i = j
+    return salida
+
+
+def test_grupos_anclados_en_la_mas_temprana():
+    fechas = [D0 + timedelta(days=d) for d in (20, 0, 14, 15, 30, 40)]
+    grupos = agrupar_ventanas(fechas)
+    assert [(g.fecha, g.indices) for g in grupos] == [
+        (D0, (1, 2)),
+        (D0 + timedelta(days=15), (3, 0)),
+        (D0 + timedelta(days=30), (4, 5)),
+    ]
+
+
+def test_unificar_no_muta_y_recalcula_revision():
+    items = [_item("LDL", 10), _item("CREAT", 0), _item("HBA1C", 40)]
+    agenda = unificar_agenda(items)
+    assert [(a.examen, a.fecha_programada) for a in agenda] == [("CREAT", D0), ("LDL", D0), ("HBA1C", D0 + timedelta(days=40))]
+    assert agenda[1].revision_fecha == D0 + timedelta(days=7)
+    assert items[0].fecha_programada == D0 + timedelta(days=10)
+
+
+def test_equivale_a_la_referencia_y_agrupa_por_paciente():
+    rnd = random.Random(7)
+    agendas = {f"P{p}": [_item(f"E{k}", rnd.randint(0, 400)) for k in range(rnd.randint(0, 12))] for p in range(200)}
+    por_paciente = unificar_agendas(agendas)
+    assert set(por_paciente) == set(agendas)
+    for pid, items in agendas.items():
+        esperado = _anclado_cuadratico([it.fecha_programada for it in items])
+        assert [a.fecha_programada for a in por_paciente[pid]] == esperado
+        assert por_paciente[pid] == unificar_agenda(items)
+
+
+def test_escala_a_una_clinica():
+    rnd = random.Random(1)
+    agendas = {p: [_item(f"E{k}", rnd.randint(0, 365)) for k in range(14)] for p in range(10_000)}
+    resultado = unificar_agendas(agendas)
+    assert list(resultado) == list(agendas)
+    assert sum(len(v) for v in resultado.values()) == 14 * 10_000
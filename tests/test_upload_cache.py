@@ -0,0 +1,67 @@
+import os
+import time
+from fastapi.testclient import TestClient
+from rcvco.api.app import app
+from rcvco.services.upload_cache import CACHE_UPLOADS, CacheDocumentos, hash_contenido
+
+client = TestClient(app)
+
+
+def test_lru_en_memoria():
+    cache = CacheDocumentos(max_items=2, version="v1")
+    for k in ("a", "b"):
+        cache.guardar(cache.clave(k, "pdf"), {"labs": [k]})
+    assert cache.obtener(cache.clave("a", "pdf")) == {"labs": ["a"]}  # "a" pasa a ser el más reciente
+    cache.guardar(cache.clave("c", "pdf"), {"labs": ["c"]})
+    assert cache.obtener(cache.clave("b", "pdf")) is None
+    assert cache.obtener(cache.clave("a", "pdf")) is not None
+    assert cache.estadisticas == {"memoria": 2, "disco": 0, "fallos": 1}
+
+
+def test_disco_persiste_y_cambio_de_version_invalida(tmp_path):
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return {"labs": [{"nombre": "COLESTEROL LDL", "valor": 130.0}]}
+
+    digest = hash_contenido(b"%PDF-1.4 informe")
+    CacheDocumentos(directorio=tmp_path, version="v1").obtener_o_calcular(digest, "pdf", calcular)
+    otra = CacheDocumentos(directorio=tmp_path, version="v1")
+    assert otra.obtener_o_calcular(digest, "pdf", calcular)["labs"][0]["valor"] == 130.0
+    assert otra.estadisticas["disco"] == 1 and len(llamadas) == 1
+    CacheDocumentos(directorio=tmp_path, version="v2").obtener_o_calcular(digest, "pdf", calcular)
+    assert len(llamadas) == 2
+
+
+def test_disco_acotado_expulsa_menos_usados(tmp_path):
+    cache = CacheDocumentos(directorio=tmp_path, max_bytes=350, version="v1")
+    relleno = "x" * 80
+    for i, k in enumerate(("a", "b", "c")):
+        cache.guardar(cache.clave(k, "pdf"), {"k": k, "relleno": relleno})
+        os.utime(tmp_path / f"{cache.clave(k, 'pdf')}.json", ns=(i * 10**9, i * 10**9))
+    cache.limpiar_memoria()
+    assert cache.obtener(cache.clave("a", "pdf")) is not None  # renueva mtime de "a"
+    cache.guardar(cache.clave("d", "pdf"), {"k": "d", "relleno": relleno})
+    restantes = sorted(p.name.split("-")[0] for p in tmp_path.glob("*.json"))
+    assert restantes == ["a", "c", "d"]
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json")) <= 350
+
+
+def test_reupload_usa_cache():
+    contenido = f"LDL 131 mg/dL {time.time_ns()}".encode()
+    antes = dict(CACHE_UPLOADS.estadisticas)
+    r1 = client.post("/api/upload", files={"file": ("uno.txt", contenido, "text/plain")})
+    r2 = client.post("/api/upload", files={"file": ("dos.txt", contenido, "text/plain")})
+    assert r1.json()["labs"] == r2.json()["labs"]
+    assert r2.json()["patient"]["pseudo_id"] == "dos"
+    assert CACHE_UPLOADS.estadisticas["memoria"] == antes["memoria"] + 1
+    assert CACHE_UPLOADS.estadisticas["fallos"] == antes["fallos"] + 1
+
+
+def test_mismo_contenido_distinto_modo_no_comparte_entrada():
+    contenido = f"LDL 132 mg/dL {time.time_ns()}".encode()
+    r_txt = client.post("/api/upload", files={"file": ("a.txt", contenido, "text/plain")})
+    r_pdf = client.post("/api/upload", files={"file": ("a.pdf", contenido, "application/pdf")})
+    assert r_txt.status_code == 200
+    assert r_pdf.status_code == 422
@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+from fastapi.testclient import TestClient
+from rcvco.api.app import app
+from rcvco.config import settings
+from rcvco.services.upload_service import ArchivoDemasiadoGrande, recibir_stream
+
+client = TestClient(app)
+
+
+async def _chunks(partes):
+    for p in partes:
+        yield p
+
+
+def test_recibir_stream_hashea_y_vuelca_a_disco(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_SPOOL_BYTES", 1024)
+    partes = [b"a" * 700, b"b" * 700]
+    archivo = asyncio.run(recibir_stream(_chunks(partes), "x.txt", max_bytes=2000))
+    try:
+        assert archivo.sha256 == hashlib.sha256(b"".join(partes)).hexdigest()
+        assert archivo.tamano == 1400 and archivo.en_disco
+        assert archivo.memoria()["buffer_ram"] == 0
+        assert archivo.archivo.read() == b"".join(partes)
+    finally:
+        archivo.cerrar()
+
+
+def test_recibir_stream_corta_al_superar_maximo():
+    consumidos = []
+
+    async def chunks():
+        for i in range(10):
+            consumidos.append(i)
+            yield b"x" * 100
+
+    try:
+        asyncio.run(recibir_stream(chunks(), "x.txt", max_bytes=250))
+    except ArchivoDemasiadoGrande:
+        pass
+    else:
+        raise AssertionError("debía rechazarse")
+    assert consumidos == [0, 1, 2]
+
+
+def test_upload_cuerpo_crudo_con_memoria_en_cabeceras():
+    r = client.post("/api/upload?filename=crudo.txt", content=b"LDL 128 mg/dL\nHDL 41 mg/dL")
+    assert r.status_code == 200
+    assert r.json()["patient"]["pseudo_id"] == "crudo"
+    assert [lab["nombre"] for lab in r.json()["labs"]] == ["COLESTEROL LDL", "COLESTEROL HDL"]
+    assert r.headers["X-Upload-Bytes"] == "26"
+    assert int(r.headers["X-RSS-Pico-Proceso-KB"]) >= 0
+
+
+def test_upload_rechaza_por_tamano(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1000)
+    grande = b"LDL 130 mg/dL\n" * 200
+    r = client.post("/api/upload", files={"file": ("grande.txt", grande, "text/plain")})
+    assert r.status_code == 413
+    r = client.post("/api/upload?filename=grande.txt", content=grande)
+    assert r.status_code == 413
+
+
+def test_upload_rechaza_sin_content_length(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1000)
+
+    def cuerpo():
+        for _ in range(20):
+            yield b"x" * 100
+
+    r = client.post("/api/upload?filename=f.txt", content=cuerpo())
+    assert r.status_code == 413
+
+
+def test_upload_multipart_sin_campo_file():
+    r = client.post("/api/upload", files={"otro": ("a.txt", b"LDL 1", "text/plain")})
+    assert r.status_code == 400